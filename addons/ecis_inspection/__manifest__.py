@@ -22,10 +22,20 @@
         'security/ir.model.access.csv',
         'data/sequences.xml',
         'data/checklist_templates.xml',
+        'data/ir_cron.xml',
+        'data/retention_policies.xml',
         'views/equipment_views.xml',
         'views/inspection_views.xml',
         # 'views/quote_request_views.xml',
         'views/menu_views.xml',
+        'views/profile_views.xml',
+        'views/archive_views.xml',
+        'views/retention_views.xml',
+        'views/equipment_import_views.xml',
+        'views/inspector_views.xml',
+        'views/webhook_views.xml',
+        'views/checklist_rollup_views.xml',
+        'views/api_key_views.xml',
         'reports/inspection_report.xml',
         'reports/inspection_report_template.xml',
         'data/mail_template.xml',
@@ -1,19 +1,78 @@
 import base64
+import functools
+import hmac
 import json
+import time
 from datetime import date, datetime
 
-from odoo import http, fields
+from odoo import http, fields, tools
 from odoo.exceptions import ValidationError, UserError
 from odoo.http import request
 
+from . import schemas
+from ..models.api_key import LEGACY_ENTRY
+from ..tools import instrumentation, metrics, profiling, ratelimit, replica, schema
+
+
+def instrumented(endpoint):
+    """
+    Record route metrics for ``endpoint``, bind a request timer around it
+    when Server-Timing is enabled and profile it when asked to
+    """
+    @functools.wraps(endpoint)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        status, response_bytes = 500, 0
+        enabled, debug = self._timing_mode()
+        instrumentation.start(enabled, debug=debug)
+        try:
+            trigger = self._profile_trigger()
+            if trigger:
+                with profiling.profile(request.env, request.httprequest.path, trigger):
+                    response = endpoint(self, *args, **kwargs)
+            else:
+                response = endpoint(self, *args, **kwargs)
+            status = getattr(response, 'status_code', 200)
+            response_bytes = getattr(response, 'content_length', None) or 0
+            return response
+        finally:
+            instrumentation.stop()
+            metrics.get_store().observe_request(
+                endpoint.__name__,
+                request.httprequest.method,
+                status,
+                time.perf_counter() - started,
+                request.httprequest.content_length or 0,
+                response_bytes,
+            )
+    return wrapper
+
 
 class EcisInspectionApiController(http.Controller):
     def _add_cors_headers(self, response):
         response.headers['Access-Control-Allow-Origin'] = '*'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-API-Key, Accept'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-API-Key, Accept, X-ECIS-Debug, X-ECIS-Profile'
+        response.headers['Access-Control-Expose-Headers'] = 'Server-Timing, Retry-After'
         return response
 
+    def _timing_mode(self):
+        """Return (enabled, debug): config/parameter enable headers, X-ECIS-Debug adds the debug block"""
+        if request.httprequest.headers.get('X-ECIS-Debug') and self._api_key_valid('reports'):
+            return True, True
+        if tools.config.get('ecis_server_timing'):
+            return True, False
+        param = request.env['ir.config_parameter'].sudo().get_param('ecis_inspection.server_timing')
+        return self._parse_bool(param), False
+
+    def _profile_trigger(self):
+        """Return why this request should be profiled, if at all"""
+        if request.httprequest.headers.get('X-ECIS-Profile') and self._api_key_valid('reports'):
+            return 'header'
+        if profiling.should_sample(request.env):
+            return 'sample'
+        return None
+
     def _json_default(self, value):
         if isinstance(value, (date, datetime)):
             return value.isoformat()
@@ -22,12 +81,25 @@ class EcisInspectionApiController(http.Controller):
         return str(value)
 
     def _json_response(self, payload, status=200):
-        body = json.dumps(payload, default=self._json_default)
+        timer = instrumentation.current()
+        if timer:
+            if status < 400:
+                with timer.phase('flush'):
+                    request.env.flush_all()
+            with timer.phase('serialize'):
+                body = json.dumps(payload, default=self._json_default)
+            if timer.debug and isinstance(payload, dict):
+                payload = dict(payload, debug=timer.summary())
+                body = json.dumps(payload, default=self._json_default)
+        else:
+            body = json.dumps(payload, default=self._json_default)
         response = request.make_response(
             body,
             headers=[('Content-Type', 'application/json')],
             status=status,
         )
+        if timer:
+            response.headers['Server-Timing'] = timer.server_timing()
         return self._add_cors_headers(response)
 
     def _error_response(self, message, status=400, details=None):
@@ -37,35 +109,19 @@ class EcisInspectionApiController(http.Controller):
         return self._json_response(payload, status=status)
 
     def _get_payload(self):
-        payload = {}
-
-        json_body = request.httprequest.get_json(silent=True)
-        if isinstance(json_body, dict):
-            payload.update(json_body)
-        elif json_body is not None:
-            payload['_raw'] = json_body
-
-        form_data = request.httprequest.form
-        if form_data:
-            payload.update(form_data.to_dict())
-
-        args_data = request.httprequest.args
-        if args_data:
-            payload.update(args_data.to_dict())
-
-        if not payload:
-            raw = request.httprequest.data
-            if raw:
-                try:
-                    parsed = json.loads(raw.decode('utf-8'))
-                    if isinstance(parsed, dict):
-                        payload.update(parsed)
-                    else:
-                        payload['_raw'] = parsed
-                except Exception:
-                    payload['_raw'] = raw.decode('utf-8', 'replace')
-
-        return payload
+        """Unvalidated query and body parameters, for routes without a schema"""
+        try:
+            return schema.parse_body(request.httprequest)
+        except schema.SchemaError:
+            return {}
+
+    def _validate(self, validator):
+        """Parse the request once and return ``validator``'s clean values; raises schema.SchemaError"""
+        with instrumentation.phase('parse'):
+            return validator(schema.parse_body(request.httprequest))
+
+    def _schema_error_response(self, exc):
+        return self._error_response('Invalid request', status=400, details={'errors': exc.errors})
 
     def _get_api_key(self):
         return request.env['ir.config_parameter'].sudo().get_param('ecis_inspection.api_key')
@@ -79,11 +135,42 @@ class EcisInspectionApiController(http.Controller):
             return header_key.strip()
         return request.params.get('api_key')
 
-    def _require_api_key(self):
-        expected = self._get_api_key()
+    def _authenticate(self):
+        """Return the ApiKeyEntry of the caller's key, or None"""
         provided = self._extract_api_key()
-        if not expected or not provided or provided != expected:
-            return self._error_response('Unauthorized', status=401)
+        if not provided:
+            return None
+        entry = request.env['ecis.api.key'].sudo()._verify(provided)
+        if entry:
+            return entry
+        legacy = self._get_api_key()
+        if legacy and hmac.compare_digest(legacy.encode(), provided.encode()):
+            return LEGACY_ENTRY
+        return None
+
+    def _api_key_valid(self, scope=None):
+        entry = self._authenticate()
+        return entry is not None and (scope is None or scope in entry.scopes)
+
+    def _require_api_key(self, scope):
+        """
+        Check the caller's key grants ``scope`` and is within its rate limit;
+        return the error response to send back, or None and bind the key to
+        the request
+        """
+        with instrumentation.phase('auth'):
+            entry = self._authenticate()
+            if entry is None:
+                return self._error_response('Unauthorized', status=401)
+            if scope not in entry.scopes:
+                return self._error_response('Forbidden', status=403, details=f'API key lacks the {scope} scope')
+            if entry.rate_limit:
+                allowed, retry_after = ratelimit.hit(('api_key', entry.id), entry.rate_limit)
+                if not allowed:
+                    response = self._error_response('Too many requests, please try again later', status=429)
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+            request.ecis_api_key = entry
         return None
 
     def _parse_bool(self, value):
@@ -95,7 +182,20 @@ class EcisInspectionApiController(http.Controller):
         except (TypeError, ValueError):
             return default
 
+    def _key_company_id(self):
+        """Company the caller's API key is bound to, None for the legacy key"""
+        entry = getattr(request, 'ecis_api_key', None)
+        return entry.company_id if entry else None
+
+    def _owned(self, record):
+        """Whether ``record`` may be reached with the caller's key; answer 404 when not"""
+        company_id = self._key_company_id()
+        return not company_id or record.company_id.id == company_id
+
     def _get_company(self):
+        entry = getattr(request, 'ecis_api_key', None)
+        if entry and entry.company_id:
+            return request.env['res.company'].sudo().browse(entry.company_id)
         company = request.env.company
         if company and company.id:
             return company
@@ -107,6 +207,10 @@ class EcisInspectionApiController(http.Controller):
             raise ValidationError('No company found to assign records.')
         return company
 
+    def _read(self, func):
+        """Run the read-only ``func(env)`` on the replica when one is usable"""
+        return replica.call(request.env, func)
+
     def _company_env(self, model_name):
         company = self._get_company_required()
         return request.env[model_name].sudo().with_company(company).with_context(
@@ -156,6 +260,7 @@ class EcisInspectionApiController(http.Controller):
         return {
             'id': item.id,
             'inspection_id': item.inspection_id.id,
+            'template_id': item.template_id.id or None,
             'sequence': item.sequence,
             'name': item.name,
             'requirement': item.requirement,
@@ -200,6 +305,29 @@ class EcisInspectionApiController(http.Controller):
             data['checklist'] = [self._serialize_checklist_item(i) for i in record.checklist_ids]
         return data
 
+    def _serialize_checklist_template(self, record):
+        return {
+            'id': record.id,
+            'name': record.name,
+            'equipment_type': record.equipment_type,
+            'requirement': record.requirement,
+            'sequence': record.sequence,
+            'description': record.description,
+        }
+
+    def _serialize_sync_record(self, stream, record, stamp):
+        if stream == 'inspections':
+            data = self._serialize_inspection(record)
+            data['equipment_id'] = record.equipment_id.id
+        elif stream == 'checklist':
+            data = self._serialize_checklist_item(record)
+        elif stream == 'equipment':
+            data = self._serialize_equipment(record)
+        else:
+            data = self._serialize_checklist_template(record)
+        data['write_date'] = stamp
+        return data
+
     def _serialize_quote_request(self, record):
         return {
             'id': record.id,
@@ -219,6 +347,74 @@ class EcisInspectionApiController(http.Controller):
             'assigned_to': record.assigned_to.id if record.assigned_to else False,
         }
 
+    def _serialize_archived_inspection(self, record, include_payload=False):
+        data = {
+            'id': record.id,
+            'name': record.name,
+            'original_id': record.original_id,
+            'inspection_date': record.inspection_date and record.inspection_date.isoformat(),
+            'inspection_type': record.inspection_type,
+            'state': record.state,
+            'overall_result': record.overall_result,
+            'equipment': {
+                'id': record.equipment_id.id,
+                'name': record.equipment_id.name,
+                'type': record.equipment_type,
+            },
+            'client': {
+                'id': record.client_id.id,
+                'name': record.client_id.name,
+            },
+            'inspector': {
+                'id': record.inspector_id.id,
+                'name': record.inspector_id.name,
+            },
+            'checklist_count': record.checklist_count,
+            'message_count': record.message_count,
+            'attachment_count': record.attachment_count,
+            'archived_date': record.archived_date,
+        }
+        if include_payload:
+            data.update(record.payload or {})
+        return data
+
+    def _serialize_equipment_import(self, job):
+        return {
+            'id': job.id,
+            'filename': job.name,
+            'state': job.state,
+            'progress': round(job.progress, 1),
+            'total_rows': job.total_rows,
+            'processed_rows': job.processed_rows,
+            'created': job.created_count,
+            'updated': job.updated_count,
+            'unchanged': job.unchanged_count,
+            'error_count': job.error_count,
+            'error_report_url': f'/api/equipment/import/{job.id}/errors' if job.error_report else None,
+            'failure': job.failure_message or None,
+        }
+
+    def _serialize_webhook(self, subscription, include_secret=False):
+        data = {
+            'id': subscription.id,
+            'name': subscription.name,
+            'url': subscription.url,
+            'events': sorted(subscription._event_set()),
+            'active': subscription.active,
+            'last_success': subscription.last_success_date or None,
+            'consecutive_failures': subscription.consecutive_failures,
+            'dead_letters': subscription.dead_count,
+        }
+        if include_secret:
+            data['secret'] = subscription.sudo().secret
+        return data
+
+    def _get_sync_inspector(self, inspector_id, env=None):
+        inspector = (env or request.env)['res.users'].sudo().browse(self._parse_int(inspector_id)).exists()
+        if not inspector:
+            raise ValidationError('A valid inspector_id is required.')
+        return inspector
+
     def _get_equipment_type_label(self, equipment_type):
         selection = request.env['ecis.equipment']._fields['equipment_type'].selection
         return dict(selection).get(equipment_type, equipment_type)
@@ -288,6 +484,7 @@ class EcisInspectionApiController(http.Controller):
             'serial_number': data.get('serial_number'),
             'location': data.get('location'),
             'notes': equipment_notes,
+            'quote_request_id': quote.id,
         })
 
     def _create_inspection(self, data, equipment, quote):
@@ -303,62 +500,106 @@ class EcisInspectionApiController(http.Controller):
         inspector_id = self._get_inspector_user_id()
         if not inspector_id:
             raise ValidationError('No inspector user available for inspection.')
-        return inspection_env.create({
+        inspection = inspection_env.create({
             'equipment_id': equipment.id,
             'inspection_type': 'initial',
             'inspection_date': fields.Date.today(),
             'inspector_notes': inspection_notes,
             'inspector_id': inspector_id,
             'company_id': self._get_company_required().id,
+            'needs_assignment': True,
+            'quote_request_id': quote.id,
         })
+        # Replace the default inspector when someone has capacity; otherwise
+        # the assignment cron retries later.
+        request.env['ecis.inspector'].sudo()._assign_inspections(inspection)
+        return inspection
 
     @http.route('/api/<path:subpath>', type='http', auth='none', methods=['OPTIONS'], csrf=False, cors='*')
+    @instrumented
     def api_options(self, subpath=None, **_params):
         response = request.make_response('', headers=[('Content-Type', 'text/plain')], status=204)
         return self._add_cors_headers(response)
 
     @http.route('/api/quote-request', type='http', auth='none', methods=['OPTIONS'], csrf=False, cors='*')
+    @instrumented
     def quote_request_options(self, **_params):
         response = request.make_response('', headers=[('Content-Type', 'text/plain')], status=204)
         return self._add_cors_headers(response)
 
     @http.route('/api/quote-request', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
+    @instrumented
     def create_quote_request(self, **_params):
+        # Public form; integrations posting on behalf of a site send an intake key.
+        if self._extract_api_key():
+            auth_error = self._require_api_key('intake')
+            if auth_error:
+                return auth_error
         try:
-            data = self._get_payload()
-            required_fields = ['name', 'email', 'phone', 'equipment_type']
-            missing = [f for f in required_fields if not data.get(f)]
-            if missing:
-                return self._error_response(
-                    f'Missing required fields: {", ".join(missing)}', status=400
-                )
+            data = self._validate(schemas.QUOTE_REQUEST)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
 
+        try:
             ip_address = request.httprequest.remote_addr
             user_agent = request.httprequest.headers.get('User-Agent', '')
 
-            quote = request.env['ecis.quote.request'].sudo().create({
-                'contact_name': data.get('name'),
-                'email': data.get('email'),
-                'phone': data.get('phone'),
-                'company_name': data.get('company_name'),
-                'equipment_type': data.get('equipment_type'),
-                'equipment_count': self._parse_int(data.get('equipment_count', 1), 1),
-                'message': data.get('message'),
-                'urgency': data.get('urgency', 'normal'),
-                'location': data.get('location'),
-                'source': 'website',
-                'ip_address': ip_address,
-                'user_agent': user_agent,
-            })
-
-            company = self._find_or_create_company(data)
-            contact = self._find_or_create_contact(data, company)
-            equipment = self._create_equipment(data, company, quote)
-            inspection = self._create_inspection(data, equipment, quote)
+            quote_env = self._company_env('ecis.quote.request')
+            with instrumentation.phase('duplicate_check'):
+                fingerprint = quote_env._submission_fingerprint(data)
+                verdict, original = quote_env._intake_check(fingerprint, ip_address)
+            if verdict == 'rate_limited':
+                return self._error_response('Too many requests, please try again later', status=429)
+            if verdict == 'reject':
+                return self._error_response(
+                    'This request has already been submitted', status=409,
+                    details={'reference': original.name},
+                )
+            if verdict == 'merge':
+                original._register_duplicate()
+                return self._json_response({
+                    'success': True,
+                    'duplicate': True,
+                    'message': 'Quote request already received. We will contact you within 24 hours.',
+                    'data': {
+                        'reference': original.name,
+                        'quote_request_id': original.id,
+                        'company_id': original.partner_id.id or None,
+                    },
+                }, status=200)
+
+            with instrumentation.phase('create_quote'):
+                quote = quote_env.create({
+                    'contact_name': data.get('name'),
+                    'email': data.get('email'),
+                    'phone': data.get('phone'),
+                    'company_name': data.get('company_name'),
+                    'equipment_type': data.get('equipment_type'),
+                    'equipment_count': data['equipment_count'],
+                    'message': data.get('message'),
+                    'urgency': data['urgency'],
+                    'location': data.get('location'),
+                    'source': 'website',
+                    'ip_address': ip_address,
+                    'user_agent': user_agent,
+                    'submission_fingerprint': fingerprint,
+                })
+
+            with instrumentation.phase('find_or_create_company'):
+                company = self._find_or_create_company(data)
+            with instrumentation.phase('find_or_create_contact'):
+                contact = self._find_or_create_contact(data, company)
+            with instrumentation.phase('create_equipment'):
+                equipment = self._create_equipment(data, company, quote)
+            with instrumentation.phase('create_inspection'):
+                inspection = self._create_inspection(data, equipment, quote)
 
             quote.sudo().write({
                 'partner_id': company.id,
             })
+            # The other pieces of equipment of the request, now or from the job.
+            with instrumentation.phase('expand_equipment'):
+                expansion = quote.sudo()._expand_or_defer()
 
             return self._json_response({
                 'success': True,
@@ -371,6 +612,7 @@ class EcisInspectionApiController(http.Controller):
                     'equipment_id': equipment.id,
                     'inspection_id': inspection.id,
                     'inspection_reference': inspection.name,
+                    'equipment_expansion': expansion,
                 },
             }, status=201)
 
@@ -379,9 +621,470 @@ class EcisInspectionApiController(http.Controller):
         except Exception as exc:
             return self._error_response('An error occurred while processing your request', status=500, details=str(exc))
 
+    @http.route('/api/metrics', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def api_metrics(self, **_params):
+        auth_error = self._require_api_key('reports')
+        if auth_error:
+            return auth_error
+
+        gauges = self._read(lambda env: env['ecis.metrics'].sudo()._gauges())
+        body = metrics.render(metrics.collect(), gauges)
+        return request.make_response(
+            body,
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')],
+        )
+
+    @http.route('/api/sync/pull', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def sync_pull(self, **_params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+        try:
+            params = self._validate(schemas.SYNC_PULL)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        def pull(env):
+            inspector = self._get_sync_inspector(params['inspector_id'], env=env)
+            with instrumentation.phase('sync_pull'):
+                result = env['ecis.sync'].sudo()._sync_pull(
+                    inspector, token=params.get('token'), limit=params['limit'],
+                    company_id=self._key_company_id(),
+                )
+            with instrumentation.phase('serialize_records'):
+                changes = {
+                    stream: [
+                        self._serialize_sync_record(stream, record, result['stamps'][stream].get(record.id))
+                        for record in records
+                    ]
+                    for stream, records in result['changes'].items()
+                }
+            return {
+                'changes': changes,
+                'deleted': result['deleted'],
+                'token': result['token'],
+                'has_more': result['has_more'],
+                'full_resync': result['full_resync'],
+            }
+
+        try:
+            # Always on the primary: the token's upper bound is taken from the
+            # app server clock, and a lagging replica would let the cursor move
+            # past rows it has not replayed yet, which would never be synced.
+            data = pull(request.env)
+        except ValidationError as exc:
+            return self._error_response(str(exc), status=400)
+        return self._json_response({'success': True, 'data': data})
+
+    @http.route('/api/sync/push', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
+    @instrumented
+    def sync_push(self, **_params):
+        auth_error = self._require_api_key('write')
+        if auth_error:
+            return auth_error
+
+        try:
+            data = self._validate(schemas.SYNC_PUSH)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        try:
+            inspector = self._get_sync_inspector(data['inspector_id'])
+        except ValidationError as exc:
+            return self._error_response(str(exc), status=400)
+
+        sync_env = request.env['ecis.sync'].sudo()
+        outcomes = sync_env._sync_push(inspector, data['changes'], company_id=self._key_company_id())
+        for outcome in outcomes:
+            record = outcome.pop('record', None)
+            if record:
+                stamp = sync_env._write_stamps(record).get(record.id)
+                outcome['server'] = self._serialize_sync_record(outcome['stream'], record, stamp)
+        return self._json_response({'success': True, 'data': outcomes})
+
+    @http.route('/api/inspections/search', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def search_inspection_findings(self, **_params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+        try:
+            params = self._validate(schemas.FINDINGS_SEARCH)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        def search(env):
+            inspection_env = env['ecis.inspection'].sudo()
+            ranked = inspection_env._search_findings_ranked(
+                params['q'], limit=params['limit'], offset=params['offset'],
+                company_id=self._key_company_id())
+            records = inspection_env.browse([row[0] for row in ranked])
+            data = []
+            for record, (_id, rank) in zip(records, ranked):
+                item = self._serialize_inspection(record)
+                item['rank'] = rank
+                data.append(item)
+            return data
+
+        data = self._read(search)
+        return self._json_response({'success': True, 'data': data, 'count': len(data)})
+
+    @http.route('/api/archive/inspections', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def list_archived_inspections(self, **_params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+        try:
+            params = self._validate(schemas.ARCHIVE_SEARCH)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        domain = []
+        if self._key_company_id():
+            domain.append(('company_id', '=', self._key_company_id()))
+        if params.get('q'):
+            domain.append(('findings_search', '=', params['q']))
+        for key in ('equipment_id', 'client_id', 'original_id'):
+            if params.get(key):
+                domain.append((key, '=', params[key]))
+        if params.get('date_from'):
+            domain.append(('inspection_date', '>=', params['date_from']))
+        if params.get('date_to'):
+            domain.append(('inspection_date', '<=', params['date_to']))
+
+        def search(env):
+            records = env['ecis.inspection.archive'].sudo().search(
+                domain, limit=params['limit'], offset=params['offset'])
+            return [self._serialize_archived_inspection(record) for record in records]
+
+        try:
+            data = self._read(search)
+        except (ValidationError, UserError, ValueError) as exc:
+            return self._error_response(str(exc), status=400)
+        return self._json_response({'success': True, 'data': data, 'count': len(data)})
+
+    @http.route('/api/archive/inspections/<int:archive_id>', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def get_archived_inspection(self, archive_id, **params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+
+        include_files = self._parse_bool(params.get('include_files'))
+
+        def read(env):
+            record = env['ecis.inspection.archive'].sudo().browse(archive_id).exists()
+            if not record or not self._owned(record):
+                return None
+            data = self._serialize_archived_inspection(record, include_payload=True)
+            files = []
+            for entry in record.attachment_manifest or []:
+                item = {key: entry.get(key) for key in ('id', 'name', 'mimetype', 'file_size', 'res_model', 'res_id', 'res_field')}
+                if include_files:
+                    try:
+                        item['data'] = base64.b64encode(record._read_cold(entry)).decode('ascii')
+                    except OSError:
+                        item['data'] = None
+                files.append(item)
+            data['attachments'] = files
+            return data
+
+        data = self._read(read)
+        if data is None:
+            return self._error_response('Archived inspection not found', status=404)
+        return self._json_response({'success': True, 'data': data})
+
+    @http.route('/api/archive/inspections/<int:archive_id>/restore', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
+    @instrumented
+    def restore_archived_inspection(self, archive_id, **_params):
+        auth_error = self._require_api_key('write')
+        if auth_error:
+            return auth_error
+
+        record = request.env['ecis.inspection.archive'].sudo().browse(archive_id).exists()
+        if not record or not self._owned(record):
+            return self._error_response('Archived inspection not found', status=404)
+        try:
+            inspection = record._restore()
+        except (ValidationError, UserError, OSError) as exc:
+            return self._error_response(str(exc), status=400)
+        return self._json_response({
+            'success': True,
+            'data': self._serialize_inspection(inspection, include_checklist=True),
+        })
+
+    @http.route('/api/equipment/import', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
+    @instrumented
+    def import_equipment(self, **_params):
+        auth_error = self._require_api_key('write')
+        if auth_error:
+            return auth_error
+
+        try:
+            data = self._validate(schemas.EQUIPMENT_IMPORT)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        upload = request.httprequest.files.get('file')
+        if upload:
+            filename, content = upload.filename, base64.b64encode(upload.read())
+        else:
+            filename, content = data.get('filename'), data.get('file')
+        if not filename or not content:
+            return self._error_response('file and filename are required', status=400)
+
+        try:
+            job = self._company_env('ecis.equipment.import').create({
+                'name': filename,
+                'file': content,
+                'client_id': data.get('client_id') or False,
+                'company_id': self._get_company_required().id,
+                'update_existing': data['update_existing'],
+            })
+            job.action_import()
+        except (ValidationError, UserError) as exc:
+            return self._error_response(str(exc), status=400)
+        status = 202 if job.state in ('queued', 'running') else 201
+        return self._json_response({'success': True, 'data': self._serialize_equipment_import(job)}, status=status)
+
+    @http.route('/api/equipment/import/<int:job_id>', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def get_equipment_import(self, job_id, **params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+
+        with_errors = self._parse_bool(params.get('errors'))
+
+        def read(env):
+            job = env['ecis.equipment.import'].sudo().browse(job_id).exists()
+            if not job or not self._owned(job):
+                return None
+            data = self._serialize_equipment_import(job)
+            if with_errors:
+                data['errors'] = [
+                    {'row': number, 'error': message, 'values': values}
+                    for number, message, values in job.errors or []
+                ]
+            return data
+
+        data = self._read(read)
+        if data is None:
+            return self._error_response('Import not found', status=404)
+        return self._json_response({'success': True, 'data': data})
+
+    @http.route('/api/equipment/import/<int:job_id>/errors', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def get_equipment_import_errors(self, job_id, **_params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+
+        job = request.env['ecis.equipment.import'].sudo().browse(job_id).exists()
+        if not job or not self._owned(job) or not job.error_report:
+            return self._error_response('No error report for this import', status=404)
+        response = request.make_response(
+            base64.b64decode(job.with_context(bin_size=False).error_report),
+            headers=[
+                ('Content-Type', 'text/csv; charset=utf-8'),
+                ('Content-Disposition', f'attachment; filename="{job.error_report_name}"'),
+            ],
+        )
+        return self._add_cors_headers(response)
+
+    @http.route('/api/inspections/transition', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
+    @instrumented
+    def transition_inspections(self, **_params):
+        auth_error = self._require_api_key('write')
+        if auth_error:
+            return auth_error
+
+        try:
+            data = self._validate(schemas.TRANSITION)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+        action = data['action']
+
+        try:
+            # ids keep the first occurrence of each id, in request order
+            results = self._company_env('ecis.inspection')._transition(
+                action, data['ids'], company_id=self._key_company_id())
+        except (ValidationError, UserError) as exc:
+            return self._error_response(str(exc), status=400)
+        applied = sum(1 for result in results if result['status'] == 'done')
+        return self._json_response({
+            'success': True,
+            'action': action,
+            'applied': applied,
+            'count': len(results),
+            'data': results,
+        })
+
+    @http.route('/api/webhooks', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def list_webhooks(self, **_params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+
+        subscriptions = self._company_env('ecis.webhook.subscription').search([
+            ('company_id', '=', self._get_company_required().id),
+        ])
+        data = [self._serialize_webhook(subscription) for subscription in subscriptions]
+        return self._json_response({'success': True, 'data': data, 'count': len(data)})
+
+    @http.route('/api/webhooks', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
+    @instrumented
+    def create_webhook(self, **_params):
+        auth_error = self._require_api_key('write')
+        if auth_error:
+            return auth_error
+
+        try:
+            data = self._validate(schemas.WEBHOOK_CREATE)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+        try:
+            subscription = self._company_env('ecis.webhook.subscription').create({
+                'name': data.get('name') or data['url'],
+                'url': data['url'],
+                'events': ','.join(data['events']),
+                'company_id': self._get_company_required().id,
+            })
+        except (ValidationError, UserError) as exc:
+            return self._error_response(str(exc), status=400)
+        # The signing secret is only ever returned here.
+        return self._json_response({
+            'success': True,
+            'data': self._serialize_webhook(subscription, include_secret=True),
+        }, status=201)
+
+    @http.route('/api/webhooks/<int:subscription_id>', type='http', auth='none', methods=['DELETE'], csrf=False, cors='*')
+    @instrumented
+    def delete_webhook(self, subscription_id, **_params):
+        auth_error = self._require_api_key('write')
+        if auth_error:
+            return auth_error
+
+        subscription = self._company_env('ecis.webhook.subscription').browse(subscription_id).exists()
+        if not subscription or not self._owned(subscription):
+            return self._error_response('Webhook not found', status=404)
+        subscription.unlink()
+        return self._json_response({'success': True})
+
+    @http.route('/api/webhooks/<int:subscription_id>/deliveries', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def list_webhook_deliveries(self, subscription_id, **_params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+        try:
+            params = self._validate(schemas.WEBHOOK_DELIVERIES)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        subscription = request.env['ecis.webhook.subscription'].sudo().browse(subscription_id).exists()
+        if not subscription or not self._owned(subscription):
+            return self._error_response('Webhook not found', status=404)
+        domain = [('subscription_id', '=', subscription.id)]
+        if params.get('state'):
+            domain.append(('state', '=', params['state']))
+        deliveries = request.env['ecis.webhook.delivery'].sudo().search(domain, limit=params['limit'])
+        data = [{
+            'id': delivery.uid,
+            'event': delivery.event,
+            'state': delivery.state,
+            'attempts': delivery.attempts,
+            'next_attempt': delivery.next_attempt or None,
+            'response_status': delivery.response_status or None,
+            'error': delivery.last_error or None,
+            'payload': delivery.payload,
+        } for delivery in deliveries]
+        return self._json_response({'success': True, 'data': data, 'count': len(data)})
+
+    @http.route('/api/webhooks/<int:subscription_id>/redeliver', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
+    @instrumented
+    def redeliver_webhooks(self, subscription_id, **_params):
+        auth_error = self._require_api_key('write')
+        if auth_error:
+            return auth_error
+
+        subscription = request.env['ecis.webhook.subscription'].sudo().browse(subscription_id).exists()
+        if not subscription or not self._owned(subscription):
+            return self._error_response('Webhook not found', status=404)
+        deliveries = request.env['ecis.webhook.delivery'].sudo().search([
+            ('subscription_id', '=', subscription.id), ('state', '=', 'dead'),
+        ])
+        deliveries.action_requeue()
+        return self._json_response({'success': True, 'count': len(deliveries)})
+
+    @http.route('/api/equipment/<int:equipment_id>/timeline', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def get_equipment_timeline(self, equipment_id, **_params):
+        auth_error = self._require_api_key('read')
+        if auth_error:
+            return auth_error
+        try:
+            params = self._validate(schemas.EQUIPMENT_TIMELINE)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        def read(env):
+            return env['ecis.equipment.timeline'].sudo()._timeline_page(
+                equipment_id, limit=params['limit'], offset=params['offset'],
+                company_id=self._key_company_id())
+
+        with instrumentation.phase('timeline'):
+            page = self._read(read)
+        if page is None:
+            return self._error_response('Equipment not found', status=404)
+        return self._json_response({
+            'success': True,
+            'data': list(page['rows']),
+            'count': len(page['rows']),
+            'total': page['total'],
+            'limit': params['limit'],
+            'offset': params['offset'],
+        })
+
+    @http.route('/api/analytics/checklist-failures', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
+    @instrumented
+    def checklist_failure_rates(self, **_params):
+        auth_error = self._require_api_key('reports')
+        if auth_error:
+            return auth_error
+        try:
+            params = self._validate(schemas.CHECKLIST_FAILURES)
+        except schema.SchemaError as exc:
+            return self._schema_error_response(exc)
+
+        domain = [('company_id', '=', self._get_company_required().id)]
+        if params.get('date_from'):
+            domain.append(('day', '>=', params['date_from']))
+        if params.get('date_to'):
+            domain.append(('day', '<=', params['date_to']))
+        for key in ('equipment_type', 'brand', 'client_id'):
+            if params.get(key):
+                domain.append((key, '=', params[key]))
+
+        def read(env):
+            return env['ecis.checklist.rollup'].sudo()._failure_rates(
+                params['group_by'], domain, min_checks=params['min_checks'], limit=params['limit'])
+
+        data = self._read(read)
+        return self._json_response({
+            'success': True,
+            'group_by': params['group_by'],
+            'data': data,
+            'count': len(data),
+        })
+
     # @http.route('/api/inspections', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def list_inspections(self, **params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -408,7 +1111,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def create_inspection(self, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -451,7 +1154,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def get_inspection(self, inspection_id, **params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -467,7 +1170,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>', type='http', auth='none', methods=['PUT', 'PATCH'], csrf=False, cors='*')
     # def update_inspection(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -498,7 +1201,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/start', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def start_inspection(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -511,7 +1214,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/complete', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def complete_inspection(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -528,7 +1231,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/send', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def send_inspection(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -545,7 +1248,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/cancel', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def cancel_inspection(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -558,7 +1261,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/reset', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def reset_inspection(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -571,7 +1274,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/report', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def inspection_report(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -591,7 +1294,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/checklist', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def list_checklist(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -604,7 +1307,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/inspections/<int:inspection_id>/checklist', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def create_checklist_item(self, inspection_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -629,7 +1332,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/checklist/<int:item_id>', type='http', auth='none', methods=['PUT', 'PATCH'], csrf=False, cors='*')
     # def update_checklist_item(self, item_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -647,7 +1350,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/checklist/<int:item_id>', type='http', auth='none', methods=['DELETE'], csrf=False, cors='*')
     # def delete_checklist_item(self, item_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -660,7 +1363,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/equipment', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def list_equipment(self, **params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -676,7 +1379,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/equipment', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def create_equipment(self, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -714,7 +1417,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/equipment/<int:equipment_id>', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def get_equipment(self, equipment_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -726,7 +1429,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/equipment/<int:equipment_id>/schedule-inspection', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def schedule_inspection(self, equipment_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -755,7 +1458,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/quote-requests', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def list_quote_requests(self, **params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -771,7 +1474,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/quote-requests/<int:request_id>', type='http', auth='none', methods=['GET'], csrf=False, cors='*')
     # def get_quote_request(self, request_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('read')
     #     if auth_error:
     #         return auth_error
 
@@ -783,7 +1486,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/quote-requests/<int:request_id>/contact', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def contact_quote_request(self, request_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -796,7 +1499,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/quote-requests/<int:request_id>/send-quote', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def send_quote_request(self, request_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -809,7 +1512,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/quote-requests/<int:request_id>/convert', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def convert_quote_request(self, request_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -822,7 +1525,7 @@ class EcisInspectionApiController(http.Controller):
 
     # @http.route('/api/quote-requests/<int:request_id>/lost', type='http', auth='none', methods=['POST'], csrf=False, cors='*')
     # def lost_quote_request(self, request_id, **_params):
-    #     auth_error = self._require_api_key()
+    #     auth_error = self._require_api_key('write')
     #     if auth_error:
     #         return auth_error
 
@@ -0,0 +1,100 @@
+"""
+Request schemas of the ECIS API routes, compiled once at import.
+"""
+from ..models.checklist_rollup import ROLLUP_DIMENSIONS
+from ..models.equipment import EQUIPMENT_TYPES
+from ..models.inspection import TRANSITIONS, TRANSITION_BATCH_SIZE
+from ..models.quote_request import EXPANSION_BATCH_SIZE, URGENCY_LEVELS
+from ..models.sync import SYNC_PUSH_BATCH_SIZE
+from ..models.webhook import WEBHOOK_EVENTS
+from ..tools.schema import (
+    compile_schema, Boolean, Choice, Date, Email, Integer, List, Object, Phone, String,
+)
+
+
+def _page(limit, maximum):
+    """limit / offset parameters; out-of-range values are clamped as before"""
+    return {
+        'limit': Integer(default=limit, minimum=1, maximum=maximum, clamp=True),
+        'offset': Integer(default=0, minimum=0, clamp=True),
+    }
+
+
+QUOTE_REQUEST = compile_schema({
+    'name': String(required=True, max_length=128),
+    'email': Email(required=True),
+    'phone': Phone(required=True),
+    'company_name': String(max_length=128),
+    'equipment_type': Choice(EQUIPMENT_TYPES, required=True),
+    # A public request fills at most one batch of the expansion job.
+    'equipment_count': Integer(default=1, minimum=1, maximum=EXPANSION_BATCH_SIZE),
+    'urgency': Choice(URGENCY_LEVELS, default='normal'),
+    'message': String(max_length=5000),
+    'location': String(max_length=1000),
+    'serial_number': String(max_length=64),
+})
+
+SYNC_PULL = compile_schema({
+    'inspector_id': Integer(required=True, minimum=1),
+    # One [txid, id] cursor per stream plus the tombstone cursor, base64 JSON.
+    'token': String(max_length=2048),
+    'limit': Integer(default=500, minimum=1, maximum=2000, clamp=True),
+})
+
+SYNC_PUSH = compile_schema({
+    'inspector_id': Integer(required=True, minimum=1),
+    'changes': List(Object(), required=True, max_items=SYNC_PUSH_BATCH_SIZE),
+})
+
+FINDINGS_SEARCH = compile_schema(dict(
+    _page(50, 200),
+    q=String(required=True, max_length=256),
+))
+
+ARCHIVE_SEARCH = compile_schema(dict(
+    _page(50, 200),
+    q=String(max_length=256),
+    equipment_id=Integer(minimum=1),
+    client_id=Integer(minimum=1),
+    original_id=Integer(minimum=1),
+    date_from=Date(),
+    date_to=Date(),
+))
+
+EQUIPMENT_TIMELINE = compile_schema(_page(50, 200))
+
+CHECKLIST_FAILURES = compile_schema({
+    'group_by': List(Choice(ROLLUP_DIMENSIONS), min_items=1, max_items=3, unique=True,
+                     default=lambda: ['template']),
+    'date_from': Date(),
+    'date_to': Date(),
+    'equipment_type': Choice(EQUIPMENT_TYPES),
+    'brand': String(max_length=128),
+    'client_id': Integer(minimum=1),
+    'min_checks': Integer(default=10, minimum=1),
+    'limit': Integer(default=50, minimum=1, maximum=500, clamp=True),
+})
+
+EQUIPMENT_IMPORT = compile_schema({
+    'filename': String(max_length=255),
+    'file': String(strip=False),
+    'client_id': Integer(minimum=1),
+    'update_existing': Boolean(default=True),
+})
+
+TRANSITION = compile_schema({
+    'action': Choice(TRANSITIONS, required=True),
+    'ids': List(Integer(minimum=1), required=True, min_items=1, max_items=TRANSITION_BATCH_SIZE, unique=True),
+})
+
+WEBHOOK_CREATE = compile_schema({
+    'url': String(required=True, max_length=2048, pattern=r'(?i)^https://\S+$',
+                  message='must be an https:// URL'),
+    'name': String(max_length=128),
+    'events': List(Choice(WEBHOOK_EVENTS), required=True, min_items=1, unique=True),
+})
+
+WEBHOOK_DELIVERIES = compile_schema({
+    'state': Choice(('pending', 'done', 'dead')),
+    'limit': Integer(default=50, minimum=1, maximum=200, clamp=True),
+})
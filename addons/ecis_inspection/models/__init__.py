@@ -1,4 +1,18 @@
+from . import bulk_tracking
 from . import equipment
 from . import inspection
 from . import checklist
-from . import quote_request
\ No newline at end of file
+from . import quote_request
+from . import sync
+from . import query_plan
+from . import base
+from . import metrics
+from . import profile
+from . import archive
+from . import retention
+from . import equipment_import
+from . import inspector
+from . import webhook
+from . import equipment_timeline
+from . import checklist_rollup
+from . import api_key
\ No newline at end of file
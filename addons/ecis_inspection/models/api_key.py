@@ -0,0 +1,172 @@
+import hashlib
+import hmac
+import secrets
+from collections import namedtuple
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+API_SCOPES = [
+    ('intake', 'Quote Intake'),
+    ('read', 'Read'),
+    ('write', 'Write'),
+    ('reports', 'Reports & Metrics'),
+]
+
+# Keys look like ecis_<prefix>_<secret>; the prefix is stored in clear to
+# find the key, only the SHA-256 digest of the whole key is kept.
+KEY_MARKER = 'ecis_'
+PREFIX_LENGTH = 8
+SECRET_BYTES = 32
+
+# What the API needs to know about a verified key, cached per worker.
+ApiKeyEntry = namedtuple('ApiKeyEntry', 'id digest company_id scopes expiration_date rate_limit')
+
+# The ecis_inspection.api_key parameter predates per-key scopes and keeps
+# full access, bound to no company and without a rate limit.
+LEGACY_ENTRY = ApiKeyEntry(None, None, None, frozenset(code for code, _label in API_SCOPES), None, 0)
+
+
+def key_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class EcisApiKey(models.Model):
+    """
+    API Key - Credentials of one integration, limited to a set of scopes and
+    a company, with an optional expiry and rate limit
+    """
+    _name = 'ecis.api.key'
+    _description = 'API Key'
+    _order = 'name, id'
+
+    name = fields.Char(
+        string='Integration',
+        required=True,
+    )
+
+    key_prefix = fields.Char(
+        string='Key Prefix',
+        readonly=True,
+        copy=False,
+        help="Public start of the key, identifying it in logs and support requests"
+    )
+
+    key_digest = fields.Char(
+        string='Key Digest',
+        readonly=True,
+        copy=False,
+        groups='base.group_system',
+        help="SHA-256 digest of the key; the key itself is only shown when generated"
+    )
+
+    scopes = fields.Char(
+        string='Scopes',
+        required=True,
+        default='read',
+        help="Comma-separated scopes: %s" % ', '.join(code for code, _label in API_SCOPES)
+    )
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        default=lambda self: self.env.company,
+        help="Records created through this key belong to this company"
+    )
+
+    expiration_date = fields.Datetime(
+        string='Expires On',
+        help="The key is refused from this date on; leave empty for no expiry"
+    )
+
+    rate_limit = fields.Integer(
+        string='Requests / Minute',
+        default=600,
+        help="Requests accepted per minute and server worker; 0 for no limit"
+    )
+
+    active = fields.Boolean(default=True)
+
+    _sql_constraints = [
+        ('key_prefix_unique', 'unique(key_prefix)', 'API key prefixes must be unique.'),
+        ('rate_limit_positive', 'CHECK(rate_limit >= 0)', 'The rate limit cannot be negative.'),
+    ]
+
+    # ========== CONSTRAINTS ==========
+
+    @api.constrains('scopes')
+    def _check_scopes(self):
+        known = {code for code, _label in API_SCOPES}
+        for key in self:
+            scopes = key._scope_set()
+            if not scopes:
+                raise ValidationError(_('Grant at least one scope.'))
+            if scopes - known:
+                raise ValidationError(_('Unknown API scopes: %s') % ', '.join(sorted(scopes - known)))
+
+    def _scope_set(self):
+        self.ensure_one()
+        return {s.strip() for s in (self.scopes or '').split(',') if s.strip()}
+
+    # ========== SECRETS ==========
+
+    def action_generate_key(self):
+        """Issue a new key, revoking the previous one, and show it once"""
+        self.ensure_one()
+        prefix = secrets.token_hex(PREFIX_LENGTH // 2)
+        token = f'{KEY_MARKER}{prefix}_{secrets.token_urlsafe(SECRET_BYTES)}'
+        self.write({'key_prefix': prefix, 'key_digest': key_digest(token)})
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('API key for %s', self.name),
+                'message': _('Copy it now, it will not be shown again: %s', token),
+                'type': 'warning',
+                'sticky': True,
+            },
+        }
+
+    # ========== CACHE ==========
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super(EcisApiKey, self).create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super(EcisApiKey, self).write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super(EcisApiKey, self).unlink()
+
+    @api.model
+    @tools.ormcache()
+    def _verification_table(self):
+        """{key prefix: ApiKeyEntry} for the active keys that have been generated"""
+        table = {}
+        for key in self.sudo().search([('key_prefix', '!=', False)]):
+            table[key.key_prefix] = ApiKeyEntry(
+                key.id, key.key_digest, key.company_id.id, frozenset(key._scope_set()),
+                key.expiration_date, key.rate_limit,
+            )
+        return table
+
+    @api.model
+    def _verify(self, token):
+        """
+        Return the ApiKeyEntry of ``token``, or None for an unknown, revoked
+        or expired key. Served from the worker cache: no query once warm.
+        """
+        if not token or not token.startswith(KEY_MARKER):
+            return None
+        prefix = token[len(KEY_MARKER):len(KEY_MARKER) + PREFIX_LENGTH]
+        entry = self._verification_table().get(prefix)
+        if entry is None or not hmac.compare_digest(entry.digest, key_digest(token)):
+            return None
+        if entry.expiration_date and entry.expiration_date <= fields.Datetime.now():
+            return None
+        return entry
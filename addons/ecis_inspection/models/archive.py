@@ -0,0 +1,478 @@
+import base64
+import json
+import logging
+import os
+import shutil
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.models import MAGIC_COLUMNS
+from odoo.tools import SQL, config
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Inspections older than this many months are moved to the archive.
+DEFAULT_HORIZON_MONTHS = 24
+
+# Inspections archived per transaction by the cron.
+ARCHIVE_BATCH_SIZE = 200
+
+# Only finished inspections are archived; drafts and running ones stay hot.
+ARCHIVABLE_STATES = ('completed', 'sent', 'cancelled')
+
+
+class EcisInspectionArchive(models.Model):
+    """
+    Archived Inspection - Cold copy of an old inspection report
+
+    Rows live in a table partitioned by year of inspection date; the
+    checklist, chatter and attachment list are kept as a JSON snapshot and
+    the attachment contents are moved to cold storage on disk.
+    """
+    _name = 'ecis.inspection.archive'
+    _description = 'Archived Inspection Report'
+    _auto = False
+    _order = 'inspection_date desc, id desc'
+
+    name = fields.Char(
+        string='Report Number',
+        readonly=True,
+        help="Report number of the archived inspection"
+    )
+
+    original_id = fields.Integer(
+        string='Original ID',
+        readonly=True,
+        help="ID the inspection had before it was archived"
+    )
+
+    inspection_date = fields.Date(
+        string='Inspection Date',
+        readonly=True,
+    )
+
+    equipment_id = fields.Many2one(
+        'ecis.equipment',
+        string='Equipment',
+        readonly=True,
+        ondelete='set null',
+    )
+
+    client_id = fields.Many2one(
+        'res.partner',
+        string='Client',
+        readonly=True,
+        ondelete='set null',
+    )
+
+    inspector_id = fields.Many2one(
+        'res.users',
+        string='Inspector',
+        readonly=True,
+        ondelete='set null',
+    )
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        readonly=True,
+        ondelete='set null',
+    )
+
+    equipment_type = fields.Char(string='Equipment Type', readonly=True)
+    inspection_type = fields.Char(string='Inspection Type', readonly=True)
+    state = fields.Char(string='Status', readonly=True)
+    overall_result = fields.Char(string='Overall Result', readonly=True)
+
+    findings_text = fields.Text(
+        string='Findings',
+        readonly=True,
+        help="Defects, actions, recommendations, notes and checklist notes"
+    )
+
+    findings_search = fields.Char(
+        string='Findings Search',
+        compute='_compute_findings_search',
+        search='_search_findings_search',
+    )
+
+    payload = fields.Json(
+        string='Snapshot',
+        readonly=True,
+        help="Inspection values, checklist lines and chatter at archiving time"
+    )
+
+    attachment_manifest = fields.Json(
+        string='Attachments',
+        readonly=True,
+        help="Metadata and cold-storage keys of the archived attachments"
+    )
+
+    checklist_count = fields.Integer(string='Checklist Items', readonly=True)
+    message_count = fields.Integer(string='Messages', readonly=True)
+    attachment_count = fields.Integer(string='Files', readonly=True)
+
+    archived_date = fields.Datetime(string='Archived On', readonly=True)
+
+    # ========== TABLE ==========
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute("""
+            CREATE SEQUENCE IF NOT EXISTS ecis_inspection_archive_id_seq;
+            CREATE TABLE IF NOT EXISTS ecis_inspection_archive (
+                id integer NOT NULL DEFAULT nextval('ecis_inspection_archive_id_seq'),
+                name varchar,
+                original_id integer,
+                inspection_date date NOT NULL,
+                equipment_id integer REFERENCES ecis_equipment(id) ON DELETE SET NULL,
+                client_id integer REFERENCES res_partner(id) ON DELETE SET NULL,
+                inspector_id integer REFERENCES res_users(id) ON DELETE SET NULL,
+                company_id integer REFERENCES res_company(id) ON DELETE SET NULL,
+                equipment_type varchar,
+                inspection_type varchar,
+                state varchar,
+                overall_result varchar,
+                findings_text text,
+                payload jsonb,
+                attachment_manifest jsonb,
+                checklist_count integer,
+                message_count integer,
+                attachment_count integer,
+                archived_date timestamp,
+                create_uid integer REFERENCES res_users(id) ON DELETE SET NULL,
+                create_date timestamp,
+                write_uid integer REFERENCES res_users(id) ON DELETE SET NULL,
+                write_date timestamp,
+                PRIMARY KEY (id, inspection_date)
+            ) PARTITION BY RANGE (inspection_date);
+            ALTER SEQUENCE ecis_inspection_archive_id_seq OWNED BY ecis_inspection_archive.id;
+        """)
+        # Indexes on the parent are created on every partition.
+        create_index(cr, 'ecis_inspection_archive_date_idx', self._table, ['inspection_date'])
+        create_index(cr, 'ecis_inspection_archive_original_idx', self._table, ['original_id'])
+        create_index(cr, 'ecis_inspection_archive_equipment_idx', self._table, ['equipment_id', 'inspection_date DESC'])
+        create_index(cr, 'ecis_inspection_archive_client_idx', self._table, ['client_id', 'inspection_date DESC'])
+        create_index(
+            cr, 'ecis_inspection_archive_findings_idx', self._table,
+            ["to_tsvector('simple', coalesce(findings_text, ''))"], method='gin',
+        )
+
+    @api.model
+    def _ensure_partitions(self, years):
+        """Create the yearly partitions that rows for ``years`` will land in"""
+        for year in sorted(set(years)):
+            self.env.cr.execute(SQL(
+                "CREATE TABLE IF NOT EXISTS %s PARTITION OF ecis_inspection_archive FOR VALUES FROM (%s) TO (%s)",
+                SQL.identifier(f'ecis_inspection_archive_y{year}'),
+                date(year, 1, 1), date(year + 1, 1, 1),
+            ))
+
+    # ========== SEARCH ==========
+
+    def _compute_findings_search(self):
+        for record in self:
+            record.findings_search = False
+
+    def _search_findings_search(self, operator, value):
+        if operator not in ('ilike', 'like', '=') or not value:
+            raise UserError(_('Unsupported search on archived findings.'))
+        return [('id', 'in', SQL("""
+            SELECT id FROM ecis_inspection_archive
+             WHERE to_tsvector('simple', coalesce(findings_text, '')) @@ websearch_to_tsquery('simple', %s)
+        """, value))]
+
+    # ========== COLD STORAGE ==========
+
+    @api.model
+    def _cold_root(self):
+        path = self.env['ir.config_parameter'].sudo().get_param('ecis_inspection.archive_cold_path')
+        return path or os.path.join(config['data_dir'], 'ecis_cold', self.env.cr.dbname)
+
+    @api.model
+    def _cold_directory(self, inspection_date, original_id):
+        return os.path.join(self._cold_root(), str(inspection_date.year), str(original_id))
+
+    def _read_cold(self, entry):
+        with open(os.path.join(self._cold_root(), entry['cold_key']), 'rb') as handle:
+            return handle.read()
+
+    def _remove_cold_files(self):
+        directories = [self._cold_directory(r.inspection_date, r.original_id) for r in self]
+
+        def remove():
+            for directory in directories:
+                shutil.rmtree(directory, ignore_errors=True)
+        # Only drop the files once the rows are gone for good.
+        self.env.cr.postcommit.add(remove)
+
+    # ========== ARCHIVING ==========
+
+    @api.model
+    def _horizon(self):
+        param = self.env['ir.config_parameter'].sudo().get_param('ecis_inspection.archive_horizon_months')
+        try:
+            months = int(param or DEFAULT_HORIZON_MONTHS)
+        except ValueError:
+            months = DEFAULT_HORIZON_MONTHS
+        return fields.Date.today() - relativedelta(months=months)
+
+    @api.model
+    def _json_safe(self, value):
+        return json.loads(json.dumps(value, default=str))
+
+    @api.model
+    def _snapshot_fields(self, model):
+        return [
+            name for name, field in model._fields.items()
+            if field.store and field.type not in ('binary', 'one2many', 'many2many')
+        ]
+
+    @api.model
+    def _snapshot_messages(self, inspections):
+        messages = self.env['mail.message'].sudo().search([
+            ('model', '=', inspections._name),
+            ('res_id', 'in', inspections.ids),
+        ], order='id')
+        by_record = {}
+        for message in messages:
+            by_record.setdefault(message.res_id, []).append({
+                'date': fields.Datetime.to_string(message.date),
+                'author_id': message.author_id.id,
+                'author': message.author_id.display_name or message.email_from,
+                'message_type': message.message_type,
+                'subtype': message.subtype_id.get_external_id().get(message.subtype_id.id) if message.subtype_id else False,
+                'subject': message.subject,
+                'body': str(message.body or ''),
+                'tracking': message.sudo().tracking_value_ids._tracking_value_format(),
+                'attachment_ids': message.attachment_ids.ids,
+            })
+        return by_record
+
+    @api.model
+    def _attachments_to_archive(self, inspections):
+        """Attachments owned by the inspections or their lines, plus linked photos"""
+        lines = inspections.checklist_ids
+        owned = self.env['ir.attachment'].sudo().search([
+            '|', ('res_field', '=', False), ('res_field', '!=', False),
+            '|', '&', ('res_model', '=', inspections._name), ('res_id', 'in', inspections.ids),
+            '&', ('res_model', '=', lines._name), ('res_id', 'in', lines.ids or [0]),
+        ])
+        return owned, inspections.sudo().photo_ids - owned
+
+    @api.model
+    def _write_cold(self, directory, attachment):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, str(attachment.id))
+        with open(path, 'wb') as handle:
+            handle.write(attachment.raw or b'')
+            handle.flush()
+            os.fsync(handle.fileno())
+        return os.path.relpath(path, self._cold_root())
+
+    @api.model
+    def _archive_inspections(self, inspections):
+        """Move ``inspections`` to the archive and return the archive rows"""
+        inspections = inspections.sudo().with_context(active_test=False)
+        if not inspections:
+            return self.browse()
+        lines = inspections.checklist_ids
+        owned, photos = self._attachments_to_archive(inspections)
+        messages = self._snapshot_messages(inspections)
+        inspection_fields = self._snapshot_fields(inspections)
+        line_fields = self._snapshot_fields(lines)
+        inspection_values = {vals['id']: vals for vals in inspections.read(inspection_fields)}
+        line_values = {}
+        for vals in lines.read(line_fields):
+            line_values.setdefault(vals['inspection_id'][0], []).append(vals)
+
+        line_owner = {line.id: line.inspection_id.id for line in lines}
+        by_inspection = {}
+        for attachment in owned:
+            owner = attachment.res_id if attachment.res_model == inspections._name else line_owner.get(attachment.res_id)
+            by_inspection.setdefault(owner, []).append(attachment)
+
+        self._ensure_partitions({inspection.inspection_date.year for inspection in inspections})
+        vals_list = []
+        for inspection in inspections:
+            directory = self._cold_directory(inspection.inspection_date, inspection.id)
+            manifest = []
+            for attachment in by_inspection.get(inspection.id, []) + list(inspection.photo_ids & photos):
+                manifest.append({
+                    'id': attachment.id,
+                    'name': attachment.name,
+                    'mimetype': attachment.mimetype,
+                    'file_size': attachment.file_size,
+                    'checksum': attachment.checksum,
+                    'res_model': attachment.res_model,
+                    'res_id': attachment.res_id,
+                    'res_field': attachment.res_field,
+                    'owned': attachment in owned,
+                    'photo': attachment in inspection.photo_ids,
+                    'cold_key': self._write_cold(directory, attachment),
+                })
+            checklist = line_values.get(inspection.id, [])
+            findings = [
+                inspection.defects_found, inspection.immediate_actions_required,
+                inspection.recommendations, inspection.inspector_notes,
+            ] + [line['notes'] for line in checklist]
+            vals_list.append({
+                'name': inspection.name,
+                'original_id': inspection.id,
+                'inspection_date': inspection.inspection_date,
+                'equipment_id': inspection.equipment_id.id,
+                'client_id': inspection.client_id.id,
+                'inspector_id': inspection.inspector_id.id,
+                'company_id': inspection.company_id.id,
+                'equipment_type': inspection.equipment_type,
+                'inspection_type': inspection.inspection_type,
+                'state': inspection.state,
+                'overall_result': inspection.overall_result,
+                'findings_text': '\n'.join(text for text in findings if text) or False,
+                'payload': self._json_safe({
+                    'inspection': inspection_values[inspection.id],
+                    'checklist': checklist,
+                    'messages': messages.get(inspection.id, []),
+                }),
+                'attachment_manifest': self._json_safe(manifest),
+                'checklist_count': len(checklist),
+                'message_count': len(messages.get(inspection.id, [])),
+                'attachment_count': len(manifest),
+                'archived_date': fields.Datetime.now(),
+            })
+        archives = self.sudo().create(vals_list)
+        self.env['ecis.checklist.rollup']._freeze_archived(inspections)
+        owned.unlink()
+        inspections.with_context(ecis_archiving=True).unlink()
+        return archives
+
+    @api.model
+    def _cron_archive(self, batch_size=ARCHIVE_BATCH_SIZE, auto_commit=False):
+        """Archive finished inspections older than the horizon, one batch per transaction"""
+        horizon = self._horizon()
+        total = 0
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM ecis_inspection
+                 WHERE inspection_date < %s AND state IN %s
+                 ORDER BY inspection_date, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [horizon, ARCHIVABLE_STATES, batch_size])
+            ids = [row[0] for row in self.env.cr.fetchall()]
+            if not ids:
+                break
+            self._archive_inspections(self.env['ecis.inspection'].browse(ids))
+            total += len(ids)
+            if not auto_commit:
+                break
+            self.env.cr.commit()
+            self.env.invalidate_all()
+        if total:
+            _logger.info("Archived %d inspections older than %s", total, horizon)
+        return total
+
+    # ========== RESTORE ==========
+
+    @api.model
+    def _restorable_values(self, model, values, skip=()):
+        vals = {}
+        for name, value in values.items():
+            field = model._fields.get(name)
+            if (not field or name in MAGIC_COLUMNS or name in skip
+                    or field.compute or field.related or not field.store):
+                continue
+            if field.type == 'many2one':
+                value = value and value[0]
+                if value and not self.env[field.comodel_name].browse(value).exists():
+                    value = False
+            vals[name] = value
+        return vals
+
+    def _restore(self):
+        """Recreate the inspections, their checklist, files and chatter"""
+        inspection_env = self.env['ecis.inspection'].sudo().with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_notrack=True)
+        line_env = self.env['ecis.inspection.checklist'].sudo()
+        attachment_env = self.env['ir.attachment'].sudo()
+        restored = inspection_env.browse()
+        for archive in self.sudo():
+            if not archive.equipment_id:
+                raise ValidationError(_('Equipment of %s no longer exists.') % archive.name)
+            payload = archive.payload or {}
+            vals = self._restorable_values(inspection_env, payload.get('inspection', {}))
+            inspection = inspection_env.create(vals)
+            line_map = {}
+            for line in payload.get('checklist', []):
+                line_vals = self._restorable_values(line_env, line, skip=('inspection_id',))
+                line_map[line['id']] = line_env.create(dict(line_vals, inspection_id=inspection.id))
+
+            attachment_map = {}
+            for entry in archive.attachment_manifest or []:
+                if not entry.get('owned'):
+                    # Photos shared with other records were left in place.
+                    attachment = attachment_env.browse(entry['id']).exists()
+                    if attachment:
+                        inspection.photo_ids = [(4, attachment.id)]
+                        continue
+                raw = archive._read_cold(entry)
+                owner = inspection if entry['res_model'] == inspection._name else line_map.get(entry['res_id'])
+                if entry.get('res_field'):
+                    if owner:
+                        owner.write({entry['res_field']: base64.b64encode(raw)})
+                    continue
+                attachment = attachment_env.create({
+                    'name': entry['name'],
+                    'raw': raw,
+                    'mimetype': entry.get('mimetype'),
+                    'res_model': owner._name if owner else entry.get('res_model'),
+                    'res_id': owner.id if owner else entry.get('res_id'),
+                })
+                attachment_map[entry['id']] = attachment.id
+                if entry.get('photo'):
+                    inspection.photo_ids = [(4, attachment.id)]
+
+            for message in payload.get('messages', []):
+                body = message.get('body') or ''
+                if message.get('tracking'):
+                    body += ''.join(
+                        f"<p>{t['changedField']}: {t['oldValue'].get('value') or ''} → {t['newValue'].get('value') or ''}</p>"
+                        for t in message['tracking']
+                    )
+                subtype = message.get('subtype') and self.env.ref(message['subtype'], raise_if_not_found=False)
+                self.env['mail.message'].sudo().create({
+                    'model': inspection._name,
+                    'res_id': inspection.id,
+                    'date': message.get('date'),
+                    'author_id': message.get('author_id') if self.env['res.partner'].browse(message.get('author_id') or 0).exists() else False,
+                    'email_from': message.get('author'),
+                    'message_type': message.get('message_type') or 'comment',
+                    'subtype_id': subtype.id if subtype else False,
+                    'subject': message.get('subject'),
+                    'body': body,
+                    'attachment_ids': [(6, 0, [attachment_map[i] for i in message.get('attachment_ids', []) if i in attachment_map])],
+                })
+            restored |= inspection
+        self.env['ecis.checklist.rollup']._release_archived(
+            self.sudo().mapped('original_id'), self.sudo().mapped('inspection_date'))
+        self.unlink()
+        return restored
+
+    def action_restore(self):
+        """Bring the archived inspections back into the live tables"""
+        restored = self._restore()
+        action = self.env['ir.actions.act_window']._for_xml_id('ecis_inspection.action_ecis_inspection')
+        if len(restored) == 1:
+            action.update({'view_mode': 'form', 'views': [(False, 'form')], 'res_id': restored.id})
+        else:
+            action['domain'] = [('id', 'in', restored.ids)]
+        return action
+
+    def unlink(self):
+        """Drop the cold files together with the archive rows"""
+        self._remove_cold_files()
+        return super(EcisInspectionArchive, self).unlink()
@@ -0,0 +1,12 @@
+from odoo import models
+
+from ..tools import instrumentation
+
+
+class Base(models.AbstractModel):
+    _inherit = 'base'
+
+    def _fetch_field(self, field):
+        """Count ORM cache misses for the API request timer"""
+        instrumentation.count_cache_miss()
+        return super()._fetch_field(field)
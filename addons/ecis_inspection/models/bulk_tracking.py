@@ -0,0 +1,66 @@
+from markupsafe import Markup
+
+from odoo import models, _
+
+
+class EcisMailThreadBulk(models.AbstractModel):
+    """
+    Mail thread with a bulk mode for mass operations
+
+    With ``ecis_bulk_tracking`` in the context, tracked changes do not
+    produce a message and one tracking value per field for every record;
+    the initial values are collected instead and, just before commit, each
+    changed record gets a single summary note, all inserted in one batch.
+    """
+    _name = 'ecis.mail.thread.bulk'
+    _inherit = 'mail.thread'
+    _description = 'Mail Thread with Bulk Tracking'
+
+    def _track_prepare(self, fields_iter):
+        if not self.env.context.get('ecis_bulk_tracking'):
+            return super(EcisMailThreadBulk, self)._track_prepare(fields_iter)
+        fnames = self._track_get_fields().intersection(fields_iter)
+        if not fnames:
+            return
+        self.env.cr.precommit.add(self._ecis_bulk_track_finalize)
+        initial_values = self.env.cr.precommit.data.setdefault(f'ecis.bulk.tracking.{self._name}', {})
+        for record in self:
+            if not record.id:
+                continue
+            values = initial_values.setdefault(record.id, {})
+            for fname in fnames:
+                values.setdefault(fname, record[fname])
+
+    def _ecis_bulk_track_display(self, fname, value):
+        field = self._fields[fname]
+        if field.type == 'many2one':
+            return value.display_name or ''
+        if field.type == 'selection':
+            return dict(field._description_selection(self.env)).get(value, value or '')
+        if field.type == 'boolean':
+            return _('Yes') if value else _('No')
+        return '' if value is False or value is None else str(value)
+
+    def _ecis_bulk_track_finalize(self):
+        """Post one summary note per changed record, in a single insert"""
+        initial_values = self.env.cr.precommit.data.pop(f'ecis.bulk.tracking.{self._name}', {})
+        if not initial_values:
+            return
+        records = self.browse(list(initial_values)).sudo().exists()
+        bodies = {}
+        for record in records:
+            lines = []
+            for fname, old in initial_values[record.id].items():
+                new = record[fname]
+                if old == new:
+                    continue
+                lines.append(Markup('<li>%s: %s → %s</li>') % (
+                    self._fields[fname]._description_string(self.env),
+                    self._ecis_bulk_track_display(fname, old),
+                    self._ecis_bulk_track_display(fname, new),
+                ))
+            if lines:
+                bodies[record.id] = Markup('<ul>%s</ul>') % Markup('').join(lines)
+        if bodies:
+            records.filtered(lambda r: r.id in bodies)._message_log_batch(bodies=bodies)
+        self.env.flush_all()
@@ -1,4 +1,13 @@
 from odoo import models, fields, api
+from odoo.tools.sql import column_exists, table_exists
+
+from .equipment import EQUIPMENT_TYPES
+
+# Line fields feeding the equipment timeline and the checklist rollup.
+HISTORY_FIELDS = frozenset({'inspection_id', 'template_id', 'name', 'status'})
+
+# Only lines of finished inspections count on the timeline and the rollup.
+FINISHED_STATES = ('completed', 'sent')
 
 class EcisInspectionChecklist(models.Model):
     """
@@ -13,9 +22,18 @@ class EcisInspectionChecklist(models.Model):
         string='Inspection',
         required=True,
         ondelete='cascade',
+        index=True,
         help="Parent inspection report"
     )
     
+    template_id = fields.Many2one(
+        'ecis.checklist.template',
+        string='Template Item',
+        ondelete='set null',
+        index='btree_not_null',
+        help="Template this line was instantiated from"
+    )
+    
     sequence = fields.Integer(
         string='Sequence',
         default=10,
@@ -54,6 +72,54 @@ class EcisInspectionChecklist(models.Model):
     
     photo_filename = fields.Char(string='Photo Filename')
 
+    def _auto_init(self):
+        backfill = table_exists(self.env.cr, self._table) and not column_exists(
+            self.env.cr, self._table, 'template_id')
+        result = super(EcisInspectionChecklist, self)._auto_init()
+        if backfill:
+            # Existing lines are linked back by equipment type and item name.
+            self.env.cr.execute("""
+                UPDATE ecis_inspection_checklist c
+                   SET template_id = t.id
+                  FROM ecis_inspection i,
+                       (SELECT DISTINCT ON (equipment_type, name) id, equipment_type, name
+                          FROM ecis_checklist_template
+                         ORDER BY equipment_type, name, id) t
+                 WHERE i.id = c.inspection_id
+                   AND t.equipment_type = i.equipment_type
+                   AND t.name = c.name
+            """)
+        return result
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Renew the timelines and rollup days the new lines appear on"""
+        records = super(EcisInspectionChecklist, self).create(vals_list)
+        records._touch_history()
+        return records
+
+    def write(self, vals):
+        """Renew the timelines and rollup days showing the changed lines"""
+        if not HISTORY_FIELDS.intersection(vals):
+            return super(EcisInspectionChecklist, self).write(vals)
+        self._touch_history()
+        result = super(EcisInspectionChecklist, self).write(vals)
+        if 'inspection_id' in vals:
+            self._touch_history()
+        return result
+
+    def unlink(self):
+        """Record sync tombstones so offline tablets drop the lines"""
+        self.env['ecis.sync.tombstone']._record_deletions(
+            self._name, [(r.id, r.inspection_id.inspector_id.id) for r in self])
+        self._touch_history()
+        return super(EcisInspectionChecklist, self).unlink()
+
+    def _touch_history(self):
+        inspections = self.inspection_id.filtered(lambda i: i.state in FINISHED_STATES)
+        self.env['ecis.equipment']._touch_timeline(inspections.equipment_id.ids)
+        self.env['ecis.checklist.rollup']._mark_days(inspections.mapped('inspection_date'))
+
 
 class EcisChecklistTemplate(models.Model):
     """
@@ -69,16 +135,12 @@ class EcisChecklistTemplate(models.Model):
         help="Standard check item description"
     )
     
-    equipment_type = fields.Selection([
-        ('crane', 'Crane'),
-        ('elevator', 'Elevator'),
-        ('pressure_vessel', 'Pressure Vessel'),
-        ('forklift', 'Forklift'),
-        ('overhead_crane', 'Overhead Crane'),
-        ('lifting_platform', 'Lifting Platform'),
-        ('other', 'Other')
-    ], string='Equipment Type', required=True,
-       help="Type of equipment this check applies to")
+    equipment_type = fields.Selection(
+        EQUIPMENT_TYPES,
+        string='Equipment Type',
+        required=True,
+        help="Type of equipment this check applies to"
+    )
     
     requirement = fields.Char(
         string='Requirement/Standard',
@@ -99,4 +161,10 @@ class EcisChecklistTemplate(models.Model):
     description = fields.Text(
         string='Description',
         help="Detailed description of what to check"
-    )
\ No newline at end of file
+    )
+
+    def unlink(self):
+        """Record sync tombstones so offline tablets drop the templates"""
+        self.env['ecis.sync.tombstone']._record_deletions(
+            self._name, [(r.id, False) for r in self])
+        return super(EcisChecklistTemplate, self).unlink()
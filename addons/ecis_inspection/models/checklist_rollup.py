@@ -0,0 +1,311 @@
+import logging
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from .checklist import FINISHED_STATES
+from .equipment import EQUIPMENT_TYPES
+
+_logger = logging.getLogger(__name__)
+
+# Inspection days recomputed per transaction by the refresh job.
+REFRESH_BATCH_DAYS = 30
+
+# Manufacture years are grouped in bands of this many years.
+YEAR_BAND_SIZE = 5
+
+# API / analysis dimension -> rollup groupby spec.
+ROLLUP_DIMENSIONS = {
+    'template': 'template_id',
+    'item': 'name',
+    'equipment_type': 'equipment_type',
+    'brand': 'brand',
+    'client': 'client_id',
+    'year_band': 'year_band',
+    'company': 'company_id',
+    'month': 'day:month',
+}
+
+# Counters summed by the analysis.
+ROLLUP_MEASURES = ('pass_count', 'fail_count', 'warning_count', 'na_count', 'line_count')
+
+ROLLUP_COLUMNS = (
+    'day, template_id, name, equipment_type, brand, client_id, year_band, company_id, '
+    'pass_count, fail_count, warning_count, na_count, line_count'
+)
+
+# Rollup columns counted from the live checklist lines of ``i``.
+LINE_COUNTS_SELECT = f"""
+    SELECT i.inspection_date,
+           c.template_id,
+           COALESCE(t.name, c.name),
+           e.equipment_type,
+           NULLIF(TRIM(e.brand), ''),
+           e.client_id,
+           CASE WHEN e.manufacture_year > 0 THEN
+               (e.manufacture_year / {YEAR_BAND_SIZE} * {YEAR_BAND_SIZE})::text || '-'
+               || (e.manufacture_year / {YEAR_BAND_SIZE} * {YEAR_BAND_SIZE} + {YEAR_BAND_SIZE - 1})::text
+           END,
+           i.company_id,
+           COUNT(*) FILTER (WHERE c.status = 'pass'),
+           COUNT(*) FILTER (WHERE c.status = 'fail'),
+           COUNT(*) FILTER (WHERE c.status = 'warning'),
+           COUNT(*) FILTER (WHERE c.status = 'na'),
+           COUNT(*)"""
+LINE_COUNTS_FROM = """
+      FROM ecis_inspection i
+      JOIN ecis_equipment e ON e.id = i.equipment_id
+      JOIN ecis_inspection_checklist c ON c.inspection_id = i.id
+ LEFT JOIN ecis_checklist_template t ON t.id = c.template_id
+"""
+
+# Rebuilds the rollup rows of the given inspection days from the live
+# checklist lines plus the counts frozen when inspections were archived.
+REFRESH_QUERY = f"""
+    INSERT INTO ecis_checklist_rollup ({ROLLUP_COLUMNS})
+    SELECT day, template_id, name, equipment_type, brand, client_id, year_band, company_id,
+           SUM(pass_count), SUM(fail_count), SUM(warning_count), SUM(na_count), SUM(line_count)
+      FROM (
+        {LINE_COUNTS_SELECT}
+        {LINE_COUNTS_FROM}
+         WHERE i.inspection_date = ANY(%(days)s::date[])
+           -- The redundant state test matches the live inspection date index.
+           AND i.active AND i.state != 'cancelled' AND i.state IN %(states)s
+      GROUP BY 1, 2, 3, 4, 5, 6, 7, 8
+     UNION ALL
+        SELECT {ROLLUP_COLUMNS} FROM ecis_checklist_rollup_archived
+         WHERE day = ANY(%(days)s::date[])
+      ) counts
+  GROUP BY 1, 2, 3, 4, 5, 6, 7, 8
+"""
+
+# Freezes the contribution of inspections about to be archived.
+ARCHIVE_QUERY = f"""
+    INSERT INTO ecis_checklist_rollup_archived ({ROLLUP_COLUMNS}, inspection_id)
+    {LINE_COUNTS_SELECT}, i.id
+    {LINE_COUNTS_FROM}
+     WHERE i.id IN %(ids)s AND i.active AND i.state IN %(states)s
+  GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 14
+"""
+
+# Rebuilds the frozen counts from the checklist snapshots of the archive,
+# for databases that archived inspections before the counts were kept.
+ARCHIVE_BACKFILL_QUERY = f"""
+    INSERT INTO ecis_checklist_rollup_archived ({ROLLUP_COLUMNS}, inspection_id)
+    SELECT a.inspection_date,
+           t.id,
+           COALESCE(t.name, c->>'name'),
+           e.equipment_type,
+           NULLIF(TRIM(e.brand), ''),
+           e.client_id,
+           CASE WHEN e.manufacture_year > 0 THEN
+               (e.manufacture_year / {YEAR_BAND_SIZE} * {YEAR_BAND_SIZE})::text || '-'
+               || (e.manufacture_year / {YEAR_BAND_SIZE} * {YEAR_BAND_SIZE} + {YEAR_BAND_SIZE - 1})::text
+           END,
+           a.company_id,
+           COUNT(*) FILTER (WHERE c->>'status' = 'pass'),
+           COUNT(*) FILTER (WHERE c->>'status' = 'fail'),
+           COUNT(*) FILTER (WHERE c->>'status' = 'warning'),
+           COUNT(*) FILTER (WHERE c->>'status' = 'na'),
+           COUNT(*),
+           a.original_id
+      FROM ecis_inspection_archive a
+      JOIN ecis_equipment e ON e.id = a.equipment_id
+     CROSS JOIN LATERAL jsonb_array_elements(a.payload->'checklist') c
+ LEFT JOIN ecis_checklist_template t ON t.id = (c->'template_id'->>0)::integer
+     WHERE a.state IN %(states)s
+       AND (a.payload->'inspection'->>'active')::boolean IS NOT FALSE
+  GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 14
+"""
+
+
+class EcisChecklistRollup(models.Model):
+    """
+    Checklist Rollup - Daily pass/fail/warning/n.a. counts of checklist
+    items per template, equipment type, brand, client and manufacture-year
+    band
+
+    Rows are rebuilt per inspection day: changes to finished inspections,
+    their lines or their equipment queue the affected days in
+    ``ecis_checklist_rollup_dirty`` and the nightly job recomputes only
+    those. Archived inspections keep the counts they had when they left
+    the live tables, frozen in ``ecis_checklist_rollup_archived``.
+    """
+    _name = 'ecis.checklist.rollup'
+    _description = 'Checklist Result Rollup'
+    _order = 'day desc, id'
+    _log_access = False
+
+    day = fields.Date(string='Inspection Date', readonly=True, index=True)
+
+    template_id = fields.Many2one(
+        'ecis.checklist.template',
+        string='Template Item',
+        readonly=True,
+        ondelete='set null',
+        help="Checklist template the lines were instantiated from, empty for free-text lines"
+    )
+
+    name = fields.Char(string='Check Item', readonly=True)
+    equipment_type = fields.Selection(EQUIPMENT_TYPES, string='Equipment Type', readonly=True)
+    brand = fields.Char(string='Brand', readonly=True)
+    client_id = fields.Many2one('res.partner', string='Client', readonly=True, ondelete='set null')
+
+    year_band = fields.Char(
+        string='Manufacture Years',
+        readonly=True,
+        help="Band of %d manufacture years the equipment falls into" % YEAR_BAND_SIZE
+    )
+
+    company_id = fields.Many2one('res.company', string='Company', readonly=True, ondelete='cascade')
+
+    pass_count = fields.Integer(string='Passed', readonly=True)
+    fail_count = fields.Integer(string='Failed', readonly=True)
+    warning_count = fields.Integer(string='Warnings', readonly=True)
+    na_count = fields.Integer(string='Not Applicable', readonly=True)
+    line_count = fields.Integer(string='Checks', readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute("CREATE TABLE IF NOT EXISTS ecis_checklist_rollup_dirty (day date PRIMARY KEY)")
+        cr.execute("SELECT to_regclass('ecis_checklist_rollup_archived'), to_regclass('ecis_inspection_archive')")
+        frozen_table, archive_table = cr.fetchone()
+        backfill = frozen_table is None and archive_table is not None
+        cr.execute("""
+            CREATE TABLE IF NOT EXISTS ecis_checklist_rollup_archived (
+                day date NOT NULL,
+                inspection_id integer NOT NULL,
+                template_id integer REFERENCES ecis_checklist_template(id) ON DELETE SET NULL,
+                name varchar,
+                equipment_type varchar,
+                brand varchar,
+                client_id integer REFERENCES res_partner(id) ON DELETE SET NULL,
+                year_band varchar,
+                company_id integer REFERENCES res_company(id) ON DELETE CASCADE,
+                pass_count integer NOT NULL,
+                fail_count integer NOT NULL,
+                warning_count integer NOT NULL,
+                na_count integer NOT NULL,
+                line_count integer NOT NULL
+            )
+        """)
+        create_index(cr, 'ecis_checklist_rollup_archived_day_idx', 'ecis_checklist_rollup_archived', ['day'])
+        create_index(
+            cr, 'ecis_checklist_rollup_archived_inspection_idx', 'ecis_checklist_rollup_archived', ['inspection_id'])
+        if backfill:
+            cr.execute(ARCHIVE_BACKFILL_QUERY, {'states': FINISHED_STATES})
+            cr.execute("""
+                INSERT INTO ecis_checklist_rollup_dirty (day)
+                SELECT DISTINCT day FROM ecis_checklist_rollup_archived
+                ON CONFLICT DO NOTHING
+            """)
+        # First install: queue every day with finished inspections.
+        cr.execute("""
+            INSERT INTO ecis_checklist_rollup_dirty (day)
+            SELECT DISTINCT inspection_date FROM ecis_inspection
+             WHERE inspection_date IS NOT NULL AND state IN %s
+               AND NOT EXISTS (SELECT 1 FROM ecis_checklist_rollup)
+            ON CONFLICT DO NOTHING
+        """, [FINISHED_STATES])
+
+    # ========== INCREMENTAL REFRESH ==========
+
+    @api.model
+    def _mark_days(self, days):
+        """Queue inspection ``days`` for the next refresh"""
+        days = sorted({day for day in days if day})
+        if days:
+            self.env.cr.execute("""
+                INSERT INTO ecis_checklist_rollup_dirty (day)
+                SELECT unnest(%s::date[])
+                ON CONFLICT DO NOTHING
+            """, [days])
+
+    @api.model
+    def _freeze_archived(self, inspections):
+        """Keep the counts of ``inspections``, about to be archived, out of reach of the refresh"""
+        if inspections:
+            self.env.flush_all()
+            self.env.cr.execute(ARCHIVE_QUERY, {'ids': tuple(inspections.ids), 'states': FINISHED_STATES})
+
+    @api.model
+    def _release_archived(self, inspection_ids, days):
+        """Drop the frozen counts of restored inspections and queue their ``days``"""
+        if inspection_ids:
+            self.env.cr.execute(
+                "DELETE FROM ecis_checklist_rollup_archived WHERE inspection_id IN %s", [tuple(inspection_ids)])
+            self._mark_days(days)
+
+    @api.model
+    def _refresh_days(self, days):
+        """Rebuild the rollup rows of ``days`` from the live and archived checklist counts"""
+        self.env.flush_all()
+        self.env.cr.execute("DELETE FROM ecis_checklist_rollup WHERE day = ANY(%s::date[])", [days])
+        self.env.cr.execute(REFRESH_QUERY, {'days': days, 'states': FINISHED_STATES})
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh(self, batch_size=REFRESH_BATCH_DAYS, auto_commit=False):
+        """Recompute the queued days, one batch of days per transaction"""
+        total = 0
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM ecis_checklist_rollup_dirty
+                 WHERE day IN (
+                    SELECT day FROM ecis_checklist_rollup_dirty
+                     ORDER BY day
+                     LIMIT %s
+                       FOR UPDATE SKIP LOCKED
+                 )
+             RETURNING day
+            """, [batch_size])
+            days = [row[0] for row in self.env.cr.fetchall()]
+            if not days:
+                break
+            self._refresh_days(days)
+            total += len(days)
+            if not auto_commit:
+                break
+            self.env.cr.commit()
+        if total:
+            _logger.info("Refreshed the checklist rollup for %d inspection days", total)
+        return total
+
+    @api.model
+    def _rebuild(self):
+        """Queue every day with finished inspections, e.g. after changing the year bands"""
+        self.env.cr.execute("""
+            INSERT INTO ecis_checklist_rollup_dirty (day)
+            SELECT DISTINCT inspection_date FROM ecis_inspection
+             WHERE inspection_date IS NOT NULL AND state IN %s
+            ON CONFLICT DO NOTHING
+        """, [FINISHED_STATES])
+
+    # ========== ANALYSIS ==========
+
+    @api.model
+    def _failure_rates(self, group_by, domain=None, min_checks=1, limit=50):
+        """
+        Return the rollup summed over the ``group_by`` dimensions (keys of
+        ROLLUP_DIMENSIONS) as plain dicts, highest failure rate first. The
+        rate counts failures out of the applicable (not n.a.) checks.
+        """
+        groupby = [ROLLUP_DIMENSIONS[dimension] for dimension in group_by]
+        groups = self._read_group(
+            domain or [], groupby, [f'{measure}:sum' for measure in ROLLUP_MEASURES])
+        result = []
+        for group in groups:
+            keys, sums = group[:len(groupby)], dict(zip(ROLLUP_MEASURES, group[len(groupby):]))
+            applicable = sums['line_count'] - sums['na_count']
+            if applicable < max(min_checks, 1):
+                continue
+            row = {}
+            for dimension, value in zip(group_by, keys):
+                if isinstance(value, models.BaseModel):
+                    value = {'id': value.id, 'name': value.display_name} if value else None
+                row[dimension] = value if value is not False else None
+            row.update(sums)
+            row['fail_rate'] = round(100.0 * sums['fail_count'] / applicable, 1)
+            result.append(row)
+        result.sort(key=lambda row: (-row['fail_rate'], -row['fail_count']))
+        return result[:limit]
@@ -1,6 +1,36 @@
-from odoo import models, fields, api, _
+import logging
+import re
+
+from odoo import models, fields, api, tools, _
 from datetime import timedelta, date
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Columns covered by pg_trgm GIN indexes for fuzzy lookup.
+TRIGRAM_COLUMNS = ('name', 'serial_number', 'brand', 'model')
+
+# Minimum similarity for two serial numbers to be reported as duplicates.
+SERIAL_DUPLICATE_THRESHOLD = 0.6
+
+# Matches the name_get format "[Type] Name - S/N: SERIAL".
+DISPLAY_NAME_RE = re.compile(r'^\s*(?:\[[^\]]*\]\s*)?(?P<name>.*?)(?:\s+-\s+S/N:\s*(?P<serial>.*?))?\s*$')
+
+# Equipment fields the checklist rollup is grouped by.
+ROLLUP_FIELDS = frozenset({'equipment_type', 'brand', 'client_id', 'manufacture_year'})
+
+# Equipment categories, shared with quote requests and the API schemas.
+EQUIPMENT_TYPES = [
+    ('crane', 'Crane'),
+    ('elevator', 'Elevator'),
+    ('pressure_vessel', 'Pressure Vessel'),
+    ('forklift', 'Forklift'),
+    ('overhead_crane', 'Overhead Crane'),
+    ('lifting_platform', 'Lifting Platform'),
+    ('other', 'Other')
+]
 
 class EcisEquipment(models.Model):
     """
@@ -8,7 +38,7 @@ class EcisEquipment(models.Model):
     """
     _name = 'ecis.equipment'
     _description = 'Equipment to Inspect'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['ecis.mail.thread.bulk', 'mail.activity.mixin']
     _order = 'name'
 
     # ========== BASIC INFORMATION ==========
@@ -19,16 +49,13 @@ class EcisEquipment(models.Model):
         help="Name or reference of the equipment"
     )
     
-    equipment_type = fields.Selection([
-        ('crane', 'Crane'),
-        ('elevator', 'Elevator'),
-        ('pressure_vessel', 'Pressure Vessel'),
-        ('forklift', 'Forklift'),
-        ('overhead_crane', 'Overhead Crane'),
-        ('lifting_platform', 'Lifting Platform'),
-        ('other', 'Other')
-    ], string='Equipment Type', required=True, tracking=True,
-       help="Type of equipment to inspect")
+    equipment_type = fields.Selection(
+        EQUIPMENT_TYPES,
+        string='Equipment Type',
+        required=True,
+        tracking=True,
+        help="Type of equipment to inspect"
+    )
     
     # ========== TECHNICAL DETAILS ==========
     brand = fields.Char(
@@ -74,6 +101,15 @@ class EcisEquipment(models.Model):
         help="Precise address where the equipment is located"
     )
     
+    quote_request_id = fields.Many2one(
+        'ecis.quote.request',
+        string='Quote Request',
+        index='btree_not_null',
+        ondelete='set null',
+        copy=False,
+        help="Website request this equipment was registered from"
+    )
+    
     # ========== INSPECTION TRACKING ==========
     last_inspection_date = fields.Date(
         string='Last Inspection Date',
@@ -94,6 +130,21 @@ class EcisEquipment(models.Model):
         help="Total number of inspections performed"
     )
     
+    timeline_ids = fields.One2many(
+        'ecis.equipment.timeline',
+        'equipment_id',
+        string='Timeline',
+        readonly=True,
+        help="Inspection history with intervals, pass-rate trend and recurring failures"
+    )
+    
+    timeline_stamp = fields.Integer(
+        string='Timeline Stamp',
+        readonly=True,
+        copy=False,
+        help="Renewed whenever an inspection of this equipment changes; keys the cached timeline"
+    )
+    
     # ========== OTHER FIELDS ==========
     active = fields.Boolean(
         default=True,
@@ -133,6 +184,78 @@ class EcisEquipment(models.Model):
                 if record.manufacture_year < 1900:
                     raise ValidationError(_('Manufacture year seems incorrect (before 1900).'))
     
+    # ========== INDEXES ==========
+    
+    def init(self):
+        """Create the client lookup indexes and pg_trgm GIN indexes for fuzzy search"""
+        # Client equipment lists, in _order.
+        create_index(self.env.cr, 'ecis_equipment_client_name_idx', self._table, ['client_id', 'name'])
+        # Fleet imports match existing equipment on client and serial number.
+        create_index(self.env.cr, 'ecis_equipment_client_serial_idx', self._table,
+                     ['client_id', 'serial_number'], where='serial_number IS NOT NULL')
+        # Sequence values are never reused, even by rolled back transactions,
+        # so a timeline cached under a stamp can never be served for another state.
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS ecis_equipment_timeline_stamp_seq")
+        if not self._trgm_available():
+            try:
+                with self.env.cr.savepoint():
+                    self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            except Exception:
+                _logger.warning("pg_trgm is not available; equipment lookup falls back to ilike.")
+                return
+            self.env.registry.clear_cache()
+        for column in TRIGRAM_COLUMNS:
+            create_index(self.env.cr, f'ecis_equipment_{column}_trgm_idx', self._table,
+                         [f'{column} gin_trgm_ops'], method='gin')
+    
+    @api.model
+    @tools.ormcache()
+    def _trgm_available(self):
+        self.env.cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return bool(self.env.cr.fetchone())
+    
+    @api.model
+    def _touch_timeline(self, equipment_ids):
+        """Renew the timeline stamp of ``equipment_ids``, invalidating their cached timelines"""
+        equipment_ids = tuple({equipment_id for equipment_id in equipment_ids if equipment_id})
+        if not equipment_ids:
+            return
+        # Plain SQL: the stamp is bookkeeping and must not bump write_date
+        # (the offline sync feed) or the chatter.
+        self.env.cr.execute("""
+            UPDATE ecis_equipment SET timeline_stamp = nextval('ecis_equipment_timeline_stamp_seq')
+             WHERE id IN %s
+        """, [equipment_ids])
+        self.browse(equipment_ids).invalidate_recordset(['timeline_stamp'])
+    
+    # ========== LIFECYCLE METHODS ==========
+    
+    def write(self, vals):
+        """Queue the inspection days of the equipment when a rollup dimension changes"""
+        result = super(EcisEquipment, self).write(vals)
+        if ROLLUP_FIELDS.intersection(vals):
+            self.env['ecis.checklist.rollup']._mark_days(self.inspection_ids._rollup_days())
+        return result
+    
+    def unlink(self):
+        """Record sync tombstones so offline tablets drop the equipment"""
+        self.env['ecis.sync.tombstone']._record_deletions(
+            self._name, [(r.id, False) for r in self])
+        return super(EcisEquipment, self).unlink()
+    
+    @api.onchange('serial_number')
+    def _onchange_serial_number(self):
+        """Warn when the serial number is close to an existing one"""
+        if not self.serial_number:
+            return
+        duplicates = self._get_serial_duplicates(self.serial_number, exclude_ids=self._origin.ids)
+        if duplicates:
+            return {'warning': {
+                'title': _('Possible Duplicate Equipment'),
+                'message': _('Similar serial numbers already exist:\n%s') % '\n'.join(
+                    name for _id, name in duplicates.name_get()),
+            }}
+    
     # ========== ACTIONS ==========
     
     def action_view_inspections(self):
@@ -150,6 +273,18 @@ class EcisEquipment(models.Model):
             }
         }
     
+    def action_view_serial_duplicates(self):
+        """Open equipment whose serial number looks like this one"""
+        self.ensure_one()
+        duplicates = self._get_serial_duplicates(self.serial_number, exclude_ids=self.ids)
+        return {
+            'name': _('Possible Duplicates - %s') % (self.serial_number or self.name),
+            'type': 'ir.actions.act_window',
+            'res_model': 'ecis.equipment',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', duplicates.ids)],
+        }
+    
     def action_schedule_inspection(self):
         """Open form to schedule new inspection"""
         self.ensure_one()
@@ -177,4 +312,59 @@ class EcisEquipment(models.Model):
             if record.serial_number:
                 name += f" - S/N: {record.serial_number}"
             result.append((record.id, name))
-        return result
\ No newline at end of file
+        return result
+    
+    # ========== FUZZY LOOKUP ==========
+    
+    @api.model
+    def _name_search(self, name, domain=None, operator='ilike', limit=None, order=None):
+        """Rank matches by trigram similarity, accepting the name_get format"""
+        if not name or operator != 'ilike' or not self._trgm_available():
+            return super()._name_search(name, domain, operator, limit, order)
+    
+        match = DISPLAY_NAME_RE.match(name)
+        term = (match.group('name') or name).strip() if match else name.strip()
+        serial = (match.group('serial') or '').strip() if match else ''
+        pattern = f'%{term}%'
+        score = SQL(
+            "GREATEST(similarity(e.name, %s), similarity(COALESCE(e.serial_number, ''), %s), "
+            "similarity(COALESCE(e.brand, ''), %s), similarity(COALESCE(e.model, ''), %s))",
+            term, term, term, term,
+        )
+        conditions = SQL(
+            "e.name ILIKE %s OR e.serial_number ILIKE %s OR e.brand ILIKE %s OR e.model ILIKE %s"
+            " OR e.name %% %s OR e.serial_number %% %s",
+            pattern, pattern, pattern, pattern, term, term,
+        )
+        if serial:
+            conditions = SQL("(%s) AND e.serial_number ILIKE %s", conditions, f'%{serial}%')
+        query = SQL("""
+            SELECT e.id FROM ecis_equipment e
+             WHERE e.id IN %s AND (%s)
+             ORDER BY %s DESC, e.name, e.id
+        """, self._search(domain or []).subselect(), conditions, score)
+        if limit:
+            query = SQL("%s LIMIT %s", query, limit)
+        self.env.cr.execute(query)
+        return [row[0] for row in self.env.cr.fetchall()]
+    
+    @api.model
+    def _get_serial_duplicates(self, serial, exclude_ids=None, threshold=SERIAL_DUPLICATE_THRESHOLD, limit=10):
+        """Equipment whose serial number is identical or trigram-similar to ``serial``"""
+        if not serial or not self._trgm_available():
+            return self.browse()
+        self.env.cr.execute("""
+            SELECT id FROM ecis_equipment
+             WHERE active
+               AND NOT (id = ANY(%(exclude)s))
+               AND (serial_number ILIKE %(serial)s OR serial_number %% %(serial)s)
+               AND (serial_number ILIKE %(serial)s OR similarity(serial_number, %(serial)s) >= %(threshold)s)
+             ORDER BY similarity(serial_number, %(serial)s) DESC, id
+             LIMIT %(limit)s
+        """, {
+            'serial': serial,
+            'exclude': list(exclude_ids or []) or [0],
+            'threshold': threshold,
+            'limit': limit,
+        })
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
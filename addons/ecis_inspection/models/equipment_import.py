@@ -0,0 +1,473 @@
+import base64
+import csv
+import io
+import logging
+import re
+import zipfile
+from datetime import date
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Rows validated and written per savepoint (and per commit in the cron).
+IMPORT_CHUNK_SIZE = 500
+
+# Files with more rows than this are queued for the cron instead of being
+# processed inside the user's request.
+SYNC_IMPORT_LIMIT = 2000
+
+# What a corrupt or mislabelled file raises while it is parsed: a broken zip
+# or a zip without a workbook inside, malformed sheet XML, bad base64,
+# oversized CSV fields.
+FILE_ERRORS = (
+    zipfile.BadZipFile, csv.Error, UnicodeError, KeyError, ValueError, SyntaxError, EOFError, OSError,
+)
+
+IMPORT_FIELDS = (
+    'name', 'equipment_type', 'brand', 'model', 'serial_number',
+    'manufacture_year', 'capacity', 'location', 'notes',
+)
+
+# Normalised header -> column name.
+HEADER_ALIASES = {
+    'equipment': 'name',
+    'equipment_name': 'name',
+    'type': 'equipment_type',
+    'serial': 'serial_number',
+    'serial_no': 'serial_number',
+    's_n': 'serial_number',
+    'sn': 'serial_number',
+    'year': 'manufacture_year',
+    'year_of_manufacture': 'manufacture_year',
+    'capacity_load': 'capacity',
+    'manufacturer': 'brand',
+    'client_name': 'client',
+    'customer': 'client',
+    'exact_location': 'location',
+}
+
+
+def _normalise_header(header):
+    key = re.sub(r'[^a-z0-9]+', '_', str(header or '').strip().lower()).strip('_')
+    return HEADER_ALIASES.get(key, key)
+
+
+class EcisEquipmentImport(models.Model):
+    """
+    Equipment Import - Streaming CSV/XLSX import of a client's equipment fleet
+    """
+    _name = 'ecis.equipment.import'
+    _description = 'Equipment Fleet Import'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(
+        string='File Name',
+        required=True,
+        help="Name of the uploaded file (.csv or .xlsx)"
+    )
+
+    file = fields.Binary(
+        string='File',
+        required=True,
+        attachment=True,
+    )
+
+    client_id = fields.Many2one(
+        'res.partner',
+        string='Default Client',
+        domain=[('is_company', '=', True)],
+        help="Client of rows without a client column"
+    )
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        default=lambda self: self.env.company
+    )
+
+    update_existing = fields.Boolean(
+        string='Update Existing Equipment',
+        default=True,
+        help="Rows whose client and serial number already exist update that equipment"
+    )
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='draft', required=True, readonly=True)
+
+    total_rows = fields.Integer(string='Rows', readonly=True)
+    processed_rows = fields.Integer(string='Processed', readonly=True)
+    created_count = fields.Integer(string='Created', readonly=True)
+    updated_count = fields.Integer(string='Updated', readonly=True)
+    unchanged_count = fields.Integer(string='Unchanged', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+
+    progress = fields.Float(
+        string='Progress',
+        compute='_compute_progress',
+    )
+
+    errors = fields.Json(
+        string='Error Rows',
+        readonly=True,
+        help="[row number, message, original values] of each rejected row"
+    )
+
+    error_report = fields.Binary(
+        string='Error Report',
+        attachment=True,
+        readonly=True,
+    )
+
+    error_report_name = fields.Char(string='Error Report Name', readonly=True)
+
+    failure_message = fields.Text(string='Failure', readonly=True)
+
+    started_at = fields.Datetime(string='Started', readonly=True)
+    finished_at = fields.Datetime(string='Finished', readonly=True)
+
+    # ========== COMPUTED FIELDS ==========
+
+    @api.depends('processed_rows', 'total_rows')
+    def _compute_progress(self):
+        for record in self:
+            record.progress = 100.0 * record.processed_rows / record.total_rows if record.total_rows else 0.0
+
+    # ========== PARSING ==========
+
+    def _file_kind(self):
+        self.ensure_one()
+        name = (self.name or '').lower()
+        if name.endswith('.xlsx'):
+            return 'xlsx'
+        if name.endswith(('.csv', '.txt')):
+            return 'csv'
+        raise UserError(_('Only .csv and .xlsx files can be imported.'))
+
+    def _iter_rows(self):
+        """Yield (row number, {column: value}) without loading the whole sheet"""
+        self.ensure_one()
+        try:
+            yield from self._read_rows()
+        except FILE_ERRORS as exc:
+            _logger.info("Equipment import %s: cannot read %s: %s", self.id, self.name, exc)
+            raise UserError(_('The file %s could not be read: %s') % (self.name, exc))
+
+    def _read_rows(self):
+        raw = base64.b64decode(self.with_context(bin_size=False).file or b'')
+        if self._file_kind() == 'xlsx':
+            if openpyxl is None:
+                raise UserError(_('Reading .xlsx files requires the openpyxl Python package.'))
+            workbook = openpyxl.load_workbook(io.BytesIO(raw), read_only=True, data_only=True)
+            try:
+                rows = workbook.worksheets[0].iter_rows(values_only=True)
+                header = [_normalise_header(h) for h in next(rows, [])]
+                for number, values in enumerate(rows, start=2):
+                    if any(v not in (None, '') for v in values):
+                        yield number, dict(zip(header, values))
+            finally:
+                workbook.close()
+            return
+
+        text = io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8-sig', errors='replace', newline='')
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(text, dialect)
+        header = [_normalise_header(h) for h in next(reader, [])]
+        for values in reader:
+            if any(v.strip() for v in values):
+                yield reader.line_num, dict(zip(header, values))
+
+    def _chunks(self):
+        chunk = []
+        for row in self._iter_rows():
+            chunk.append(row)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # ========== VALIDATION ==========
+
+    @api.model
+    def _equipment_types(self):
+        selection = self.env['ecis.equipment']._fields['equipment_type'].selection
+        types = {}
+        for value, label in selection:
+            types[value] = value
+            types[_normalise_header(label)] = value
+        return types
+
+    def _resolve_clients(self, rows):
+        """Map client names found in ``rows`` to partner ids with one query"""
+        names = {str(values.get('client')).strip().lower() for _number, values in rows if values.get('client')}
+        if not names:
+            return {}
+        # Case-insensitive like the lookup in _normalise_row; the oldest
+        # company wins when several share a name.
+        self.env['res.partner'].flush_model(['name', 'is_company', 'active'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (lower(name)) lower(name), id FROM res_partner
+             WHERE is_company AND active AND lower(name) = ANY(%s)
+             ORDER BY lower(name), id
+        """, [sorted(names)])
+        return dict(self.env.cr.fetchall())
+
+    def _normalise_row(self, values, clients, types):
+        """Return (client id, vals) for one row or raise ValueError with the reason"""
+        vals = {}
+        for field_name in IMPORT_FIELDS:
+            value = values.get(field_name)
+            if isinstance(value, str):
+                value = ' '.join(value.split())
+            if value not in (None, ''):
+                vals[field_name] = value
+        if not vals.get('name'):
+            raise ValueError(_('Equipment name is required.'))
+        vals['name'] = str(vals['name'])
+
+        equipment_type = types.get(_normalise_header(vals.get('equipment_type')))
+        if not equipment_type:
+            raise ValueError(_('Unknown equipment type "%s".') % (vals.get('equipment_type') or ''))
+        vals['equipment_type'] = equipment_type
+
+        if 'manufacture_year' in vals:
+            try:
+                year = int(float(vals['manufacture_year']))
+            except (TypeError, ValueError):
+                raise ValueError(_('Manufacture year "%s" is not a number.') % vals['manufacture_year'])
+            if not 1900 <= year <= date.today().year:
+                raise ValueError(_('Manufacture year %s is out of range.') % year)
+            vals['manufacture_year'] = year
+        for field_name in ('serial_number', 'brand', 'model', 'capacity', 'location', 'notes'):
+            if field_name in vals:
+                vals[field_name] = str(vals[field_name])
+
+        client_name = values.get('client')
+        if client_name not in (None, ''):
+            client_id = clients.get(str(client_name).strip().lower())
+            if not client_id:
+                raise ValueError(_('Unknown client "%s".') % client_name)
+        elif self.client_id:
+            client_id = self.client_id.id
+        else:
+            raise ValueError(_('No client given and the import has no default client.'))
+        vals['client_id'] = client_id
+        return client_id, vals
+
+    def _existing_equipment(self, keys):
+        """Map (client id, serial) to equipment id, through the client/serial index"""
+        if not keys:
+            return {}
+        client_ids, serials = zip(*keys)
+        self.env.cr.execute("""
+            SELECT e.id, e.client_id, e.serial_number
+              FROM unnest(%s::int[], %s::varchar[]) AS k(client_id, serial_number)
+              JOIN ecis_equipment e
+                ON e.client_id = k.client_id AND e.serial_number = k.serial_number
+        """, [list(client_ids), list(serials)])
+        return {(client_id, serial): rec_id for rec_id, client_id, serial in self.env.cr.fetchall()}
+
+    # ========== PROCESSING ==========
+
+    def _equipment_env(self):
+        # Updated equipment gets one summary note instead of per-field tracking.
+        return self.env['ecis.equipment'].sudo().with_company(self.company_id or self.env.company).with_context(
+            ecis_bulk_tracking=True,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+            active_test=False,
+        )
+
+    def _write_rows(self, creates, updates):
+        """Batch-create ``creates`` and apply ``updates``; return the counters"""
+        equipment_env = self._equipment_env()
+        created = equipment_env.create([vals for _number, _values, vals in creates]) if creates else equipment_env
+        updated = unchanged = 0
+        if updates:
+            records = equipment_env.browse([rec_id for rec_id, _row in updates])
+            current = {r['id']: r for r in records.read(list(IMPORT_FIELDS), load=None)}
+            grouped = {}
+            for rec_id, (_number, _values, vals) in updates:
+                diff = {k: v for k, v in vals.items() if k != 'client_id' and current[rec_id].get(k) != v}
+                if not diff:
+                    unchanged += 1
+                    continue
+                grouped.setdefault(tuple(sorted(diff.items())), []).append(rec_id)
+            # Identical changes (e.g. a new location for a whole site) share one write.
+            for diff, rec_ids in grouped.items():
+                equipment_env.browse(rec_ids).write(dict(diff))
+                updated += len(rec_ids)
+        return len(created), updated, unchanged
+
+    def _validate_chunk(self, rows, seen, types):
+        """Return (valid rows, errors); ``seen`` collects the (client, serial) keys"""
+        errors = []
+        clients = self._resolve_clients(rows)
+        valid = []
+        for number, values in rows:
+            values = {k: '' if v is None else str(v) for k, v in values.items() if k}
+            try:
+                client_id, vals = self._normalise_row(values, clients, types)
+            except ValueError as exc:
+                errors.append([number, str(exc), values])
+                continue
+            serial = vals.get('serial_number')
+            if serial:
+                if (client_id, serial) in seen:
+                    errors.append([number, _('Serial number %s already appears on row %s.') % (serial, seen[(client_id, serial)]), values])
+                    continue
+                seen[(client_id, serial)] = number
+            valid.append((number, values, vals))
+        return valid, errors
+
+    def _process_chunk(self, rows, seen, types):
+        """Validate and write one chunk; return (created, updated, unchanged, errors)"""
+        valid, errors = self._validate_chunk(rows, seen, types)
+
+        existing = self._existing_equipment([
+            (vals['client_id'], vals['serial_number']) for _n, _v, vals in valid if vals.get('serial_number')
+        ])
+        creates, updates = [], []
+        for row in valid:
+            rec_id = existing.get((row[2]['client_id'], row[2].get('serial_number')))
+            if not rec_id:
+                creates.append(row)
+            elif self.update_existing:
+                updates.append((rec_id, row))
+            else:
+                errors.append([row[0], _('Equipment with serial number %s already exists.') % row[2]['serial_number'], row[1]])
+
+        try:
+            with self.env.cr.savepoint():
+                created, updated, unchanged = self._write_rows(creates, updates)
+        except Exception:
+            # Isolate the offending rows instead of rejecting the whole chunk.
+            created = updated = unchanged = 0
+            for row in creates:
+                try:
+                    with self.env.cr.savepoint():
+                        created += self._write_rows([row], [])[0]
+                except Exception as exc:
+                    errors.append([row[0], str(exc), row[1]])
+            for update in updates:
+                try:
+                    with self.env.cr.savepoint():
+                        _created, done, same = self._write_rows([], [update])
+                        updated += done
+                        unchanged += same
+                except Exception as exc:
+                    errors.append([update[1][0], str(exc), update[1][1]])
+        return created, updated, unchanged, errors
+
+    def _run(self, auto_commit=False):
+        """Import the file chunk by chunk, resuming after the last committed chunk"""
+        self.ensure_one()
+        if self.state not in ('running', 'queued', 'draft'):
+            return
+        self.write({'state': 'running', 'started_at': self.started_at or fields.Datetime.now()})
+        types = self._equipment_types()
+        errors = list(self.errors or [])
+        # Serials of the rows already imported, to catch duplicates across chunks.
+        seen = {}
+        try:
+            for index, chunk in enumerate(self._chunks()):
+                if (index + 1) * IMPORT_CHUNK_SIZE <= self.processed_rows:
+                    # Committed by an interrupted run: only replay the duplicate check.
+                    self._validate_chunk(chunk, seen, types)
+                    continue
+                created, updated, unchanged, chunk_errors = self._process_chunk(chunk, seen, types)
+                errors.extend(chunk_errors)
+                self.write({
+                    'processed_rows': self.processed_rows + len(chunk),
+                    'created_count': self.created_count + created,
+                    'updated_count': self.updated_count + updated,
+                    'unchanged_count': self.unchanged_count + unchanged,
+                    'error_count': len(errors),
+                    'errors': errors,
+                })
+                if auto_commit:
+                    self.env.cr.commit()
+        except UserError as exc:
+            self.write({'state': 'failed', 'failure_message': str(exc), 'finished_at': fields.Datetime.now()})
+            return
+        self.write({
+            'state': 'done',
+            'finished_at': fields.Datetime.now(),
+            'processed_rows': self.total_rows or self.processed_rows,
+        })
+        self._build_error_report()
+
+    def _build_error_report(self):
+        self.ensure_one()
+        if not self.errors:
+            self.write({'error_report': False, 'error_report_name': False})
+            return
+        columns = []
+        for _number, _message, values in self.errors:
+            columns.extend(c for c in values if c not in columns)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['row', 'error'] + columns)
+        for number, message, values in self.errors:
+            writer.writerow([number, message] + [values.get(c, '') for c in columns])
+        stem = (self.name or 'import').rsplit('.', 1)[0]
+        self.write({
+            'error_report': base64.b64encode(buffer.getvalue().encode('utf-8')),
+            'error_report_name': f'{stem}_errors.csv',
+        })
+
+    # ========== ACTIONS ==========
+
+    def action_import(self):
+        """Count the rows, then import now or hand large files to the cron"""
+        for job in self:
+            if job.state != 'draft':
+                continue
+            job._file_kind()
+            total = sum(1 for _row in job._iter_rows())
+            job.write({'total_rows': total, 'state': 'queued'})
+            if total <= SYNC_IMPORT_LIMIT:
+                job._run()
+            else:
+                self.env.ref('ecis_inspection.ir_cron_ecis_equipment_import')._trigger()
+        return True
+
+    def action_reset(self):
+        self.write({
+            'state': 'draft',
+            'processed_rows': 0,
+            'created_count': 0,
+            'updated_count': 0,
+            'unchanged_count': 0,
+            'error_count': 0,
+            'errors': False,
+            'error_report': False,
+            'error_report_name': False,
+            'failure_message': False,
+            'started_at': False,
+            'finished_at': False,
+        })
+
+    @api.model
+    def _cron_process(self):
+        """Process queued imports (and resume interrupted ones), committing per chunk"""
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            job._run(auto_commit=True)
+            self.env.cr.commit()
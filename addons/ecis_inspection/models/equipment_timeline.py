@@ -0,0 +1,188 @@
+from odoo import models, fields, api, tools
+
+# One row per live inspection with its position in the equipment history.
+# Every window is partitioned by equipment, so a filter on equipment_id is
+# pushed down into both levels and only that equipment's rows are read.
+# Checklist figures only count finished inspections: lines of drafts still
+# carry their default status.
+TIMELINE_VIEW = """
+    CREATE OR REPLACE VIEW ecis_equipment_timeline AS (
+        SELECT i.id,
+               i.id AS inspection_id,
+               i.equipment_id,
+               i.company_id,
+               i.name,
+               i.inspection_date,
+               i.inspection_type,
+               i.state,
+               i.overall_result,
+               i.inspector_id,
+               ROW_NUMBER() OVER w AS sequence,
+               i.inspection_date - LAG(i.inspection_date) OVER w AS days_since_previous,
+               COALESCE(l.pass_count, 0) AS pass_count,
+               COALESCE(l.fail_count, 0) AS fail_count,
+               COALESCE(l.warning_count, 0) AS warning_count,
+               l.pass_rate,
+               ROUND((l.pass_rate - LAG(l.pass_rate) OVER w)::numeric, 1)::float8 AS pass_rate_change,
+               ROUND(AVG(l.pass_rate) OVER (w ROWS BETWEEN 2 PRECEDING AND CURRENT ROW)::numeric, 1)::float8
+                   AS pass_rate_trend,
+               COALESCE(l.recurring_fail_count, 0) AS recurring_fail_count,
+               l.recurring_failures
+          FROM ecis_inspection i
+     LEFT JOIN (
+            SELECT equipment_id,
+                   inspection_id,
+                   COUNT(*) FILTER (WHERE status = 'pass') AS pass_count,
+                   COUNT(*) FILTER (WHERE status = 'fail') AS fail_count,
+                   COUNT(*) FILTER (WHERE status = 'warning') AS warning_count,
+                   ROUND(100.0 * COUNT(*) FILTER (WHERE status = 'pass')
+                         / NULLIF(COUNT(*) FILTER (WHERE status != 'na'), 0), 1)::float8 AS pass_rate,
+                   COUNT(*) FILTER (WHERE status = 'fail' AND previous_status = 'fail') AS recurring_fail_count,
+                   STRING_AGG(name, ', ' ORDER BY name)
+                       FILTER (WHERE status = 'fail' AND previous_status = 'fail') AS recurring_failures
+              FROM (
+                SELECT fi.equipment_id,
+                       c.inspection_id,
+                       c.name,
+                       c.status,
+                       -- The same item at its previous check on this equipment.
+                       LAG(c.status) OVER (
+                           PARTITION BY fi.equipment_id, c.name
+                           ORDER BY fi.inspection_date, fi.id
+                       ) AS previous_status
+                  FROM ecis_inspection_checklist c
+                  JOIN ecis_inspection fi ON fi.id = c.inspection_id
+                 WHERE fi.active AND fi.state IN ('completed', 'sent')
+              ) lines
+          GROUP BY equipment_id, inspection_id
+        ) l ON l.inspection_id = i.id AND l.equipment_id = i.equipment_id
+         WHERE i.active AND i.state != 'cancelled'
+        WINDOW w AS (PARTITION BY i.equipment_id ORDER BY i.inspection_date, i.id)
+    )
+"""
+
+# Newest first, with the total row count of the equipment's history.
+TIMELINE_PAGE_QUERY = """
+    SELECT inspection_id AS id, name, inspection_date, inspection_type, state,
+           overall_result, inspector_id, sequence, days_since_previous,
+           pass_count, fail_count, warning_count, pass_rate, pass_rate_change,
+           pass_rate_trend, recurring_fail_count, recurring_failures,
+           COUNT(*) OVER () AS total
+      FROM ecis_equipment_timeline
+     WHERE equipment_id = %s
+     ORDER BY inspection_date DESC, id DESC
+     LIMIT %s OFFSET %s
+"""
+
+
+def _inspection_selection(field_name):
+    return lambda self: self.env['ecis.inspection']._fields[field_name].selection
+
+
+class EcisEquipmentTimeline(models.Model):
+    """
+    Equipment Timeline - Inspection history of each piece of equipment with
+    the interval since the previous inspection, the checklist pass-rate
+    trend and the failed items that also failed at their previous check
+    """
+    _name = 'ecis.equipment.timeline'
+    _description = 'Equipment Inspection Timeline'
+    _auto = False
+    _order = 'inspection_date desc, id desc'
+
+    inspection_id = fields.Many2one('ecis.inspection', string='Inspection', readonly=True)
+    equipment_id = fields.Many2one('ecis.equipment', string='Equipment', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    name = fields.Char(string='Report Number', readonly=True)
+    inspection_date = fields.Date(string='Inspection Date', readonly=True)
+    inspection_type = fields.Selection(_inspection_selection('inspection_type'), string='Type', readonly=True)
+    state = fields.Selection(_inspection_selection('state'), string='Status', readonly=True)
+    overall_result = fields.Selection(_inspection_selection('overall_result'), string='Result', readonly=True)
+    inspector_id = fields.Many2one('res.users', string='Inspector', readonly=True)
+
+    sequence = fields.Integer(
+        string='#',
+        readonly=True,
+        help="Position of the inspection in the equipment history"
+    )
+
+    days_since_previous = fields.Integer(
+        string='Days Since Previous',
+        readonly=True,
+        help="Days between this inspection and the previous one"
+    )
+
+    pass_count = fields.Integer(string='Passed', readonly=True)
+    fail_count = fields.Integer(string='Failed', readonly=True)
+    warning_count = fields.Integer(string='Warnings', readonly=True)
+
+    pass_rate = fields.Float(
+        string='Pass Rate (%)',
+        readonly=True,
+        help="Passed checklist items out of the applicable ones"
+    )
+
+    pass_rate_change = fields.Float(
+        string='Change (pts)',
+        readonly=True,
+        help="Pass rate difference with the previous inspection"
+    )
+
+    pass_rate_trend = fields.Float(
+        string='Trend (%)',
+        readonly=True,
+        help="Average pass rate over this and the two previous inspections"
+    )
+
+    recurring_fail_count = fields.Integer(
+        string='Recurring Failures',
+        readonly=True,
+        help="Failed items that had also failed at their previous check"
+    )
+
+    recurring_failures = fields.Char(
+        string='Recurring Failed Items',
+        readonly=True,
+    )
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(TIMELINE_VIEW)
+
+    # ========== CACHED PAGES ==========
+
+    @api.model
+    def _timeline_page(self, equipment_id, limit=50, offset=0, company_id=None):
+        """
+        Return ``{'total', 'rows'}`` for one page of the equipment's
+        timeline, newest first, or None for an unknown equipment (or one of
+        another company than ``company_id``, when given). Pages are cached
+        under the equipment's timeline stamp, which every change to its
+        inspections or checklist lines renews.
+        """
+        query = "SELECT COALESCE(timeline_stamp, 0) FROM ecis_equipment WHERE id = %s"
+        params = [equipment_id]
+        if company_id:
+            query += " AND company_id = %s"
+            params.append(company_id)
+        self.env.cr.execute(query, params)
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        return self._timeline_page_cached(equipment_id, row[0], limit, offset)
+
+    @api.model
+    @tools.ormcache('equipment_id', 'stamp', 'limit', 'offset')
+    def _timeline_page_cached(self, equipment_id, stamp, limit, offset):
+        cr = self.env.cr
+        cr.execute(TIMELINE_PAGE_QUERY, [equipment_id, limit, offset])
+        columns = [column[0] for column in cr.description]
+        rows = [dict(zip(columns, values)) for values in cr.fetchall()]
+        if rows:
+            total = rows[0]['total']
+        else:
+            cr.execute("SELECT count(*) FROM ecis_equipment_timeline WHERE equipment_id = %s", [equipment_id])
+            total = cr.fetchone()[0]
+        for row in rows:
+            del row['total']
+        return {'total': total, 'rows': tuple(rows)}
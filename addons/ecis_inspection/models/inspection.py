@@ -1,5 +1,44 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import SQL
+from odoo.tools.sql import column_exists, create_index
+
+from ..tools.profiling import profiled
+from .checklist import FINISHED_STATES
+
+# Text search configurations indexed in findings_tsv (those missing from the
+# PostgreSQL server are skipped).
+FTS_LANGUAGES = ('english', 'french', 'arabic')
+
+# (column, weight) pairs that make up the findings search document.
+FTS_COLUMNS = (
+    ('defects_found', 'A'),
+    ('immediate_actions_required', 'A'),
+    ('recommendations', 'B'),
+    ('inspector_notes', 'C'),
+    ('checklist_notes_text', 'D'),
+)
+
+# Batch transitions: action name -> (method, states it applies to).
+TRANSITIONS = {
+    'start': ('action_start_inspection', ('draft',)),
+    'complete': ('action_complete_inspection', ('in_progress',)),
+    'send': ('action_send_to_client', ('completed',)),
+    'cancel': ('action_cancel', ('draft', 'in_progress')),
+    'reset': ('action_reset_to_draft', ('in_progress', 'completed', 'sent', 'cancelled')),
+}
+
+# Most inspections one transition call moves; a failing group write is
+# retried record by record, so the list stays at one batch.
+TRANSITION_BATCH_SIZE = 200
+
+# Fields shown on the equipment timeline or grouped by the checklist rollup;
+# writing any of them renews the equipment's timeline stamp and queues the
+# inspection days for the rollup.
+TIMELINE_FIELDS = frozenset({
+    'name', 'equipment_id', 'inspection_date', 'inspection_type', 'state',
+    'overall_result', 'inspector_id', 'company_id', 'active',
+})
 
 class EcisInspection(models.Model):
     """
@@ -7,7 +46,7 @@ class EcisInspection(models.Model):
     """
     _name = 'ecis.inspection'
     _description = 'Equipment Inspection Report'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['ecis.mail.thread.bulk', 'mail.activity.mixin']
     _order = 'inspection_date desc, id desc'
 
     # ========== BASIC INFORMATION ==========
@@ -49,6 +88,7 @@ class EcisInspection(models.Model):
         string='Inspection Date',
         default=fields.Date.today,
         required=True,
+        index=True,
         tracking=True,
         help="Date when inspection was performed"
     )
@@ -62,6 +102,21 @@ class EcisInspection(models.Model):
         help="Person who performed the inspection"
     )
     
+    needs_assignment = fields.Boolean(
+        string='Needs Assignment',
+        copy=False,
+        help="Waiting for the assignment engine to pick an inspector and day"
+    )
+    
+    quote_request_id = fields.Many2one(
+        'ecis.quote.request',
+        string='Quote Request',
+        index='btree_not_null',
+        ondelete='set null',
+        copy=False,
+        help="Website request this inspection was created from"
+    )
+    
     inspection_type = fields.Selection([
         ('initial', 'Initial Inspection'),
         ('periodic', 'Periodic Inspection'),
@@ -172,6 +227,21 @@ class EcisInspection(models.Model):
         compute='_compute_report_pdf_name'
     )
     
+    # ========== FULL-TEXT SEARCH ==========
+    checklist_notes_text = fields.Text(
+        string='Checklist Notes',
+        compute='_compute_checklist_notes_text',
+        store=True,
+        help="Checklist notes gathered for the findings search index"
+    )
+    
+    findings_search = fields.Char(
+        string='Findings',
+        compute='_compute_findings_search',
+        search='_search_findings_search',
+        help="Full-text search over defects, actions, recommendations and notes"
+    )
+    
     # ========== NEXT INSPECTION ==========
     next_inspection_due = fields.Date(
         string='Next Inspection Due Date',
@@ -190,7 +260,7 @@ class EcisInspection(models.Model):
         ('completed', 'Completed'),
         ('sent', 'Sent to Client'),
         ('cancelled', 'Cancelled')
-    ], string='Status', default='draft', required=True,
+    ], string='Status', default='draft', required=True, index=True,
        tracking=True, help="Current status of the inspection")
     
     # ========== OTHER ==========
@@ -199,6 +269,7 @@ class EcisInspection(models.Model):
     company_id = fields.Many2one(
         'res.company',
         string='Company',
+        index=True,
         default=lambda self: self.env.company
     )
     
@@ -216,6 +287,32 @@ class EcisInspection(models.Model):
             record.checklist_pass_count = passed
             record.checklist_fail_count = failed
     
+    @api.depends('checklist_ids.notes')
+    def _compute_checklist_notes_text(self):
+        """Concatenate checklist notes for the search document"""
+        for record in self:
+            notes = [note for note in record.checklist_ids.mapped('notes') if note]
+            record.checklist_notes_text = '\n'.join(notes) or False
+    
+    def _compute_findings_search(self):
+        for record in self:
+            record.findings_search = False
+    
+    def _search_findings_search(self, operator, value):
+        if operator not in ('ilike', '=', 'like') or not value:
+            raise UserError(_('Unsupported search on findings.'))
+        languages = self._fts_languages()
+        if not languages:
+            return [('id', '=', False)]
+        # Matched in the main query as a subselect, not as a list of ids.
+        tsquery = SQL(' || ').join(
+            SQL("websearch_to_tsquery(%s::regconfig, %s)", language, value) for language in languages
+        )
+        return [('id', 'in', SQL(
+            "SELECT id FROM %s WHERE findings_tsv @@ (%s) AND active",
+            SQL.identifier(self._table), tsquery,
+        ))]
+    
     @api.depends('name')
     def _compute_report_pdf_name(self):
         """Generate PDF filename"""
@@ -225,23 +322,184 @@ class EcisInspection(models.Model):
             else:
                 record.report_pdf_name = 'Inspection_Report.pdf'
     
+    # ========== FULL-TEXT SEARCH ==========
+    
+    def init(self):
+        """Create the hot-path indexes and the findings tsvector with its GIN index"""
+        cr = self.env.cr
+        # Default list order over live inspections.
+        create_index(cr, 'ecis_inspection_live_date_idx', self._table,
+                     ['inspection_date DESC', 'id DESC'],
+                     where="active AND state != 'cancelled'")
+        # Equipment history and client dashboards, in _order.
+        create_index(cr, 'ecis_inspection_equipment_date_idx', self._table,
+                     ['equipment_id', 'inspection_date DESC', 'id DESC'])
+        create_index(cr, 'ecis_inspection_client_date_idx', self._table,
+                     ['client_id', 'inspection_date DESC', 'id DESC'])
+        # Overdue follow-ups only ever look at finished inspections.
+        create_index(cr, 'ecis_inspection_next_due_idx', self._table,
+                     ['next_inspection_due'],
+                     where="active AND state IN ('completed', 'sent') AND next_inspection_due IS NOT NULL")
+        # Assignment queue and the per-inspector daily load it is checked against.
+        create_index(cr, 'ecis_inspection_needs_assignment_idx', self._table,
+                     ['id'], where="needs_assignment AND state = 'draft'")
+        create_index(cr, 'ecis_inspection_inspector_date_idx', self._table,
+                     ['inspector_id', 'inspection_date'],
+                     where="active AND state IN ('draft', 'in_progress')")
+    
+        # Findings full-text search.
+        languages = self._fts_languages()
+        if languages and not column_exists(self.env.cr, self._table, 'findings_tsv'):
+            document = ' || '.join(
+                f"setweight(to_tsvector('{language}'::regconfig, coalesce({column}, '')), '{weight}')"
+                for language in languages
+                for column, weight in FTS_COLUMNS
+            )
+            self.env.cr.execute(f"""
+                ALTER TABLE {self._table}
+                ADD COLUMN findings_tsv tsvector GENERATED ALWAYS AS ({document}) STORED
+            """)
+        if column_exists(self.env.cr, self._table, 'findings_tsv'):
+            create_index(self.env.cr, 'ecis_inspection_findings_tsv_idx', self._table,
+                         ['findings_tsv'], method='gin')
+    
+    @api.model
+    @tools.ormcache()
+    def _fts_languages(self):
+        """Text search configurations available on this server"""
+        self.env.cr.execute(
+            "SELECT cfgname FROM pg_ts_config WHERE cfgname IN %s", [FTS_LANGUAGES])
+        available = {row[0] for row in self.env.cr.fetchall()}
+        return tuple(language for language in FTS_LANGUAGES if language in available)
+    
+    @api.model
+    def _search_findings_ranked(self, text, limit=50, offset=0, company_id=None):
+        """
+        Return [(id, rank)] of active inspections whose findings match ``text``
+        (web-search syntax: quoted phrases, OR, -exclusion), best match first,
+        optionally only those of ``company_id``.
+        """
+        languages = self._fts_languages()
+        if not languages or not text:
+            return []
+        tsquery = ' || '.join(
+            f"websearch_to_tsquery('{language}'::regconfig, %(text)s)" for language in languages
+        )
+        query = f"""
+            SELECT i.id, ts_rank_cd(i.findings_tsv, q.query) AS rank
+              FROM {self._table} i, (SELECT {tsquery} AS query) q
+             WHERE i.findings_tsv @@ q.query AND i.active
+        """
+        params = {'text': text}
+        if company_id:
+            query += " AND i.company_id = %(company_id)s"
+            params['company_id'] = company_id
+        query += " ORDER BY rank DESC, i.id DESC"
+        if limit:
+            query += " LIMIT %(limit)s OFFSET %(offset)s"
+            params.update(limit=limit, offset=offset or 0)
+        self.env.cr.execute(query, params)
+        return self.env.cr.fetchall()
+    
     # ========== LIFECYCLE METHODS ==========
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Generate sequence numbers on creation, one batch per call"""
+        unnamed = [vals for vals in vals_list if vals.get('name', 'New') == 'New']
+        for vals, name in zip(unnamed, self._next_names(len(unnamed))):
+            vals['name'] = name
+        records = super(EcisInspection, self).create(vals_list)
+        self.env['ecis.equipment']._touch_timeline(records.equipment_id.ids)
+        return records
+    
     @api.model
-    def create(self, vals):
-        """Generate sequence number on creation"""
-        if vals.get('name', 'New') == 'New':
-            vals['name'] = self.env['ir.sequence'].next_by_code('ecis.inspection') or 'New'
-        return super(EcisInspection, self).create(vals)
+    def _next_names(self, count):
+        """
+        Return ``count`` report numbers. A standard sequence hands them out
+        in one nextval() round trip instead of one next_by_code() each.
+        """
+        if not count:
+            return []
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', 'ecis.inspection'),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence or sequence.implementation != 'standard' or sequence.use_date_range:
+            return [self.env['ir.sequence'].next_by_code('ecis.inspection') or 'New' for _i in range(count)]
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)", ['ir_sequence_%03d' % sequence.id, count])
+        return [sequence.get_next_char(number) for number, in self.env.cr.fetchall()]
+    
+    def write(self, vals):
+        """
+        Tell the previous inspector's tablet to drop reassigned inspections,
+        queue webhook events for status changes and renew the equipment
+        timelines and checklist rollup days
+        """
+        if 'inspector_id' in vals:
+            moved = self.filtered(lambda r: r.inspector_id.id != vals['inspector_id'])
+            moved._record_sync_deletions()
+        previous_states = {r.id: r.state for r in self} if 'state' in vals else None
+        history_changed = bool(TIMELINE_FIELDS.intersection(vals))
+        if history_changed:
+            # Both sides when an inspection moves to another equipment or day.
+            previous_equipment = self.equipment_id.ids
+            previous_days = self._rollup_days()
+        result = super(EcisInspection, self).write(vals)
+        if previous_states:
+            self.env['ecis.webhook.delivery']._enqueue_state_changes(self, previous_states)
+        if history_changed:
+            self.env['ecis.equipment']._touch_timeline(previous_equipment + self.equipment_id.ids)
+            self.env['ecis.checklist.rollup']._mark_days(previous_days | self._rollup_days())
+        return result
+    
+    def _rollup_days(self):
+        """Inspection days of the finished inspections, the grain of the checklist rollup"""
+        return {r.inspection_date for r in self if r.inspection_date and r.state in FINISHED_STATES}
+    
+    def _webhook_data(self):
+        """Event payload describing the inspection"""
+        self.ensure_one()
+        return {
+            'id': self.id,
+            'reference': self.name,
+            'state': self.state,
+            'overall_result': self.overall_result or None,
+            'inspection_date': fields.Date.to_string(self.inspection_date),
+            'inspection_type': self.inspection_type,
+            'equipment': {'id': self.equipment_id.id, 'name': self.equipment_id.name},
+            'client': {'id': self.client_id.id, 'name': self.client_id.name},
+            'inspector': {'id': self.inspector_id.id, 'name': self.inspector_id.name},
+            'write_date': fields.Datetime.to_string(self.write_date),
+        }
+    
+    def unlink(self):
+        """Record sync tombstones for the inspections and their checklist lines"""
+        self._record_sync_deletions()
+        self.env['ecis.equipment']._touch_timeline(self.equipment_id.ids)
+        # Archived inspections keep their place in the rollup.
+        if not self.env.context.get('ecis_archiving'):
+            self.env['ecis.checklist.rollup']._mark_days(self._rollup_days())
+        return super(EcisInspection, self).unlink()
+    
+    def _record_sync_deletions(self):
+        tombstones = self.env['ecis.sync.tombstone']
+        tombstones._record_deletions(
+            self._name, [(r.id, r.inspector_id.id) for r in self])
+        tombstones._record_deletions(
+            'ecis.inspection.checklist',
+            [(line.id, r.inspector_id.id) for r in self for line in r.checklist_ids])
     
     # ========== CONSTRAINTS ==========
     
-    @api.constrains('inspection_date')
+    @api.constrains('inspection_date', 'state')
     def _check_inspection_date(self):
-        """Inspection date cannot be in the future"""
+        """Started and finished inspections cannot be dated in the future; drafts are planned ahead"""
         for record in self:
-            if record.inspection_date and record.inspection_date > fields.Date.today():
-                raise ValidationError(_('Inspection date cannot be in the future.'))
+            if (record.state in ('in_progress', 'completed', 'sent')
+                    and record.inspection_date and record.inspection_date > fields.Date.today()):
+                raise ValidationError(_('An inspection cannot be started or finished with a date in the future.'))
     
     @api.constrains('overall_result', 'state')
     def _check_result_before_completion(self):
@@ -256,21 +514,39 @@ class EcisInspection(models.Model):
     def _onchange_equipment_id(self):
         """Load default checklist based on equipment type"""
         if self.equipment_id and not self.checklist_ids:
-            # Get template checklist for this equipment type
-            template_items = self.env['ecis.checklist.template'].search([
-                ('equipment_type', '=', self.equipment_id.equipment_type)
-            ])
-            
-            checklist_lines = []
-            for template in template_items:
-                checklist_lines.append((0, 0, {
-                    'name': template.name,
-                    'requirement': template.requirement,
-                    'sequence': template.sequence,
-                    'status': 'pass',  # Default to pass
-                }))
-            
-            self.checklist_ids = checklist_lines
+            lines = self._prepare_checklist_lines([self.equipment_id.equipment_type])
+            self.checklist_ids = [(0, 0, vals) for vals in lines[self.equipment_id.equipment_type]]
+    
+    # ========== CHECKLIST INSTANTIATION ==========
+    
+    @api.model
+    def _prepare_checklist_lines(self, equipment_types):
+        """Return {equipment_type: [checklist line vals]} from the templates"""
+        lines = {equipment_type: [] for equipment_type in equipment_types}
+        templates = self.env['ecis.checklist.template'].search([
+            ('equipment_type', 'in', list(lines))
+        ])
+        for template in templates:
+            lines[template.equipment_type].append({
+                'template_id': template.id,
+                'name': template.name,
+                'requirement': template.requirement,
+                'sequence': template.sequence,
+                'status': 'pass',  # Default to pass
+            })
+        return lines
+    
+    @profiled('ecis.inspection._instantiate_checklist')
+    def _instantiate_checklist(self):
+        """Create template checklist lines for inspections that have none"""
+        todo = self.filtered(lambda r: not r.checklist_ids)
+        lines = self._prepare_checklist_lines(set(todo.mapped('equipment_type')))
+        vals_list = [
+            dict(vals, inspection_id=record.id)
+            for record in todo
+            for vals in lines.get(record.equipment_type, [])
+        ]
+        return self.env['ecis.inspection.checklist'].create(vals_list)
     
     @api.onchange('next_inspection_frequency')
     def _onchange_next_inspection_frequency(self):
@@ -282,14 +558,35 @@ class EcisInspection(models.Model):
     
     # ========== ACTION METHODS ==========
     
+    def _transition_errors(self, action):
+        """Return {id: reason} for the records ``action`` cannot be applied to"""
+        errors = {}
+        sources = TRANSITIONS[action][1]
+        for record in self:
+            if record.state not in sources:
+                errors[record.id] = _('Cannot %s inspection %s in state %s.') % (
+                    action, record.name, dict(self._fields['state']._description_selection(self.env))[record.state])
+            elif action == 'complete' and not record.overall_result:
+                errors[record.id] = _('Please set the overall result before completing.')
+            elif action == 'complete' and not record.inspector_signature:
+                errors[record.id] = _('Inspector signature is required before completing.')
+            elif action == 'send' and not record.client_id.email:
+                errors[record.id] = _('Client %s does not have an email address configured.') % record.client_id.name
+        return errors
+    
+    def _transition_write(self, vals, note=None):
+        """Write ``vals`` on the whole set and log ``note`` on every record in one insert"""
+        records = self.with_context(ecis_bulk_tracking=True) if len(self) > 1 else self
+        records.write(vals)
+        if note:
+            self._message_log_batch(bodies={record.id: note for record in self})
+    
     def action_start_inspection(self):
         """Start the inspection process"""
-        self.ensure_one()
-        self.write({'state': 'in_progress'})
-        self.message_post(body=_('Inspection started.'))
+        self._transition_write({'state': 'in_progress'}, _('Inspection started.'))
     
     def action_complete_inspection(self):
-        """Mark inspection as completed and update equipment"""
+        """Mark inspections as completed and update their equipment"""
         for record in self:
             if not record.overall_result:
                 raise UserError(_('Please set the overall result before completing.'))
@@ -297,114 +594,177 @@ class EcisInspection(models.Model):
             if not record.inspector_signature:
                 raise UserError(_('Inspector signature is required before completing.'))
         
-            # Update state
-            record.write({'state': 'completed'})
-        
-        # Update equipment last inspection date
-            record.equipment_id.write({
-            'last_inspection_date': record.inspection_date,
-        })
+        self._transition_write({'state': 'completed'})
         
-        # Note: Next inspection date removed from simplified equipment model
+        # One write per distinct date rather than one per inspection
+        last_dates = {}
+        for record in self:
+            current = last_dates.get(record.equipment_id)
+            if not current or record.inspection_date > current:
+                last_dates[record.equipment_id] = record.inspection_date
+        by_date = {}
+        for equipment, inspection_date in last_dates.items():
+            by_date[inspection_date] = by_date.get(inspection_date, equipment.browse()) | equipment
+        for inspection_date, equipment in by_date.items():
+            equipment.write({'last_inspection_date': inspection_date})
     
     def action_generate_pdf(self):
         """Generate PDF inspection report - triggers native report"""
         self.ensure_one()
         return self.env.ref('ecis_inspection.action_report_inspection').report_action(self)
     
+    def _send_to_client(self):
+        """
+        Email the report of every inspection to its client and mark them sent.
+        Returns {id: error} for the inspections that could not be sent.
+        """
+        errors = {
+            record.id: _('Client %s does not have an email address configured.') % record.client_id.name
+            for record in self if not record.client_id.email
+        }
+        records = self.filtered(lambda r: r.id not in errors)
+        if not records:
+            return errors
+        
+        template = self.env.ref('ecis_inspection.email_template_inspection_completed', raise_if_not_found=False)
+        if not template:
+            message = _('Email template is not configured. Please contact system administrator.')
+            errors.update(dict.fromkeys(records.ids, message))
+            return errors
+        
+        # A single report goes out at once; larger batches are queued for the mail cron
+        template.send_mail_batch(records.ids, force_send=len(records) == 1)
+        records.write({'state': 'sent'})
+        records._message_log_batch(
+            bodies={
+                record.id: _('Inspection report sent to client via email: %s') % record.client_id.email
+                for record in records
+            },
+            subject=_('Report Sent'),
+        )
+        return errors
+    
+    @profiled('ecis.inspection.action_send_to_client')
     def action_send_to_client(self):
         """
-        Send inspection report to client via email
+        Send inspection reports to clients via email
         
         This method:
         1. Gets the email template
-        2. Sends email with PDF report attached
+        2. Sends emails with PDF report attached
         3. Updates inspection state to 'sent'
         4. Logs the action in chatter
         5. Shows success notification to user
         """
-        self.ensure_one()
-        
-        # Check if client has email
-        if not self.client_id.email:
+        try:
+            errors = self._send_to_client()
+        except Exception as e:
+            # If email fails, show error but don't crash
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
                 'params': {
-                    'title': _('No Email Address'),
-                    'message': _('Client %s does not have an email address configured.') % self.client_id.name,
-                    'type': 'warning',
+                    'title': _('Email Failed'),
+                    'message': _('Could not send email: %s') % str(e),
+                    'type': 'danger',
                     'sticky': True,
                 }
             }
         
-        # Get the email template
-        template = self.env.ref('ecis_inspection.email_template_inspection_completed', raise_if_not_found=False)
-        
-        if not template:
+        if errors:
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
                 'params': {
-                    'title': _('Template Not Found'),
-                    'message': _('Email template is not configured. Please contact system administrator.'),
-                    'type': 'danger',
+                    'title': _('No Email Address') if len(self) == 1 else _('Some Reports Were Not Sent'),
+                    'message': '\n'.join(errors.values()),
+                    'type': 'warning',
                     'sticky': True,
                 }
             }
         
-        try:
-            # Send the email (with PDF attached automatically)
-            template.send_mail(self.id, force_send=True)
-            
-            # Update state to 'sent'
-            self.write({'state': 'sent'})
-            
-            # Log in chatter
-            self.message_post(
-                body=_('Inspection report sent to client via email: %s') % self.client_id.email,
-                subject=_('Report Sent')
-            )
-            
-            # Show success notification
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Email Sent Successfully'),
-                    'message': _('Inspection report has been sent to %s (%s)') % (
-                        self.client_id.name, 
-                        self.client_id.email
-                    ),
-                    'type': 'success',
-                    'sticky': False,
-                }
-            }
-            
-        except Exception as e:
-            # If email fails, show error but don't crash
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Email Failed'),
-                    'message': _('Could not send email: %s') % str(e),
-                    'type': 'danger',
-                    'sticky': True,
-                }
+        # Show success notification
+        if len(self) == 1:
+            message = _('Inspection report has been sent to %s (%s)') % (self.client_id.name, self.client_id.email)
+        else:
+            message = _('%s inspection reports have been sent.') % len(self)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Email Sent Successfully'),
+                'message': message,
+                'type': 'success',
+                'sticky': False,
             }
+        }
     
     def action_cancel(self):
-        """Cancel the inspection"""
-        self.ensure_one()
-        self.write({'state': 'cancelled'})
-        self.message_post(body=_('Inspection cancelled.'))
+        """Cancel the inspections"""
+        self._transition_write({'state': 'cancelled'}, _('Inspection cancelled.'))
     
     def action_reset_to_draft(self):
-        """Reset inspection to draft"""
-        self.ensure_one()
-        self.write({'state': 'draft'})
-        self.message_post(body=_('Reset to draft.'))
+        """Reset inspections to draft"""
+        self._transition_write({'state': 'draft'}, _('Reset to draft.'))
+    
+    def action_assign_inspectors(self):
+        """Queue the draft inspections for assignment and place them now"""
+        drafts = self.filtered(lambda r: r.state == 'draft')
+        drafts.write({'needs_assignment': True})
+        self.env['ecis.inspector']._assign_inspections(drafts)
+    
+    # ========== BATCH TRANSITIONS ==========
+    
+    @api.model
+    def _transition(self, action, ids, company_id=None):
+        """
+        Apply ``action`` (a TRANSITIONS key) to the inspections ``ids``.
+        
+        The records that pass validation are moved together; if that fails,
+        they are retried one by one so that one bad record does not block
+        the others. Inspections of another company than ``company_id``, when
+        given, count as not found. Returns one {'id', 'status', 'error'?,
+        'state'?} per id.
+        """
+        if action not in TRANSITIONS:
+            raise ValidationError(_('Unknown transition %s.') % action)
+        method = TRANSITIONS[action][0]
+        records = self.browse(ids).exists()
+        if company_id:
+            records = records.filtered(lambda r: r.company_id.id == company_id)
+        outcomes = {rec_id: {'id': rec_id, 'status': 'not_found'} for rec_id in ids}
+        errors = records._transition_errors(action)
+        for rec_id, message in errors.items():
+            outcomes[rec_id] = {'id': rec_id, 'status': 'rejected', 'error': message}
+        
+        eligible = records.filtered(lambda r: r.id not in errors)
+        failed = {}
+        try:
+            with self.env.cr.savepoint():
+                result = getattr(eligible, method)()
+                failed = self._transition_result_errors(eligible, result)
+        except (UserError, ValidationError):
+            for record in eligible:
+                try:
+                    with self.env.cr.savepoint():
+                        result = getattr(record, method)()
+                        failed.update(self._transition_result_errors(record, result))
+                except (UserError, ValidationError) as exc:
+                    failed[record.id] = str(exc)
+        
+        for record in eligible:
+            if record.id in failed:
+                outcomes[record.id] = {'id': record.id, 'status': 'failed', 'error': failed[record.id]}
+            else:
+                outcomes[record.id] = {'id': record.id, 'status': 'done', 'state': record.state}
+        return [outcomes[rec_id] for rec_id in ids]
+    
+    @api.model
+    def _transition_result_errors(self, records, result):
+        """Per-record failures reported through a notification instead of an exception"""
+        if isinstance(result, dict) and result.get('params', {}).get('type') in ('warning', 'danger'):
+            return {record.id: result['params']['message'] for record in records if record.state != 'sent'}
+        return {}
     
     def action_download_pdf(self):
         """Download the PDF report"""
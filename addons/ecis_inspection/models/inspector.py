@@ -0,0 +1,207 @@
+import logging
+import re
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+from ..tools import assignment
+
+_logger = logging.getLogger(__name__)
+
+# Hours planned for an inspection that has no duration yet.
+DEFAULT_INSPECTION_HOURS = 2.0
+
+# How many days past its planned date an inspection may be moved.
+DEFAULT_HORIZON_DAYS = 14
+
+
+class EcisInspector(models.Model):
+    """
+    Inspector - Daily capacity and qualifications used by the assignment engine
+    """
+    _name = 'ecis.inspector'
+    _description = 'Inspector'
+    _order = 'name'
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='User',
+        required=True,
+        ondelete='cascade',
+        help="User the inspections are assigned to"
+    )
+
+    name = fields.Char(
+        related='user_id.name',
+        store=True,
+        readonly=True,
+    )
+
+    active = fields.Boolean(default=True)
+
+    daily_capacity = fields.Float(
+        string='Daily Capacity (hours)',
+        required=True,
+        default=8.0,
+        help="Inspection hours that can be planned for this inspector on one day"
+    )
+
+    qualifications = fields.Char(
+        string='Qualified Equipment Types',
+        help="Comma-separated equipment types (e.g. crane, forklift); empty means all types"
+    )
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        default=lambda self: self.env.company,
+    )
+
+    _sql_constraints = [
+        ('user_company_unique', 'unique(user_id, company_id)',
+         'A user can only be registered once as inspector per company.'),
+    ]
+
+    # ========== CONSTRAINTS ==========
+
+    @api.constrains('daily_capacity')
+    def _check_capacity(self):
+        for inspector in self:
+            if inspector.daily_capacity <= 0:
+                raise ValidationError(_('Daily capacity must be positive.'))
+
+    @api.constrains('qualifications')
+    def _check_qualifications(self):
+        known = dict(self.env['ecis.equipment']._fields['equipment_type'].selection)
+        for inspector in self:
+            unknown = (inspector._qualification_set() or set()) - set(known)
+            if unknown:
+                raise ValidationError(_('Unknown equipment types: %s') % ', '.join(sorted(unknown)))
+
+    def _qualification_set(self):
+        self.ensure_one()
+        types = {t.strip() for t in (self.qualifications or '').split(',') if t.strip()}
+        return types or None
+
+    # ========== ASSIGNMENT ==========
+
+    @api.model
+    def _assignment_settings(self):
+        params = self.env['ir.config_parameter'].sudo()
+        try:
+            hours = float(params.get_param('ecis_inspection.default_inspection_hours', DEFAULT_INSPECTION_HOURS))
+            horizon = int(params.get_param('ecis_inspection.assignment_horizon_days', DEFAULT_HORIZON_DAYS))
+        except (TypeError, ValueError):
+            hours, horizon = DEFAULT_INSPECTION_HOURS, DEFAULT_HORIZON_DAYS
+        return hours, horizon
+
+    @api.model
+    def _site_key(self, inspection):
+        """Inspections of one client at the same address share a site"""
+        location = (inspection.equipment_id.location or '').strip().splitlines()
+        address = re.sub(r'\W+', ' ', location[0].lower()).strip() if location else ''
+        return (inspection.client_id.id, address)
+
+    @api.model
+    def _booked_hours(self, inspectors, date_from, date_to, default_hours):
+        """{(user_id, day): hours} already planned for ``inspectors``, in one query"""
+        if not inspectors:
+            return {}
+        self.env['ecis.inspection'].flush_model(
+            ['inspector_id', 'inspection_date', 'inspection_duration', 'state', 'needs_assignment', 'company_id'])
+        self.env.cr.execute("""
+            SELECT inspector_id, inspection_date,
+                   SUM(COALESCE(NULLIF(inspection_duration, 0), %s))
+              FROM ecis_inspection
+             WHERE inspector_id IN %s
+               AND company_id = %s
+               AND inspection_date BETWEEN %s AND %s
+               AND state IN ('draft', 'in_progress')
+               AND active
+               AND NOT COALESCE(needs_assignment, FALSE)
+             GROUP BY inspector_id, inspection_date
+        """, [default_hours, tuple(inspectors.user_id.ids), inspectors.company_id.id, date_from, date_to])
+        return {(user_id, day): hours for user_id, day, hours in self.env.cr.fetchall()}
+
+    @api.model
+    def _assign_inspections(self, inspections):
+        """
+        Assign ``inspections`` to the inspectors of their company.
+
+        Placed inspections get their inspector and (possibly later) date in
+        one write per (inspector, day); the others stay flagged for the next
+        run. Returns the number of inspections placed.
+        """
+        default_hours, horizon = self._assignment_settings()
+        today = fields.Date.context_today(self)
+        count = 0
+        for company in inspections.company_id:
+            batch = inspections.filtered(lambda i: i.company_id == company)
+            inspectors = self.search([('company_id', '=', company.id)])
+            if not inspectors:
+                continue
+            tasks = [
+                assignment.Task(
+                    inspection.id,
+                    inspection.inspection_date,
+                    inspection.inspection_duration or default_hours,
+                    inspection.equipment_type,
+                    self._site_key(inspection),
+                )
+                for inspection in batch
+            ]
+            first_day = min([today] + [task.day for task in tasks])
+            last_day = max(task.day for task in tasks) + timedelta(days=horizon)
+            booked = self._booked_hours(inspectors, first_day, last_day, default_hours)
+            placed, _unplaced = assignment.assign(
+                tasks,
+                [assignment.Inspector(i.user_id.id, i.daily_capacity, i._qualification_set()) for i in inspectors],
+                booked=booked,
+                horizon_days=horizon,
+                earliest=today,
+            )
+
+            groups = {}
+            for inspection_id, slot in placed.items():
+                groups.setdefault(slot, []).append(inspection_id)
+            for (user_id, day), ids in groups.items():
+                self.env['ecis.inspection'].browse(ids).with_context(ecis_bulk_tracking=len(ids) > 1).write({
+                    'inspector_id': user_id,
+                    'inspection_date': day,
+                    'needs_assignment': False,
+                })
+            count += len(placed)
+        return count
+
+    @api.model
+    def _cron_assign(self, batch_size=5000, auto_commit=False, time_budget=300):
+        """
+        Assign pending draft inspections in batches of ``batch_size``, in
+        creation (id) order; batches are keyed by id so inspections that
+        could not be placed are not read again in the same run
+        """
+        deadline = time.monotonic() + time_budget
+        Inspection = self.env['ecis.inspection']
+        last_id = 0
+        total = 0
+        while time.monotonic() < deadline:
+            # Inspections that could not be placed stay flagged; walk past them by id.
+            pending = Inspection.search([
+                ('needs_assignment', '=', True),
+                ('state', '=', 'draft'),
+                ('id', '>', last_id),
+            ], order='id', limit=batch_size)
+            if not pending:
+                break
+            total += self._assign_inspections(pending)
+            last_id = pending[-1].id
+            if auto_commit:
+                self.env.cr.commit()
+            if len(pending) < batch_size:
+                break
+        if total:
+            _logger.info("Assigned %d inspections to inspectors", total)
+        return total
@@ -0,0 +1,42 @@
+from odoo import models, fields, api
+
+from ..tools import replica
+
+
+class EcisMetrics(models.AbstractModel):
+    """
+    Point-in-time gauges exposed next to the API counters on /api/metrics
+    """
+    _name = 'ecis.metrics'
+    _description = 'ECIS Metrics Gauges'
+
+    @api.model
+    def _gauges(self):
+        """Return [(name, help, value)] computed at scrape time"""
+        cr = self.env.cr
+        today = fields.Date.context_today(self)
+        cr.execute("SELECT count(*) FROM mail_mail WHERE state = 'outgoing'")
+        pending_mail = cr.fetchone()[0]
+        # Completed reports wait for rendering and sending in action_send_to_client.
+        cr.execute("SELECT count(*) FROM ecis_inspection WHERE active AND state = 'completed'")
+        pending_reports = cr.fetchone()[0]
+        # Only the latest finished inspection of each equipment decides whether it is overdue.
+        cr.execute("""
+            SELECT count(*) FROM (
+                SELECT DISTINCT ON (equipment_id) next_inspection_due
+                  FROM ecis_inspection
+                 WHERE active AND state IN ('completed', 'sent') AND next_inspection_due IS NOT NULL
+                 ORDER BY equipment_id, inspection_date DESC, id DESC
+            ) latest
+             WHERE next_inspection_due < %s
+        """, [today])
+        overdue = cr.fetchone()[0]
+        gauges = [
+            ('ecis_mail_pending', 'Outgoing mails waiting in the mail queue.', pending_mail),
+            ('ecis_report_render_pending', 'Completed inspections whose report has not been sent yet.', pending_reports),
+            ('ecis_inspections_overdue', 'Equipment whose next inspection is past due.', overdue),
+        ]
+        lag = replica.last_lag(cr.dbname)
+        if lag is not None:
+            gauges.append(('ecis_replica_lag_seconds', 'Replication lag last measured on the read replica.', lag))
+        return gauges
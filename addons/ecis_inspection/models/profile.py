@@ -0,0 +1,121 @@
+import json
+
+from odoo import models, fields, api, _
+
+from ..tools.profiling import profile
+
+# Comma-separated ir.cron ids whose next run is profiled.
+PROFILE_CRON_PARAM = 'ecis_inspection.profile_cron_ids'
+
+
+class EcisProfile(models.Model):
+    """
+    Sampling profile of one API request, model method or cron run
+    """
+    _name = 'ecis.profile'
+    _description = 'ECIS Execution Profile'
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(
+        string='Target',
+        required=True,
+        readonly=True,
+        help="Profiled route, method or scheduled action"
+    )
+
+    trigger = fields.Selection([
+        ('header', 'Request Header'),
+        ('sample', 'Sampled'),
+        ('context', 'Context Flag'),
+        ('cron', 'Cron Run'),
+    ], string='Trigger', required=True, readonly=True)
+
+    duration = fields.Float(
+        string='Duration (ms)',
+        readonly=True,
+        digits=(16, 1)
+    )
+
+    sample_count = fields.Integer(
+        string='Stack Samples',
+        readonly=True
+    )
+
+    query_count = fields.Integer(
+        string='SQL Queries',
+        readonly=True
+    )
+
+    sql_duration = fields.Float(
+        string='SQL Time (ms)',
+        readonly=True,
+        digits=(16, 1)
+    )
+
+    attachment_ids = fields.One2many(
+        'ir.attachment',
+        'res_id',
+        string='Files',
+        domain=[('res_model', '=', 'ecis.profile')],
+        help="Collapsed stacks (flamegraph.pl / speedscope) and SQL log"
+    )
+
+    @api.model
+    def _create_from_samples(self, target, trigger, duration, collapsed, queries, sample_count):
+        record = self.create({
+            'name': target,
+            'trigger': trigger,
+            'duration': duration * 1000.0,
+            'sample_count': sample_count,
+            'query_count': len(queries),
+            'sql_duration': sum(q['time_ms'] for q in queries),
+        })
+        stem = target.replace('/', '_').strip('_') or 'profile'
+        self.env['ir.attachment'].create([{
+            'name': f'{stem}.collapsed.txt',
+            'raw': collapsed.encode('utf-8'),
+            'mimetype': 'text/plain',
+            'res_model': self._name,
+            'res_id': record.id,
+        }, {
+            'name': f'{stem}.sql.json',
+            'raw': json.dumps(queries, indent=1, default=str).encode('utf-8'),
+            'mimetype': 'application/json',
+            'res_model': self._name,
+            'res_id': record.id,
+        }])
+        return record
+
+
+class IrCron(models.Model):
+    _inherit = 'ir.cron'
+
+    def _ecis_armed_ids(self):
+        value = self.env['ir.config_parameter'].sudo().get_param(PROFILE_CRON_PARAM) or ''
+        return {int(v) for v in value.split(',') if v.strip().isdigit()}
+
+    def action_ecis_profile_next_run(self):
+        """Profile the next execution of these scheduled actions"""
+        armed = self._ecis_armed_ids() | set(self.ids)
+        self.env['ir.config_parameter'].sudo().set_param(
+            PROFILE_CRON_PARAM, ','.join(str(i) for i in sorted(armed)))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Profiling Armed'),
+                'message': _('The next run will be stored under ECIS Inspection > Configuration > Profiles.'),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _callback(self, cron_name, server_action_id, job_id):
+        armed = self._ecis_armed_ids()
+        if job_id not in armed:
+            return super()._callback(cron_name, server_action_id, job_id)
+        self.env['ir.config_parameter'].sudo().set_param(
+            PROFILE_CRON_PARAM, ','.join(str(i) for i in sorted(armed - {job_id})))
+        with profile(self.env, f'cron:{cron_name}', 'cron'):
+            return super()._callback(cron_name, server_action_id, job_id)
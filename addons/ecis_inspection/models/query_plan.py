@@ -0,0 +1,144 @@
+import json
+import logging
+
+from odoo import models, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Hot queries issued by the views, the API and the crons. Each one must be
+# answerable from an index; ``%(...)s`` placeholders are filled from
+# _hot_query_params().
+HOT_QUERIES = {
+    'inspection_list': """
+        SELECT id FROM ecis_inspection
+         WHERE active AND state != 'cancelled'
+         ORDER BY inspection_date DESC, id DESC LIMIT 80
+    """,
+    'inspection_by_state': """
+        SELECT id FROM ecis_inspection
+         WHERE state = 'in_progress'
+    """,
+    'inspection_by_date': """
+        SELECT id FROM ecis_inspection
+         WHERE inspection_date >= %(date_from)s
+    """,
+    'equipment_history': """
+        SELECT id FROM ecis_inspection
+         WHERE equipment_id = %(equipment_id)s
+         ORDER BY inspection_date DESC, id DESC
+    """,
+    'equipment_timeline': """
+        SELECT * FROM ecis_equipment_timeline
+         WHERE equipment_id = %(equipment_id)s
+         ORDER BY inspection_date DESC, id DESC LIMIT 50
+    """,
+    'checklist_rollup_refresh': """
+        SELECT id FROM ecis_inspection
+         WHERE inspection_date = ANY(%(days)s::date[])
+           AND active AND state != 'cancelled' AND state IN ('completed', 'sent')
+    """,
+    'client_inspections': """
+        SELECT id FROM ecis_inspection
+         WHERE client_id = %(client_id)s
+         ORDER BY inspection_date DESC, id DESC LIMIT 80
+    """,
+    'overdue_inspections': """
+        SELECT id FROM ecis_inspection
+         WHERE active AND state IN ('completed', 'sent')
+           AND next_inspection_due IS NOT NULL AND next_inspection_due < %(today)s
+    """,
+    'company_inspections': """
+        SELECT id FROM ecis_inspection
+         WHERE company_id = %(company_id)s
+    """,
+    'sync_feed': """
+        SELECT id FROM ecis_inspection
+         WHERE inspector_id = %(user_id)s AND (sync_txid, id) > (%(txid)s, 0)
+         ORDER BY sync_txid, id LIMIT 500
+    """,
+    'client_equipment': """
+        SELECT id FROM ecis_equipment
+         WHERE client_id = %(client_id)s
+         ORDER BY name
+    """,
+    'quote_list': """
+        SELECT id FROM ecis_quote_request
+         ORDER BY create_date DESC LIMIT 80
+    """,
+    'quote_pipeline': """
+        SELECT id FROM ecis_quote_request
+         WHERE state = 'new'
+         ORDER BY create_date DESC LIMIT 80
+    """,
+}
+
+# Only scans on these tables count as regressions.
+CHECKED_TABLES = ('ecis_inspection', 'ecis_equipment', 'ecis_quote_request', 'ecis_inspection_checklist')
+
+
+class EcisQueryPlan(models.AbstractModel):
+    """
+    EXPLAIN regression check for the ECIS hot query paths
+
+    Plans are taken with ``enable_seqscan`` off, so a sequential scan in the
+    output means no index can serve the query at all; the result does not
+    depend on how much data the database holds. Run it from ``odoo shell``
+    (``env['ecis.query.plan']._check_hot_query_plans()``) after seeding data
+    or changing indexes.
+    """
+    _name = 'ecis.query.plan'
+    _description = 'ECIS Query Plan Check'
+
+    @api.model
+    def _hot_query_params(self):
+        return {
+            'date_from': '2000-01-01',
+            'today': '2000-01-01',
+            'days': ['2000-01-01'],
+            'txid': 0,
+            'equipment_id': 0,
+            'client_id': 0,
+            'company_id': self.env.company.id,
+            'user_id': self.env.uid,
+        }
+
+    @api.model
+    def _seq_scans(self, node):
+        """Yield the relations read by sequential scans in a JSON plan node"""
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in CHECKED_TABLES:
+            yield node['Relation Name']
+        for child in node.get('Plans', []):
+            yield from self._seq_scans(child)
+
+    @api.model
+    def _explain_hot_queries(self, queries=None):
+        """Return {name: {'plan': dict, 'seq_scans': [tables]}} for each hot query"""
+        queries = queries or HOT_QUERIES
+        params = self._hot_query_params()
+        report = {}
+        cr = self.env.cr
+        cr.execute("SET LOCAL enable_seqscan = off")
+        try:
+            for name, query in queries.items():
+                cr.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+                plan = cr.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                root = plan[0]['Plan']
+                report[name] = {'plan': root, 'seq_scans': sorted(set(self._seq_scans(root)))}
+        finally:
+            cr.execute("SET LOCAL enable_seqscan TO DEFAULT")
+        return report
+
+    @api.model
+    def _check_hot_query_plans(self):
+        """Raise when any hot query regresses to a sequential scan"""
+        report = self._explain_hot_queries()
+        regressions = {name: r['seq_scans'] for name, r in report.items() if r['seq_scans']}
+        if regressions:
+            raise UserError(_('Sequential scans on hot queries: %s') % ', '.join(
+                f'{name} ({", ".join(tables)})' for name, tables in sorted(regressions.items())
+            ))
+        _logger.info("ECIS query plans: %d hot queries use indexes.", len(report))
+        return report
@@ -1,8 +1,40 @@
 # -*- coding: utf-8 -*-
+import logging
+import time
+from datetime import timedelta
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
+import hashlib
 import re
 
+from .equipment import EQUIPMENT_TYPES
+
+_logger = logging.getLogger(__name__)
+
+# Urgency levels a requester can pick; emergencies bypass the sales digest.
+URGENCY_LEVELS = [
+    ('normal', 'Normal'),
+    ('urgent', 'Urgent'),
+    ('emergency', 'Emergency')
+]
+
+# Notification modes for new requests: 'immediate' mails each request as it
+# arrives, 'digest' only emergencies and collects the rest for the digest job.
+NOTIFICATION_MODES = ('immediate', 'digest')
+
+# Defaults for the intake duplicate / flood checks (overridable through
+# ir.config_parameter, see _intake_settings).
+DUPLICATE_WINDOW_MINUTES = 1440
+IP_RATE_LIMIT = 20
+IP_RATE_WINDOW_MINUTES = 60
+
+# With ecis_inspection.quote_expansion = 'expand', requests for up to this
+# many pieces of equipment are expanded during intake; larger ones are left
+# to the expansion job, which creates EXPANSION_BATCH_SIZE per transaction.
+EXPANSION_INLINE_LIMIT = 20
+EXPANSION_BATCH_SIZE = 200
+
 class EcisQuoteRequest(models.Model):
     """
     Quote/Contact Request from Website
@@ -10,7 +42,7 @@ class EcisQuoteRequest(models.Model):
     """
     _name = 'ecis.quote.request'
     _description = 'Quote Request from Website'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['ecis.mail.thread.bulk', 'mail.activity.mixin']
     _order = 'create_date desc'
 
     # ========== BASIC INFORMATION ==========
@@ -51,15 +83,7 @@ class EcisQuoteRequest(models.Model):
     )
     
     # ========== REQUEST DETAILS ==========
-    equipment_type = fields.Selection([
-        ('crane', 'Crane'),
-        ('elevator', 'Elevator'),
-        ('pressure_vessel', 'Pressure Vessel'),
-        ('forklift', 'Forklift'),
-        ('overhead_crane', 'Overhead Crane'),
-        ('lifting_platform', 'Lifting Platform'),
-        ('other', 'Other')
-    ], string='Equipment Type', required=True, tracking=True)
+    equipment_type = fields.Selection(EQUIPMENT_TYPES, string='Equipment Type', required=True, tracking=True)
     equipment_count = fields.Integer(
         string='Number of Equipment',
         default=1,
@@ -71,11 +95,7 @@ class EcisQuoteRequest(models.Model):
         help="Additional details about the request"
     )
     
-    urgency = fields.Selection([
-        ('normal', 'Normal'),
-        ('urgent', 'Urgent'),
-        ('emergency', 'Emergency')
-    ], string='Urgency', default='normal')
+    urgency = fields.Selection(URGENCY_LEVELS, string='Urgency', default='normal')
     
     # ========== LOCATION ==========
     location = fields.Text(
@@ -136,26 +156,209 @@ class EcisQuoteRequest(models.Model):
         help="Browser user agent"
     )
     
-    # ========== COMPUTED FIELDS ==========
+    # ========== NOTIFICATIONS ==========
+    notification_pending = fields.Boolean(
+        string='Awaiting Digest',
+        copy=False,
+        readonly=True,
+        help="Not notified yet; will be listed in the assigned salesperson's next digest"
+    )
+    
+    # ========== EQUIPMENT EXPANSION ==========
+    equipment_ids = fields.One2many(
+        'ecis.equipment',
+        'quote_request_id',
+        string='Equipment',
+    )
+    
+    inspection_ids = fields.One2many(
+        'ecis.inspection',
+        'quote_request_id',
+        string='Inspections',
+    )
+    
+    expansion_pending = fields.Boolean(
+        string='Expansion Pending',
+        copy=False,
+        readonly=True,
+        help="The expansion job still has to create equipment placeholders for this request"
+    )
+    
+    # ========== DUPLICATE DETECTION ==========
+    submission_fingerprint = fields.Char(
+        string='Submission Fingerprint',
+        readonly=True,
+        copy=False,
+        help="Hash of the normalised contact details and message, used to spot repeated submissions"
+    )
+    
+    duplicate_count = fields.Integer(
+        string='Duplicate Submissions',
+        readonly=True,
+        copy=False,
+        help="Identical submissions merged into this request"
+    )
+    
+    last_duplicate_date = fields.Datetime(
+        string='Last Duplicate',
+        readonly=True,
+        copy=False,
+    )
+    
+    # ========== INDEXES ==========
+    def init(self):
+        """Index the default list order, the per-state pipelines and retention candidates"""
+        create_index(self.env.cr, 'ecis_quote_request_create_date_idx', self._table,
+                     ['create_date DESC'])
+        create_index(self.env.cr, 'ecis_quote_request_state_create_date_idx', self._table,
+                     ['state', 'create_date DESC'])
+        # Rows the IP / user-agent retention policy still has to anonymise.
+        create_index(self.env.cr, 'ecis_quote_request_client_trace_idx', self._table,
+                     ['create_date'], where='ip_address IS NOT NULL OR user_agent IS NOT NULL')
+        # Intake pre-checks: recent identical submissions and recent requests per IP.
+        create_index(self.env.cr, 'ecis_quote_request_fingerprint_idx', self._table,
+                     ['submission_fingerprint', 'create_date DESC'],
+                     where='submission_fingerprint IS NOT NULL')
+        create_index(self.env.cr, 'ecis_quote_request_ip_create_date_idx', self._table,
+                     ['ip_address', 'create_date DESC'], where='ip_address IS NOT NULL')
+        # Requests waiting for the sales digest.
+        create_index(self.env.cr, 'ecis_quote_request_notification_pending_idx', self._table,
+                     ['assigned_to', 'create_date'], where='notification_pending')
+        # Requests waiting for the expansion job.
+        create_index(self.env.cr, 'ecis_quote_request_expansion_pending_idx', self._table,
+                     ['id'], where='expansion_pending')
+    
+    # ========== INTAKE CHECKS ==========
     @api.model
-    def create(self, vals):
-        """Generate sequence number on creation"""
-        if vals.get('name', 'New') == 'New':
-            vals['name'] = self.env['ir.sequence'].next_by_code('ecis.quote.request') or 'New'
+    def _submission_fingerprint(self, data):
+        """Stable hash of a website submission, insensitive to case, spacing and phone formatting"""
+        def squash(value):
+            return ' '.join(str(value or '').lower().split())
         
-        # Auto-assign to user if configured
-        if not vals.get('assigned_to'):
-            default_user = self.env['ir.config_parameter'].sudo().get_param('ecis_inspection.default_sales_user')
-            if default_user:
+        message_hash = hashlib.sha256(squash(data.get('message')).encode()).hexdigest()
+        parts = [
+            squash(data.get('email')),
+            re.sub(r'\D', '', str(data.get('phone') or '')),
+            squash(data.get('company_name')),
+            squash(data.get('equipment_type')),
+            message_hash,
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+    
+    @api.model
+    def _intake_settings(self):
+        params = self.env['ir.config_parameter'].sudo()
+        
+        def number(key, default):
+            try:
+                return int(params.get_param(key, default))
+            except (TypeError, ValueError):
+                return default
+        
+        policy = params.get_param('ecis_inspection.duplicate_policy', 'merge')
+        return {
+            'policy': policy if policy in ('merge', 'reject', 'off') else 'merge',
+            'window': number('ecis_inspection.duplicate_window_minutes', DUPLICATE_WINDOW_MINUTES),
+            'ip_limit': number('ecis_inspection.intake_ip_limit', IP_RATE_LIMIT),
+            'ip_window': number('ecis_inspection.intake_ip_window_minutes', IP_RATE_WINDOW_MINUTES),
+        }
+    
+    @api.model
+    def _intake_check(self, fingerprint, ip_address=None):
+        """
+        Pre-check a website submission before anything is created.
+        
+        Returns (verdict, duplicate) where verdict is 'ok', 'rate_limited' or,
+        for a repeat of a recent request, the configured duplicate policy
+        ('merge' or 'reject'); duplicate is that earlier request.
+        Concurrent submissions with the same fingerprint are serialised with a
+        transaction-level advisory lock so both cannot pass the check.
+        """
+        settings = self._intake_settings()
+        now = fields.Datetime.now()
+        cr = self.env.cr
+        cr.execute("SELECT pg_advisory_xact_lock(%s)", [int(fingerprint[:15], 16)])
+        # Both lookups are index range scans and run as a single statement.
+        cr.execute("""
+            SELECT (SELECT id FROM ecis_quote_request
+                     WHERE submission_fingerprint = %s AND create_date >= %s
+                     ORDER BY create_date DESC LIMIT 1),
+                   (SELECT count(*) FROM (
+                        SELECT 1 FROM ecis_quote_request
+                         WHERE ip_address = %s AND create_date >= %s
+                         LIMIT %s) recent)
+        """, [
+            fingerprint, now - timedelta(minutes=settings['window']),
+            ip_address, now - timedelta(minutes=settings['ip_window']),
+            settings['ip_limit'] + 1,
+        ])
+        duplicate_id, ip_count = cr.fetchone()
+        if duplicate_id and settings['policy'] != 'off':
+            return settings['policy'], self.browse(duplicate_id)
+        if ip_address and settings['ip_limit'] and ip_count >= settings['ip_limit']:
+            return 'rate_limited', self.browse()
+        return 'ok', self.browse()
+    
+    def _register_duplicate(self):
+        """Count a merged duplicate without going through write() and its tracking"""
+        self.ensure_one()
+        self.env.cr.execute("""
+            UPDATE ecis_quote_request
+               SET duplicate_count = COALESCE(duplicate_count, 0) + 1,
+                   last_duplicate_date = %s
+             WHERE id = %s
+        """, [fields.Datetime.now(), self.id])
+        self.invalidate_recordset(['duplicate_count', 'last_duplicate_date'])
+    
+    # ========== COMPUTED FIELDS ==========
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Generate sequence numbers, assign and notify (now or in the digest)"""
+        params = self.env['ir.config_parameter'].sudo()
+        default_user = params.get_param('ecis_inspection.default_sales_user')
+        digest = self._notification_mode() == 'digest'
+        for vals in vals_list:
+            if vals.get('name', 'New') == 'New':
+                vals['name'] = self.env['ir.sequence'].next_by_code('ecis.quote.request') or 'New'
+            
+            # Auto-assign to user if configured
+            if not vals.get('assigned_to') and default_user:
                 vals['assigned_to'] = int(default_user)
+            
+            if digest and vals.get('urgency') != 'emergency':
+                vals['notification_pending'] = True
         
-        result = super(EcisQuoteRequest, self).create(vals)
+        records = super(EcisQuoteRequest, self).create(vals_list)
         
         # Send notification to sales team
-        result._send_new_request_notification()
+        records.filtered(lambda r: not r.notification_pending)._send_new_request_notification()
         
+        return records
+    
+    def write(self, vals):
+        """Queue webhook events for status changes"""
+        previous_states = {r.id: r.state for r in self} if 'state' in vals else None
+        result = super(EcisQuoteRequest, self).write(vals)
+        if previous_states:
+            self.env['ecis.webhook.delivery']._enqueue_state_changes(self, previous_states)
         return result
     
+    def _webhook_data(self):
+        """Event payload describing the request (no message or client trace)"""
+        self.ensure_one()
+        return {
+            'id': self.id,
+            'reference': self.name,
+            'state': self.state,
+            'contact_name': self.contact_name,
+            'email': self.email,
+            'company_name': self.company_name or None,
+            'equipment_type': self.equipment_type,
+            'equipment_count': self.equipment_count,
+            'urgency': self.urgency,
+            'partner_id': self.partner_id.id or None,
+        }
+    
     # ========== VALIDATION ==========
     @api.constrains('email')
     def _check_email(self):
@@ -225,13 +428,186 @@ class EcisQuoteRequest(models.Model):
         self.write({'state': 'lost'})
         self.message_post(body=_('Marked as lost by %s') % self.env.user.name)
     
+    # ========== EQUIPMENT EXPANSION ==========
+    @api.model
+    def _expansion_settings(self):
+        params = self.env['ir.config_parameter'].sudo()
+        try:
+            inline_limit = int(params.get_param('ecis_inspection.quote_expansion_inline_limit', EXPANSION_INLINE_LIMIT))
+        except (TypeError, ValueError):
+            inline_limit = EXPANSION_INLINE_LIMIT
+        return {
+            'enabled': params.get_param('ecis_inspection.quote_expansion', 'single') == 'expand',
+            'inline_limit': inline_limit,
+        }
+    
+    def _missing_equipment_count(self):
+        self.ensure_one()
+        existing = self.env['ecis.equipment'].with_context(active_test=False).search_count([
+            ('quote_request_id', '=', self.id),
+        ])
+        return max(self.equipment_count - existing, 0)
+    
+    def _expand_or_defer(self):
+        """
+        Give the request one piece of equipment per ``equipment_count``:
+        expand it now when few are missing, otherwise queue it for the
+        expansion job. Returns 'off', 'done' or 'pending'.
+        """
+        self.ensure_one()
+        settings = self._expansion_settings()
+        if not settings['enabled']:
+            return 'off'
+        missing = self._missing_equipment_count()
+        if missing <= settings['inline_limit']:
+            if missing:
+                self._expand_equipment()
+            return 'done'
+        self.write({'expansion_pending': True})
+        self.env.ref('ecis_inspection.ir_cron_ecis_quote_expansion')._trigger()
+        return 'pending'
+    
+    def _expansion_inspector_id(self):
+        params = self.env['ir.config_parameter'].sudo()
+        for key in ('ecis_inspection.default_inspector_user', 'ecis_inspection.default_sales_user'):
+            value = params.get_param(key)
+            if value:
+                return int(value)
+        admin = self.env.ref('base.user_admin', raise_if_not_found=False)
+        return self.assigned_to.id or (admin.id if admin else self.env.uid)
+    
+    def _expand_equipment(self, limit=None):
+        """
+        Create the equipment placeholders still missing for ``equipment_count``
+        (at most ``limit``), each with a draft inspection and its checklist,
+        in one create per model; return the new inspections
+        """
+        self.ensure_one()
+        Inspection = self.env['ecis.inspection']
+        missing = self._missing_equipment_count()
+        count = min(missing, limit) if limit else missing
+        if not count or not self.partner_id:
+            self.write({'expansion_pending': False})
+            return Inspection
+        company = self.company_id or self.env.company
+        label = dict(EQUIPMENT_TYPES).get(self.equipment_type, self.equipment_type)
+        first = self.equipment_count - missing + 1
+        details = (
+            f'Equipment count: {self.equipment_count}\n'
+            f'Contact: {self.contact_name}\n'
+            f'Phone: {self.phone}\n'
+            f'Email: {self.email}\n'
+            f'Message: {self.message or ""}'
+        )
+        equipment = self.env['ecis.equipment'].with_company(company).create([{
+            'name': f'{label} - {self.partner_id.name} #{number}',
+            'equipment_type': self.equipment_type,
+            'client_id': self.partner_id.id,
+            'company_id': company.id,
+            'location': self.location,
+            'notes': f'Quote request reference: {self.name}\n{details}',
+            'quote_request_id': self.id,
+        } for number in range(first, first + count)])
+        inspector_id = self._expansion_inspector_id()
+        today = fields.Date.today()
+        inspections = Inspection.with_company(company).create([{
+            'equipment_id': record.id,
+            'inspection_type': 'initial',
+            'inspection_date': today,
+            'inspector_notes': f'Created from quote request {self.name}.\n{details}',
+            'inspector_id': inspector_id,
+            'company_id': company.id,
+            'needs_assignment': True,
+            'quote_request_id': self.id,
+        } for record in equipment])
+        inspections._instantiate_checklist()
+        self.env['ecis.inspector']._assign_inspections(inspections)
+        self.write({'expansion_pending': missing > count})
+        return inspections
+    
+    @api.model
+    def _cron_expand(self, batch_size=EXPANSION_BATCH_SIZE, auto_commit=False, time_budget=300):
+        """
+        Expand the queued requests, one batch of equipment per transaction.
+        A request that fails is taken off the queue with a note in its
+        chatter, so it does not block the ones behind it.
+        """
+        deadline = time.monotonic() + time_budget
+        total = 0
+        while time.monotonic() < deadline:
+            self.env.cr.execute("""
+                SELECT id FROM ecis_quote_request
+                 WHERE expansion_pending
+                 ORDER BY id
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+            quote = self.browse(row[0])
+            try:
+                with self.env.cr.savepoint():
+                    total += len(quote._expand_equipment(limit=batch_size))
+            except Exception as exc:
+                _logger.exception("Equipment expansion of quote request %s failed", quote.name)
+                quote.write({'expansion_pending': False})
+                quote.message_post(body=_('Equipment expansion failed and was stopped: %s') % exc)
+            if not auto_commit:
+                break
+            self.env.cr.commit()
+        return total
+    
     # ========== NOTIFICATIONS ==========
+    @api.model
+    def _notification_mode(self):
+        mode = self.env['ir.config_parameter'].sudo().get_param('ecis_inspection.quote_notification_mode', 'digest')
+        return mode if mode in NOTIFICATION_MODES else 'digest'
+    
     def _send_new_request_notification(self):
-        """Send email notification to sales team"""
-        self.ensure_one()
-        
+        """Send one email per request to its salesperson"""
         # Get email template
         template = self.env.ref('ecis_inspection.email_template_new_quote_request', raise_if_not_found=False)
         
-        if template and self.assigned_to and self.assigned_to.email:
-            template.send_mail(self.id, force_send=False)
\ No newline at end of file
+        records = self.filtered(lambda r: r.assigned_to.email)
+        if template and records:
+            template.send_mail_batch(records.ids, force_send=False)
+    
+    @api.model
+    def _cron_send_digest(self, auto_commit=False):
+        """Mail each salesperson one digest of the requests assigned since the last run"""
+        cr = self.env.cr
+        cr.execute("""
+            SELECT assigned_to, array_agg(id ORDER BY create_date, id)
+              FROM ecis_quote_request
+             WHERE notification_pending
+             GROUP BY assigned_to
+        """)
+        groups = cr.fetchall()
+        template = self.env.ref('ecis_inspection.quote_request_digest', raise_if_not_found=False)
+        company = self.env.company
+        sent = 0
+        for user_id, ids in groups:
+            quotes = self.browse(ids)
+            user = self.env['res.users'].browse(user_id).exists() if user_id else None
+            if template and user and user.email:
+                body = self.env['ir.qweb']._render('ecis_inspection.quote_request_digest', {
+                    'user': user,
+                    'quotes': quotes,
+                    'urgent_count': len(quotes.filtered(lambda r: r.urgency == 'urgent')),
+                    'company': company,
+                })
+                self.env['mail.mail'].sudo().create({
+                    'subject': _('%s new quote requests') % len(quotes),
+                    'email_from': company.email or user.company_id.email or 'noreply@ecis-dz.com',
+                    'email_to': user.email_formatted,
+                    'body_html': body,
+                    'auto_delete': True,
+                })
+                sent += 1
+            # Requests without a reachable salesperson are dropped from the queue too.
+            cr.execute("UPDATE ecis_quote_request SET notification_pending = FALSE WHERE id IN %s", [tuple(ids)])
+            quotes.invalidate_recordset(['notification_pending'])
+            if auto_commit:
+                cr.commit()
+        return sent
\ No newline at end of file
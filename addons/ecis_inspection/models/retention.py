@@ -0,0 +1,199 @@
+import logging
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Stop starting new batches after this many seconds so a run never
+# outlasts the cron worker's time limit.
+RETENTION_TIME_BUDGET = 300
+
+# Replacement for required fields that cannot be emptied.
+ANONYMIZED_VALUES = {
+    'email': 'anonymized@example.invalid',
+}
+ANONYMIZED_DEFAULT = 'Anonymized'
+
+
+class EcisRetentionPolicy(models.Model):
+    """
+    Retention Policy - Anonymises or deletes old quote requests in small batches
+    """
+    _name = 'ecis.retention.policy'
+    _description = 'Quote Request Retention Policy'
+    _order = 'sequence, id'
+
+    name = fields.Char(
+        string='Policy',
+        required=True,
+    )
+
+    sequence = fields.Integer(
+        string='Sequence',
+        default=10,
+        help="Policies run in this order"
+    )
+
+    active = fields.Boolean(default=True)
+
+    action = fields.Selection([
+        ('anonymize', 'Anonymise Fields'),
+        ('delete', 'Delete Records'),
+    ], string='Action', required=True, default='anonymize')
+
+    field_ids = fields.Many2many(
+        'ir.model.fields',
+        string='Fields',
+        domain="[('model', '=', 'ecis.quote.request'), ('ttype', 'in', ('char', 'text')), ('store', '=', True)]",
+        help="Fields cleared by an anonymising policy (required fields get a placeholder)"
+    )
+
+    state_filter = fields.Char(
+        string='States',
+        help="Comma-separated quote request states the policy applies to (empty means all)"
+    )
+
+    age_field = fields.Selection([
+        ('create_date', 'Creation Date'),
+        ('write_date', 'Last Update'),
+    ], string='Age From', required=True, default='create_date')
+
+    age_days = fields.Integer(
+        string='After (days)',
+        required=True,
+        default=90,
+        help="Records older than this are processed"
+    )
+
+    batch_size = fields.Integer(
+        string='Batch Size',
+        required=True,
+        default=500,
+        help="Records processed (and committed) per transaction"
+    )
+
+    last_run = fields.Datetime(string='Last Run', readonly=True)
+
+    last_count = fields.Integer(
+        string='Last Run Count',
+        readonly=True,
+        help="Records processed by the last run"
+    )
+
+    # ========== CONSTRAINTS ==========
+
+    @api.constrains('action', 'field_ids')
+    def _check_fields(self):
+        for policy in self:
+            if policy.action == 'anonymize' and not policy.field_ids:
+                raise ValidationError(_('Policy "%s" must list the fields to anonymise.') % policy.name)
+
+    @api.constrains('age_days', 'batch_size')
+    def _check_limits(self):
+        for policy in self:
+            if policy.age_days < 1 or policy.batch_size < 1:
+                raise ValidationError(_('Age and batch size must be positive.'))
+
+    # ========== BATCHES ==========
+
+    def _states(self):
+        self.ensure_one()
+        return [s.strip() for s in (self.state_filter or '').split(',') if s.strip()]
+
+    def _candidate_query(self):
+        """SELECT of the next batch, skipping rows locked by users or other workers"""
+        self.ensure_one()
+        cutoff = fields.Datetime.now() - timedelta(days=self.age_days)
+        conditions = [SQL('%s < %s', SQL.identifier(self.age_field), cutoff)]
+        states = self._states()
+        if states:
+            conditions.append(SQL('state IN %s', tuple(states)))
+        if self.action == 'anonymize':
+            # Only rows that still hold data, so finished rows are not revisited.
+            conditions.append(SQL('(%s)', SQL(' OR ').join(
+                SQL('%s IS NOT NULL', SQL.identifier(field.name))
+                if self._placeholder(field) is None else
+                SQL('%s IS DISTINCT FROM %s', SQL.identifier(field.name), self._placeholder(field))
+                for field in self.field_ids
+            )))
+        return SQL("""
+            SELECT id FROM ecis_quote_request
+             WHERE %s
+             ORDER BY %s
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, SQL(' AND ').join(conditions), SQL.identifier(self.age_field), self.batch_size)
+
+    def _placeholder(self, field):
+        if not field.required:
+            return None
+        return ANONYMIZED_VALUES.get(field.name, ANONYMIZED_DEFAULT)
+
+    def _run_batch(self):
+        """Process one batch and return the number of records touched"""
+        self.ensure_one()
+        cr = self.env.cr
+        cr.execute(self._candidate_query())
+        ids = [row[0] for row in cr.fetchall()]
+        if not ids:
+            return 0
+        quotes = self.env['ecis.quote.request'].sudo().with_context(active_test=False).browse(ids)
+        if self.action == 'delete':
+            quotes.unlink()
+            return len(ids)
+
+        cr.execute(SQL(
+            "UPDATE ecis_quote_request SET %s WHERE id IN %s",
+            SQL(', ').join(
+                SQL('%s = %s', SQL.identifier(field.name), self._placeholder(field))
+                for field in self.field_ids
+            ),
+            tuple(ids),
+        ))
+        # Old values also live in the chatter's tracking history.
+        cr.execute("""
+            UPDATE mail_tracking_value v
+               SET old_value_char = NULL, new_value_char = NULL
+              FROM mail_message m
+             WHERE m.id = v.mail_message_id
+               AND m.model = 'ecis.quote.request'
+               AND m.res_id IN %s
+               AND v.field_id IN %s
+        """, [tuple(ids), tuple(self.field_ids.ids)])
+        quotes.invalidate_recordset(self.field_ids.mapped('name'))
+        self.env['mail.tracking.value'].invalidate_model(['old_value_char', 'new_value_char'])
+        return len(ids)
+
+    def _run(self, auto_commit=False, deadline=None):
+        """Run each policy batch by batch until nothing is left or time is up"""
+        for policy in self:
+            count = 0
+            while deadline is None or time.monotonic() < deadline:
+                done = policy._run_batch()
+                count += done
+                if auto_commit:
+                    # Short transactions: locks are released and autovacuum
+                    # can reclaim the dead rows between batches.
+                    self.env.cr.commit()
+                if done < policy.batch_size or not auto_commit:
+                    break
+            policy.write({'last_run': fields.Datetime.now(), 'last_count': count})
+            if auto_commit:
+                self.env.cr.commit()
+            if count:
+                _logger.info("Retention policy %s processed %d quote requests", policy.name, count)
+
+    @api.model
+    def _cron_run(self, auto_commit=False):
+        """Apply every active retention policy"""
+        deadline = time.monotonic() + RETENTION_TIME_BUDGET
+        self.search([])._run(auto_commit=auto_commit, deadline=deadline)
+
+    def action_run_now(self):
+        """Run one batch of the selected policies"""
+        self._run()
+        return True
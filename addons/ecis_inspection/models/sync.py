@@ -0,0 +1,438 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError, UserError
+from odoo.tools.sql import create_index
+
+# Tombstones older than this are purged; tokens older than this force a resync.
+TOMBSTONE_RETENTION_DAYS = 90
+
+# Most changes one push applies, one savepoint each; the same as a pull page.
+SYNC_PUSH_BATCH_SIZE = 500
+
+SYNC_STREAMS = {
+    'inspections': 'ecis.inspection',
+    'checklist': 'ecis.inspection.checklist',
+    'equipment': 'ecis.equipment',
+    'templates': 'ecis.checklist.template',
+}
+
+# Tables whose rows carry ``sync_txid``, the id of the transaction that last
+# wrote them, stamped by the ecis_sync_stamp trigger; the cursors walk it.
+SYNC_STAMPED_TABLES = {
+    'ecis_inspection': ['inspector_id', 'sync_txid', 'id'],
+    'ecis_inspection_checklist': ['sync_txid', 'id'],
+    'ecis_equipment': ['sync_txid', 'id'],
+    'ecis_checklist_template': ['sync_txid', 'id'],
+    'ecis_sync_tombstone': ['sync_txid', 'id'],
+}
+
+SYNC_WRITABLE_FIELDS = {
+    'inspections': {
+        'inspection_duration',
+        'weather_conditions',
+        'overall_result',
+        'defects_found',
+        'immediate_actions_required',
+        'recommendations',
+        'inspector_notes',
+        'client_representative',
+        'inspector_signature',
+        'client_signature',
+        'next_inspection_due',
+        'next_inspection_frequency',
+    },
+    'checklist': {'status', 'notes', 'photo', 'photo_filename'},
+}
+
+# Column holding the company of a stream's rows in _STREAM_QUERIES; streams
+# without one (templates) are shared by every company.
+SYNC_COMPANY_COLUMNS = {
+    'inspections': 'x.company_id',
+    'checklist': 'i.company_id',
+    'equipment': 'x.company_id',
+}
+
+
+class EcisSyncTombstone(models.Model):
+    """
+    Deletion markers served to offline clients by the delta-sync feed
+    """
+    _name = 'ecis.sync.tombstone'
+    _description = 'Offline Sync Deletion Marker'
+    _order = 'deleted_at, id'
+
+    res_model = fields.Char(
+        string='Model',
+        required=True,
+        index=True,
+        help="Technical name of the deleted record's model"
+    )
+
+    res_id = fields.Integer(
+        string='Record ID',
+        required=True,
+        help="ID of the deleted record"
+    )
+
+    inspector_id = fields.Many2one(
+        'res.users',
+        string='Inspector',
+        index=True,
+        ondelete='cascade',
+        help="Inspector whose tablet must drop the record (empty means everyone)"
+    )
+
+    deleted_at = fields.Datetime(
+        string='Deleted At',
+        required=True,
+        index=True,
+        default=fields.Datetime.now,
+    )
+
+    @api.model
+    def _record_deletions(self, res_model, pairs):
+        """Create tombstones from (res_id, inspector_id) pairs"""
+        vals_list = [{
+            'res_model': res_model,
+            'res_id': res_id,
+            'inspector_id': inspector_id or False,
+        } for res_id, inspector_id in pairs]
+        if vals_list:
+            self.sudo().create(vals_list)
+
+    @api.model
+    def _cron_purge(self):
+        """Drop tombstones older than the retention window"""
+        limit = fields.Datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        self.sudo().search([('deleted_at', '<', limit)]).unlink()
+
+
+class EcisSync(models.AbstractModel):
+    """
+    Delta-sync engine for offline inspector tablets
+
+    A sync token is an opaque base64 JSON map of stream -> [txid, id] plus
+    the time it was issued (``at``); each pull returns the records changed
+    after that cursor, ordered by (sync_txid, id), plus the tombstones
+    recorded since the last pull. Only rows written by transactions older
+    than every transaction still running are served, so a transaction that
+    commits long after it started is never skipped by a cursor.
+    """
+    _name = 'ecis.sync'
+    _description = 'Offline Inspector Sync'
+
+    def init(self):
+        """Stamp synced rows with their writing transaction and index the cursors"""
+        cr = self.env.cr
+        cr.execute("""
+            CREATE OR REPLACE FUNCTION ecis_sync_stamp() RETURNS trigger AS $$
+            BEGIN
+                NEW.sync_txid := txid_current();
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        for table, columns in SYNC_STAMPED_TABLES.items():
+            # Raw writes that leave write_date alone (timeline stamps) are not
+            # sync changes and keep the row where it is in the feed.
+            cr.execute(f"""
+                ALTER TABLE {table} ADD COLUMN IF NOT EXISTS sync_txid bigint NOT NULL DEFAULT 0;
+                DROP TRIGGER IF EXISTS ecis_sync_stamp_insert ON {table};
+                CREATE TRIGGER ecis_sync_stamp_insert BEFORE INSERT ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION ecis_sync_stamp();
+                DROP TRIGGER IF EXISTS ecis_sync_stamp_update ON {table};
+                CREATE TRIGGER ecis_sync_stamp_update BEFORE UPDATE ON {table}
+                    FOR EACH ROW WHEN (NEW.write_date IS DISTINCT FROM OLD.write_date)
+                    EXECUTE FUNCTION ecis_sync_stamp();
+            """)
+            create_index(cr, f'{table}_sync_txid_idx', table, columns)
+        # Superseded by ecis_inspection_sync_txid_idx.
+        cr.execute("DROP INDEX IF EXISTS ecis_inspection_sync_idx")
+
+    # ========== TOKENS ==========
+
+    @api.model
+    def _decode_token(self, token):
+        if not token:
+            return {}
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except Exception:
+            raise ValidationError(_('Invalid sync token.'))
+        if not isinstance(state, dict):
+            raise ValidationError(_('Invalid sync token.'))
+        # Tokens issued before the transaction cursors carry [write_date, id]
+        # and no ``at``; they are still accepted and answered with a resync.
+        legacy = 'at' not in state
+        if not legacy and not self._valid_stamp(state['at']):
+            raise ValidationError(_('Invalid sync token.'))
+        if not legacy and 'tombstones' not in state:
+            raise ValidationError(_('Invalid sync token.'))
+        # Anything else would reach the stream queries as a malformed parameter.
+        for key in (*SYNC_STREAMS, 'tombstones'):
+            if key in state and not self._valid_cursor(state[key], legacy):
+                raise ValidationError(_('Invalid sync token.'))
+        return state
+
+    @api.model
+    def _valid_cursor(self, cursor, legacy=False):
+        if not isinstance(cursor, list) or len(cursor) != 2:
+            return False
+        position, last_id = cursor
+        if not isinstance(last_id, int) or isinstance(last_id, bool):
+            return False
+        if legacy:
+            return self._valid_stamp(position)
+        return isinstance(position, int) and not isinstance(position, bool) and position >= 0
+
+    @api.model
+    def _valid_stamp(self, stamp):
+        if not isinstance(stamp, str):
+            return False
+        try:
+            datetime.fromisoformat(stamp)
+        except ValueError:
+            return False
+        return True
+
+    @api.model
+    def _encode_token(self, state):
+        raw = json.dumps(state, separators=(',', ':')).encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    # ========== PULL ==========
+
+    _STREAM_QUERIES = {
+        'inspections': """
+            SELECT x.id, x.sync_txid, x.active, x.write_date FROM ecis_inspection x
+             WHERE x.inspector_id = %(inspector)s
+        """,
+        'checklist': """
+            SELECT x.id, x.sync_txid, TRUE, x.write_date FROM ecis_inspection_checklist x
+              JOIN ecis_inspection i ON i.id = x.inspection_id
+             WHERE i.inspector_id = %(inspector)s
+        """,
+        'equipment': """
+            SELECT x.id, x.sync_txid, x.active, x.write_date FROM ecis_equipment x
+             WHERE EXISTS (SELECT 1 FROM ecis_inspection i
+                            WHERE i.equipment_id = x.id AND i.inspector_id = %(inspector)s)
+        """,
+        'templates': """
+            SELECT x.id, x.sync_txid, x.active, x.write_date FROM ecis_checklist_template x
+             WHERE TRUE
+        """,
+    }
+
+    @api.model
+    def _fetch_stream(self, stream, inspector, cursor, upper, limit, company_id=None):
+        """Return [(id, sync_txid, active, write_date)] changed after ``cursor``, oldest first"""
+        query = self._STREAM_QUERIES[stream]
+        if company_id and stream in SYNC_COMPANY_COLUMNS:
+            query += f" AND {SYNC_COMPANY_COLUMNS[stream]} = %(company)s"
+        query += """
+               AND x.sync_txid < %(upper)s
+               AND (x.sync_txid, x.id) > (%(txid)s, %(last_id)s)
+             ORDER BY x.sync_txid, x.id
+             LIMIT %(limit)s
+        """
+        txid, last_id = cursor or (0, 0)
+        self.env.cr.execute(query, {
+            'inspector': inspector.id,
+            'upper': upper,
+            'txid': txid,
+            'last_id': last_id,
+            'limit': limit,
+            'company': company_id,
+        })
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _write_stamps(self, records):
+        """Full-precision write_date of ``records`` as strings, keyed by id"""
+        if not records:
+            return {}
+        self.env.cr.execute(
+            f'SELECT id, write_date FROM "{records._table}" WHERE id IN %s',
+            [tuple(records.ids)],
+        )
+        return {rec_id: str(stamp) for rec_id, stamp in self.env.cr.fetchall()}
+
+    @api.model
+    def _sync_pull(self, inspector, token=None, limit=500, company_id=None):
+        """
+        Return everything that changed for ``inspector`` since ``token``,
+        limited to the records of ``company_id`` when given.
+
+        Result keys: ``changes`` (stream -> recordset to upsert), ``stamps``
+        (stream -> {id: write_date}), ``deleted`` (stream -> list of ids),
+        ``token``, ``has_more`` and ``full_resync``.
+        """
+        state = self._decode_token(token)
+        now = fields.Datetime.now()
+        retention = fields.Datetime.to_string(now - timedelta(days=TOMBSTONE_RETENTION_DAYS))
+        # Every transaction below the snapshot xmin has committed or aborted;
+        # rows of the ones still running are served once they are done.
+        self.env.cr.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        upper = self.env.cr.fetchone()[0]
+
+        full_resync = False
+        tombstone_cursor = state.get('tombstones')
+        if state and (not state.get('at') or state['at'] < retention):
+            # A token from before the transaction cursors, or the client
+            # missed tombstones that have since been purged.
+            state, full_resync = {}, True
+
+        changes, stamps, deleted = {}, {}, {}
+        has_more = False
+        new_state = {}
+        for stream, model_name in SYNC_STREAMS.items():
+            rows = self._fetch_stream(stream, inspector, state.get(stream), upper, limit + 1, company_id)
+            if len(rows) > limit:
+                rows = rows[:limit]
+                has_more = True
+            if rows:
+                new_state[stream] = [rows[-1][1], rows[-1][0]]
+            elif state.get(stream):
+                new_state[stream] = state[stream]
+            changes[stream] = self.env[model_name].browse([r[0] for r in rows if r[2]])
+            stamps[stream] = {r[0]: str(r[3]) for r in rows if r[2]}
+            # Archived records are gone as far as the tablet is concerned.
+            deleted[stream] = [r[0] for r in rows if not r[2]]
+
+        # An inspection newly assigned to this inspector may point at equipment
+        # that has not changed in a long time; ship it along with the inspection.
+        extra = changes['inspections'].equipment_id.filtered(
+            lambda e: e.active and (not company_id or e.company_id.id == company_id)) - changes['equipment']
+        changes['equipment'] |= extra
+        stamps['equipment'].update(self._write_stamps(extra))
+        # Likewise its checklist lines, which did not change with the reassignment.
+        extra = changes['inspections'].checklist_ids - changes['checklist']
+        changes['checklist'] |= extra
+        stamps['checklist'].update(self._write_stamps(extra))
+
+        if state:
+            txid, last_id = tombstone_cursor
+            self.env.cr.execute("""
+                SELECT id, res_model, res_id, sync_txid FROM ecis_sync_tombstone
+                 WHERE (inspector_id IS NULL OR inspector_id = %s)
+                   AND sync_txid < %s
+                   AND (sync_txid, id) > (%s, %s)
+                 ORDER BY sync_txid, id
+                 LIMIT %s
+            """, [inspector.id, upper, txid, last_id, limit + 1])
+            rows = self.env.cr.fetchall()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                has_more = True
+            by_model = {model_name: stream for stream, model_name in SYNC_STREAMS.items()}
+            for _id, res_model, res_id, _txid in rows:
+                stream = by_model.get(res_model)
+                if stream:
+                    deleted[stream].append(res_id)
+            new_state['tombstones'] = [rows[-1][3], rows[-1][0]] if rows else tombstone_cursor
+        else:
+            # First sync: the client has nothing to delete yet.
+            new_state['tombstones'] = [upper, 0]
+        # While pages remain, keep the issue time of the pull that started them
+        # so a long catch-up cannot outlive the tombstone retention unnoticed.
+        new_state['at'] = state['at'] if has_more and state.get('at') else fields.Datetime.to_string(now)
+
+        return {
+            'changes': changes,
+            'stamps': stamps,
+            'deleted': deleted,
+            'token': self._encode_token(new_state),
+            'has_more': has_more,
+            'full_resync': full_resync,
+        }
+
+    # ========== PUSH ==========
+
+    @api.model
+    def _is_stale(self, record, base_write_date):
+        if not base_write_date:
+            return True
+        try:
+            base = datetime.fromisoformat(str(base_write_date))
+        except ValueError:
+            raise ValidationError(_('Invalid write_date: %s') % base_write_date)
+        current = datetime.fromisoformat(self._write_stamps(record)[record.id])
+        return current > base
+
+    @api.model
+    def _sync_push(self, inspector, changes, company_id=None):
+        """
+        Apply a batch of offline edits.
+
+        Each change is ``{'stream', 'id', 'write_date', 'values'}`` where
+        ``write_date`` is the server value the tablet last saw; a newer value
+        on the server is reported as a conflict instead of being overwritten.
+        Checklist lines without an ``id`` are created on ``inspection_id``;
+        an inspection change may also carry ``state`` (``in_progress`` or
+        ``completed``) to run the matching workflow action after the write.
+        Records outside ``company_id``, when given, are reported as not
+        found. Returns one outcome dict per change, in order.
+        """
+        outcomes = []
+        for index, change in enumerate(changes):
+            if not isinstance(change, dict):
+                outcomes.append({'index': index, 'status': 'error', 'error': _('Change must be an object.')})
+                continue
+            outcome = {'index': index, 'stream': change.get('stream'), 'id': change.get('id')}
+            try:
+                with self.env.cr.savepoint():
+                    outcome.update(self._apply_change(inspector, change, company_id))
+            except (ValidationError, UserError, ValueError, TypeError) as exc:
+                outcome.update({'status': 'error', 'error': str(exc)})
+            outcomes.append(outcome)
+        return outcomes
+
+    @api.model
+    def _apply_change(self, inspector, change, company_id=None):
+        stream = change.get('stream')
+        if stream not in SYNC_WRITABLE_FIELDS:
+            raise ValidationError(_('Stream %s is read-only.') % stream)
+        values = change.get('values') or {}
+        unknown = set(values) - SYNC_WRITABLE_FIELDS[stream]
+        if unknown:
+            raise ValidationError(_('Fields not writable offline: %s') % ', '.join(sorted(unknown)))
+
+        model = self.env[SYNC_STREAMS[stream]]
+        if stream == 'checklist' and not change.get('id'):
+            inspection = self.env['ecis.inspection'].browse(int(change.get('inspection_id') or 0)).exists()
+            if not inspection or (company_id and inspection.company_id.id != company_id):
+                return {'status': 'not_found'}
+            if inspection.inspector_id != inspector:
+                return {'status': 'forbidden'}
+            # Lines added from a template on the tablet keep the link for the rollup.
+            template = self.env['ecis.checklist.template'].browse(int(change.get('template_id') or 0)).exists()
+            line = model.create(dict(
+                values,
+                inspection_id=inspection.id,
+                template_id=template.id or False,
+                name=change.get('name') or template.name or _('Check Item'),
+            ))
+            return {'status': 'created', 'id': line.id, 'record': line}
+
+        record = model.browse(int(change.get('id') or 0)).exists()
+        inspection = record if stream == 'inspections' else record.inspection_id
+        if not record or (company_id and inspection.company_id.id != company_id):
+            return {'status': 'not_found'}
+        if inspection.inspector_id != inspector:
+            return {'status': 'forbidden'}
+        if self._is_stale(record, change.get('write_date')):
+            return {'status': 'conflict', 'record': record}
+
+        if values:
+            record.write(values)
+        if stream == 'inspections':
+            target_state = change.get('state')
+            if target_state == 'in_progress' and record.state == 'draft':
+                record.action_start_inspection()
+            elif target_state == 'completed' and record.state == 'in_progress':
+                record.action_complete_inspection()
+        return {'status': 'applied', 'record': record}
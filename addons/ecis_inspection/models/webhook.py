@@ -0,0 +1,512 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import random
+import secrets
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import create_connection
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+WEBHOOK_EVENTS = [
+    ('inspection.state_changed', 'Inspection Status Changed'),
+    ('inspection.completed', 'Inspection Completed'),
+    ('inspection.sent', 'Inspection Sent to Client'),
+    ('quote.state_changed', 'Quote Request Status Changed'),
+]
+
+# Model -> event prefix for state changes.
+EVENT_PREFIXES = {
+    'ecis.inspection': 'inspection',
+    'ecis.quote.request': 'quote',
+}
+
+# A delivery is dead-lettered after this many failed attempts; the delay
+# before attempt n is RETRY_BASE_DELAY * 2 ** (n - 1), capped, with jitter.
+MAX_ATTEMPTS = 10
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 6 * 3600
+
+# Parallel requests per dispatcher run, sharing one keep-alive pool.
+DISPATCH_THREADS = 8
+
+# Delivered events are kept this long for auditing.
+DELIVERED_RETENTION_DAYS = 30
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _public_addresses(host, port):
+    """
+    Return (error, addresses): every address ``host`` resolves to, or why
+    it may not receive webhooks when any of them is not a public one.
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        return 'host cannot be resolved', []
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%', 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            return 'host resolves to a private or reserved address', []
+    return None, addresses
+
+
+class _PinnedHTTPSConnection(HTTPSConnection):
+    """
+    HTTPS connection that resolves its host once, when it connects, and
+    dials the addresses it checked; SNI, the certificate check and the Host
+    header keep the host name. A DNS answer that changes between the check
+    and the connect (DNS rebinding) therefore cannot reach a private address.
+    """
+
+    def _new_conn(self):
+        error, addresses = _public_addresses(self.host, self.port)
+        if error:
+            raise NewConnectionError(self, f'Refused webhook destination {self.host}: {error}')
+        for address in addresses:
+            try:
+                return create_connection(
+                    (address, self.port), self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+            except socket.timeout:
+                failure = ConnectTimeoutError(self, f'Connection to {self.host} timed out')
+            except OSError as exc:
+                failure = NewConnectionError(self, f'Failed to establish a new connection: {exc}')
+        raise failure
+
+
+class _PinnedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PinnedHTTPSConnection
+
+
+class _PinnedAdapter(HTTPAdapter):
+    """Transport adapter whose https pools only open pinned connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(_PinnedAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'https': _PinnedHTTPSConnectionPool}
+
+
+def _http_session():
+    """Process-wide HTTP session, so dispatcher runs reuse open connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # A proxy would resolve the host itself, out of reach of the pinning.
+            session.trust_env = False
+            adapter = _PinnedAdapter(pool_connections=32, pool_maxsize=DISPATCH_THREADS, max_retries=0)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def _destination_error(url):
+    """
+    Return why ``url`` may not receive webhooks, or None. Only https URLs
+    whose host resolves exclusively to public addresses are accepted, so
+    subscriptions cannot reach the server's own network; deliveries repeat
+    the check on the connection they send over.
+    """
+    try:
+        parts = urlsplit(url or '')
+        port = parts.port or 443
+    except ValueError:
+        return 'invalid URL'
+    if parts.scheme.lower() != 'https' or not parts.hostname:
+        return 'URL must start with https://'
+    return _public_addresses(parts.hostname, port)[0]
+
+
+def _post(url, body, headers, timeout):
+    """
+    Send one delivery; return (status code or None, error or None). Errors
+    are a short reason only: the receiver's response body is never kept.
+    """
+    error = _destination_error(url)
+    if error:
+        return None, error
+    try:
+        response = _http_session().post(url, data=body, headers=headers, timeout=timeout, allow_redirects=False)
+    except requests.RequestException as exc:
+        return None, type(exc).__name__
+    if 200 <= response.status_code < 300:
+        return response.status_code, None
+    return response.status_code, f'HTTP {response.status_code} {response.reason or ""}'.strip()[:100]
+
+
+class EcisWebhookSubscription(models.Model):
+    """
+    Webhook Subscription - An endpoint notified of inspection and quote events
+    """
+    _name = 'ecis.webhook.subscription'
+    _description = 'Webhook Subscription'
+    _order = 'name, id'
+
+    name = fields.Char(
+        string='Name',
+        required=True,
+    )
+
+    url = fields.Char(
+        string='Endpoint URL',
+        required=True,
+        help="Public HTTPS endpoint receiving the events as JSON POST requests"
+    )
+
+    events = fields.Char(
+        string='Events',
+        required=True,
+        default='inspection.completed,inspection.sent',
+        help="Comma-separated event types: %s" % ', '.join(code for code, _label in WEBHOOK_EVENTS)
+    )
+
+    secret = fields.Char(
+        string='Signing Secret',
+        required=True,
+        copy=False,
+        groups='base.group_system',
+        default=lambda self: secrets.token_hex(32),
+        help="Key of the HMAC-SHA256 signature sent in the X-ECIS-Signature header"
+    )
+
+    timeout = fields.Float(
+        string='Timeout (s)',
+        default=10.0,
+    )
+
+    active = fields.Boolean(default=True)
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        default=lambda self: self.env.company,
+    )
+
+    delivery_ids = fields.One2many(
+        'ecis.webhook.delivery',
+        'subscription_id',
+        string='Deliveries',
+    )
+
+    last_success_date = fields.Datetime(string='Last Delivered', readonly=True)
+
+    consecutive_failures = fields.Integer(
+        string='Consecutive Failures',
+        readonly=True,
+        help="Failed attempts since the last successful delivery"
+    )
+
+    dead_count = fields.Integer(
+        string='Dead Letters',
+        compute='_compute_dead_count',
+    )
+
+    def _compute_dead_count(self):
+        counts = dict(self.env['ecis.webhook.delivery']._read_group(
+            [('subscription_id', 'in', self.ids), ('state', '=', 'dead')],
+            ['subscription_id'], ['__count'],
+        ))
+        for subscription in self:
+            subscription.dead_count = counts.get(subscription, 0)
+
+    # ========== CONSTRAINTS ==========
+
+    @api.constrains('url')
+    def _check_url(self):
+        for subscription in self:
+            error = _destination_error(subscription.url)
+            if error:
+                raise ValidationError(_('Webhook URL rejected: %s') % error)
+
+    @api.constrains('events')
+    def _check_events(self):
+        known = {code for code, _label in WEBHOOK_EVENTS}
+        for subscription in self:
+            events = subscription._event_set()
+            if not events:
+                raise ValidationError(_('Subscribe to at least one event.'))
+            if events - known:
+                raise ValidationError(_('Unknown webhook events: %s') % ', '.join(sorted(events - known)))
+
+    def _event_set(self):
+        self.ensure_one()
+        return {e.strip() for e in (self.events or '').split(',') if e.strip()}
+
+    # ========== CACHE ==========
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super(EcisWebhookSubscription, self).create(vals_list)
+
+    def write(self, vals):
+        if {'events', 'active', 'company_id'} & set(vals):
+            self.env.registry.clear_cache()
+        return super(EcisWebhookSubscription, self).write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super(EcisWebhookSubscription, self).unlink()
+
+    @api.model
+    @tools.ormcache()
+    def _routing_table(self):
+        """{(company_id, event): (subscription ids)} for the active subscriptions"""
+        table = {}
+        for subscription in self.sudo().search([]):
+            for event in subscription._event_set():
+                table.setdefault((subscription.company_id.id, event), []).append(subscription.id)
+        return {key: tuple(ids) for key, ids in table.items()}
+
+    # ========== SIGNING ==========
+
+    def _signature_headers(self, body, delivery):
+        """HMAC-SHA256 of '<timestamp>.<body>', so receivers can also reject replays"""
+        self.ensure_one()
+        timestamp = str(int(time.time()))
+        digest = hmac.new(
+            self.sudo().secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256,
+        ).hexdigest()
+        return {
+            'Content-Type': 'application/json',
+            'User-Agent': 'ECIS-Webhooks/1.0',
+            'X-ECIS-Event': delivery.event,
+            'X-ECIS-Delivery': delivery.uid,
+            'X-ECIS-Signature': f't={timestamp},v1={digest}',
+        }
+
+    def action_requeue_dead(self):
+        """Retry every dead-lettered delivery of these subscriptions"""
+        self.env['ecis.webhook.delivery'].search([
+            ('subscription_id', 'in', self.ids), ('state', '=', 'dead'),
+        ]).action_requeue()
+        return True
+
+
+class EcisWebhookDelivery(models.Model):
+    """
+    Webhook Delivery - Outbox row for one event and one subscription
+
+    Rows are written in the transaction that changes the record, so an
+    event exists if and only if the change was committed; the dispatcher
+    sends them afterwards.
+    """
+    _name = 'ecis.webhook.delivery'
+    _description = 'Webhook Delivery'
+    _order = 'id desc'
+
+    uid = fields.Char(
+        string='Delivery ID',
+        required=True,
+        readonly=True,
+        copy=False,
+        default=lambda self: str(uuid.uuid4()),
+        help="Sent as X-ECIS-Delivery so receivers can ignore redeliveries"
+    )
+
+    subscription_id = fields.Many2one(
+        'ecis.webhook.subscription',
+        string='Subscription',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+
+    event = fields.Selection(WEBHOOK_EVENTS, string='Event', required=True, readonly=True)
+
+    res_model = fields.Char(string='Model', readonly=True)
+
+    res_id = fields.Integer(string='Record ID', readonly=True)
+
+    payload = fields.Json(string='Payload', readonly=True)
+
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Delivered'),
+        ('dead', 'Dead Letter'),
+    ], string='Status', required=True, default='pending', readonly=True)
+
+    attempts = fields.Integer(string='Attempts', readonly=True)
+
+    next_attempt = fields.Datetime(
+        string='Next Attempt',
+        readonly=True,
+        default=fields.Datetime.now,
+    )
+
+    delivered_date = fields.Datetime(string='Delivered', readonly=True)
+
+    response_status = fields.Integer(string='Last HTTP Status', readonly=True)
+
+    last_error = fields.Text(string='Last Error', readonly=True)
+
+    def init(self):
+        """Index the dispatcher queue"""
+        create_index(self.env.cr, 'ecis_webhook_delivery_pending_idx', self._table,
+                     ['next_attempt', 'id'], where="state = 'pending'")
+
+    # ========== OUTBOX ==========
+
+    @api.model
+    def _enqueue_state_changes(self, records, previous_states):
+        """Queue the state-change events of ``records`` for their subscribers"""
+        prefix = EVENT_PREFIXES[records._name]
+        routing = self.env['ecis.webhook.subscription']._routing_table()
+        if not routing:
+            return self.browse()
+        known = {code for code, _label in WEBHOOK_EVENTS}
+        now = fields.Datetime.now()
+        vals_list = []
+        for record in records:
+            previous = previous_states.get(record.id)
+            if previous == record.state:
+                continue
+            data = dict(record._webhook_data(), previous_state=previous)
+            for event in (f'{prefix}.state_changed', f'{prefix}.{record.state}'):
+                if event not in known:
+                    continue
+                for subscription_id in routing.get((record.company_id.id, event), ()):
+                    delivery_uid = str(uuid.uuid4())
+                    vals_list.append({
+                        'uid': delivery_uid,
+                        'subscription_id': subscription_id,
+                        'event': event,
+                        'res_model': record._name,
+                        'res_id': record.id,
+                        'next_attempt': now,
+                        'payload': {
+                            'id': delivery_uid,
+                            'event': event,
+                            'created_at': fields.Datetime.to_string(now),
+                            'data': data,
+                        },
+                    })
+        if not vals_list:
+            return self.browse()
+        deliveries = self.sudo().create(vals_list)
+        self._trigger_dispatch()
+        return deliveries
+
+    @api.model
+    def _trigger_dispatch(self):
+        cron = self.env.ref('ecis_inspection.ir_cron_ecis_webhook_dispatch', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    # ========== DISPATCH ==========
+
+    def _retry_delay(self, attempts):
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+        return timedelta(seconds=delay * random.uniform(0.9, 1.1))
+
+    def _send(self):
+        """POST the deliveries in parallel and record the outcome of each"""
+        live = self.filtered(lambda d: d.subscription_id.active)
+        (self - live).write({'state': 'dead', 'last_error': _('Subscription archived.')})
+        if not live:
+            return
+
+        jobs = []
+        for delivery in live:
+            body = json.dumps(delivery.payload, separators=(',', ':'), default=str).encode()
+            subscription = delivery.subscription_id
+            jobs.append((subscription.url, body, subscription._signature_headers(body, delivery), subscription.timeout or 10.0))
+        # Only the HTTP calls run in the pool; the ORM stays on this thread.
+        with ThreadPoolExecutor(max_workers=min(DISPATCH_THREADS, len(jobs))) as pool:
+            results = list(pool.map(lambda job: _post(*job), jobs))
+
+        # Identical values are flushed as one UPDATE, so the common case of
+        # first-attempt successes costs a single statement.
+        now = fields.Datetime.now()
+        delivered = self.browse()
+        for delivery, (status, error) in zip(live, results):
+            attempts = delivery.attempts + 1
+            if error is None:
+                delivered |= delivery
+                delivery.write({
+                    'attempts': attempts,
+                    'response_status': status,
+                    'last_error': False,
+                    'state': 'done',
+                    'delivered_date': now,
+                })
+                continue
+            dead = attempts >= MAX_ATTEMPTS
+            delivery.write({
+                'attempts': attempts,
+                'response_status': status or 0,
+                'last_error': error,
+                'state': 'dead' if dead else 'pending',
+                'next_attempt': False if dead else now + self._retry_delay(attempts),
+            })
+            if dead:
+                _logger.warning("Webhook delivery %s to %s dead-lettered: %s",
+                                delivery.uid, delivery.subscription_id.url, error)
+
+        for subscription in live.subscription_id:
+            mine = live.filtered(lambda d: d.subscription_id == subscription)
+            if mine & delivered:
+                subscription.write({'last_success_date': now, 'consecutive_failures': 0})
+            else:
+                subscription.consecutive_failures += len(mine)
+
+    @api.model
+    def _cron_dispatch(self, batch_size=200, auto_commit=False, time_budget=240):
+        """Send due deliveries batch by batch, then purge old delivered ones"""
+        deadline = time.monotonic() + time_budget
+        total = 0
+        while time.monotonic() < deadline:
+            self.env.flush_all()
+            self.env.cr.execute("""
+                SELECT id FROM ecis_webhook_delivery
+                 WHERE state = 'pending' AND next_attempt <= %s
+                 ORDER BY next_attempt, id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [fields.Datetime.now(), batch_size])
+            ids = [row[0] for row in self.env.cr.fetchall()]
+            if not ids:
+                break
+            self.browse(ids).sudo()._send()
+            total += len(ids)
+            if auto_commit:
+                self.env.cr.commit()
+            if len(ids) < batch_size:
+                break
+
+        cutoff = fields.Datetime.now() - timedelta(days=DELIVERED_RETENTION_DAYS)
+        self.search([('state', '=', 'done'), ('delivered_date', '<', cutoff)], limit=10000).unlink()
+        if total:
+            _logger.info("Dispatched %d webhook deliveries", total)
+        return total
+
+    def action_requeue(self):
+        """Send the selected deliveries again with a fresh attempt budget"""
+        self.write({'state': 'pending', 'attempts': 0, 'next_attempt': fields.Datetime.now()})
+        self._trigger_dispatch()
+        return True
@@ -0,0 +1,8 @@
+from . import test_schemas
+from . import test_benchmarks
+from . import test_query_plans
+from . import test_sync
+from . import test_assignment
+from . import test_quote_expansion
+from . import test_equipment_import
+from . import test_webhook
@@ -0,0 +1,186 @@
+"""
+Synthetic dataset shared by the benchmark and query plan tests.
+"""
+import base64
+import logging
+import random
+import struct
+import zlib
+from datetime import date, timedelta
+
+_logger = logging.getLogger(__name__)
+
+# Context used for bulk seeding: no chatter, no followers, no tracking.
+SEED_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+}
+
+SEED_WORDS = {
+    'defects': [
+        'wire rope corrosion', 'broken strands on hoist rope', 'hydraulic leak at cylinder seal',
+        'worn brake lining', 'cracked weld on boom section', 'missing safety latch on hook',
+        'door interlock misaligned', 'pressure relief valve seized', 'fork heel wear above limit',
+        'chain elongation beyond tolerance', 'limit switch not triggering', 'corrosion pitting on shell',
+    ],
+    'recommendations': [
+        'replace hoist rope within 30 days', 'lubricate sheaves monthly', 'recalibrate load limiter',
+        'schedule NDT of welds', 'replace brake pads', 'train operators on daily checks',
+    ],
+    'notes': [
+        'checked under load', 'visual only, access restricted', 'measured with calliper',
+        'photo taken', 'operator present', 'surface rust, no section loss',
+    ],
+    'brands': ['Liebherr', 'Otis', 'Toyota', 'Konecranes', 'Manitou', 'Kone', 'Demag', 'Linde'],
+    'cities': ['Algiers', 'Oran', 'Constantine', 'Annaba', 'Blida', 'Setif', 'Bejaia'],
+}
+
+
+def _signature_png(rng, width=96, height=32):
+    """Build a small grayscale PNG with a random pen stroke"""
+    rows = []
+    y = height // 2
+    for _x in range(width):
+        y = min(height - 2, max(1, y + rng.choice((-1, 0, 1))))
+        rows.append(y)
+    raw = b''
+    for row in range(height):
+        line = bytes(0 if abs(rows[col] - row) <= 1 else 255 for col in range(width))
+        raw += b'\x00' + line
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    png = b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+    return base64.b64encode(png)
+
+
+def seed_dataset(env, clients=50, equipment_per_client=20, years=3, inspections_per_year=2,
+                 quotes=500, pending_inspections=2000, batch_size=1000, seed=42):
+    """Generate a realistic dataset in ``env`` and return the number of records per model"""
+    rng = random.Random(seed)
+    env = env(context=dict(env.context, **SEED_CONTEXT))
+    type_codes = [code for code, _label in env['ecis.equipment']._fields['equipment_type'].selection]
+    templates = env['ecis.checklist.template'].search([])
+    templates_by_type = {code: templates.filtered(lambda t: t.equipment_type == code) for code in type_codes}
+    inspectors = env['res.users'].search([('share', '=', False)], limit=10) or env.user
+    today = date.today()
+    signatures = [_signature_png(rng) for _i in range(20)]
+
+    partners = env['res.partner'].create([{
+        'name': f'Bench Client {i:05d}',
+        'is_company': True,
+        'email': f'client{i:05d}@bench.example.com',
+        'phone': f'+213 21 {rng.randint(100000, 999999)}',
+        'city': rng.choice(SEED_WORDS['cities']),
+    } for i in range(clients)])
+
+    equipment_vals = []
+    for partner in partners:
+        for n in range(equipment_per_client):
+            equipment_type = rng.choice(type_codes)
+            equipment_vals.append({
+                'name': f'{equipment_type.replace("_", " ").title()} {n:03d} - {partner.city}',
+                'equipment_type': equipment_type,
+                'brand': rng.choice(SEED_WORDS['brands']),
+                'model': f'M{rng.randint(100, 999)}',
+                'serial_number': f'SN-{rng.randint(10 ** 7, 10 ** 8 - 1)}',
+                'manufacture_year': rng.randint(1980, today.year),
+                'capacity': f'{rng.randint(1, 50)} t',
+                'client_id': partner.id,
+                'location': f'{partner.city}, site {rng.randint(1, 9)}',
+            })
+    equipment = env['ecis.equipment']
+    for start in range(0, len(equipment_vals), batch_size):
+        equipment |= equipment.create(equipment_vals[start:start + batch_size])
+
+    inspection_count = checklist_count = 0
+    inspection_vals = []
+    for record in equipment:
+        for n in range(years * inspections_per_year):
+            inspection_date = today - timedelta(days=rng.randint(1, years * 365))
+            result = rng.choices(['approved', 'conditional', 'rejected'], weights=[7, 2, 1])[0]
+            statuses = ['pass', 'pass', 'pass', 'warning', 'fail', 'na']
+            inspection_vals.append({
+                'equipment_id': record.id,
+                'inspection_date': inspection_date,
+                'inspection_type': rng.choice(['initial', 'periodic', 'periodic', 'after_repair']),
+                'inspector_id': rng.choice(inspectors).id,
+                'inspection_duration': rng.choice([1.0, 1.5, 2.0, 3.0, 4.0]),
+                'overall_result': result,
+                'state': rng.choice(['completed', 'sent', 'sent']),
+                'defects_found': ', '.join(rng.sample(SEED_WORDS['defects'], 2)) if result != 'approved' else False,
+                'recommendations': rng.choice(SEED_WORDS['recommendations']),
+                'inspector_notes': rng.choice(SEED_WORDS['notes']),
+                'next_inspection_frequency': 12,
+                'next_inspection_due': inspection_date + timedelta(days=360),
+                'inspector_signature': rng.choice(signatures),
+                'checklist_ids': [(0, 0, {
+                    'template_id': template.id,
+                    'name': template.name,
+                    'requirement': template.requirement,
+                    'sequence': template.sequence,
+                    'status': rng.choice(statuses),
+                    'notes': rng.choice(SEED_WORDS['notes']) if rng.random() < 0.3 else False,
+                }) for template in templates_by_type.get(record.equipment_type, [])],
+            })
+            checklist_count += len(inspection_vals[-1]['checklist_ids'])
+        if len(inspection_vals) >= batch_size:
+            env['ecis.inspection'].create(inspection_vals)
+            inspection_count += len(inspection_vals)
+            inspection_vals = []
+    if inspection_vals:
+        env['ecis.inspection'].create(inspection_vals)
+        inspection_count += len(inspection_vals)
+
+    # Upcoming draft inspections waiting for the assignment engine.
+    for user in inspectors:
+        if not env['ecis.inspector'].search_count([('user_id', '=', user.id)]):
+            env['ecis.inspector'].create({
+                'user_id': user.id,
+                'daily_capacity': rng.choice([6.0, 8.0]),
+                'qualifications': ', '.join(rng.sample(type_codes, 3)) if rng.random() < 0.5 else False,
+            })
+    pending_vals = [{
+        'equipment_id': record.id,
+        'inspection_date': today + timedelta(days=rng.randint(0, 30)),
+        'inspection_type': 'periodic',
+        'inspector_id': env.user.id,
+        'inspection_duration': rng.choice([1.0, 1.5, 2.0, 3.0]),
+        'needs_assignment': True,
+    } for record in rng.choices(equipment, k=pending_inspections)]
+    for start in range(0, len(pending_vals), batch_size):
+        env['ecis.inspection'].create(pending_vals[start:start + batch_size])
+    inspection_count += len(pending_vals)
+
+    quote_vals = [{
+        'contact_name': f'Bench Contact {i:05d}',
+        'email': f'contact{i:05d}@bench.example.com',
+        'phone': f'+213 55{rng.randint(1000000, 9999999)}',
+        'company_name': rng.choice(partners).name,
+        'equipment_type': rng.choice(type_codes),
+        'equipment_count': rng.randint(1, 30),
+        'message': rng.choice(SEED_WORDS['defects']),
+        'urgency': rng.choices(['normal', 'urgent', 'emergency'], weights=[8, 2, 1])[0],
+        'state': rng.choice(['new', 'contacted', 'quoted', 'converted', 'lost']),
+        'ip_address': f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+        'user_agent': 'Mozilla/5.0 (bench)',
+    } for i in range(quotes)]
+    for start in range(0, len(quote_vals), batch_size):
+        env['ecis.quote.request'].create(quote_vals[start:start + batch_size])
+
+    # What the nightly job would have rolled up, in one batch.
+    env['ecis.checklist.rollup']._cron_refresh(batch_size=100000)
+
+    counts = {
+        'res.partner': len(partners),
+        'ecis.equipment': len(equipment),
+        'ecis.inspection': inspection_count,
+        'ecis.inspection.checklist': checklist_count,
+        'ecis.quote.request': len(quote_vals),
+    }
+    _logger.info("ECIS benchmark dataset seeded: %s", counts)
+    return counts
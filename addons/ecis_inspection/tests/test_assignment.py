@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestInspectionAssignment(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestInspectionAssignment, cls).setUpClass()
+        cls.env['ecis.inspector'].search([]).active = False
+        cls.inspector = cls.env['ecis.inspector'].create({
+            'user_id': cls.env.user.id,
+            'daily_capacity': 4.0,
+        })
+        client = cls.env['res.partner'].create({'name': 'Assignment Client', 'is_company': True})
+        cls.equipment = cls.env['ecis.equipment'].create({
+            'name': 'Assignment Crane',
+            'equipment_type': 'crane',
+            'client_id': client.id,
+        })
+        cls.today = fields.Date.context_today(cls.env['ecis.inspector'])
+
+    def _pending(self, count, hours=2.0):
+        return self.env['ecis.inspection'].create([{
+            'equipment_id': self.equipment.id,
+            'inspection_type': 'periodic',
+            'inspection_date': self.today,
+            'inspector_id': self.env.user.id,
+            'inspection_duration': hours,
+            'needs_assignment': True,
+        } for _i in range(count)])
+
+    def test_assign_past_a_full_day(self):
+        """Inspections that do not fit today are planned on the following days"""
+        inspections = self._pending(3, hours=3.0)
+        self.assertEqual(self.env['ecis.inspector']._assign_inspections(inspections), 3)
+        self.assertEqual(
+            sorted(inspections.mapped('inspection_date')),
+            [self.today + timedelta(days=offset) for offset in range(3)],
+        )
+        self.assertFalse(any(inspections.mapped('needs_assignment')))
+
+    def test_cron_assign_plans_ahead(self):
+        inspections = self._pending(4)
+        self.assertEqual(self.env['ecis.inspector']._cron_assign(), 4)
+        self.assertEqual(max(inspections.mapped('inspection_date')), self.today + timedelta(days=1))
+
+    def test_started_inspection_cannot_be_in_the_future(self):
+        inspection = self._pending(1)
+        inspection.inspection_date = self.today + timedelta(days=2)
+        with self.assertRaises(ValidationError):
+            inspection.write({'state': 'in_progress'})
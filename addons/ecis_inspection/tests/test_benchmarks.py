@@ -0,0 +1,419 @@
+"""
+Benchmark suite for the hot paths of the inspection module.
+
+Excluded from the standard test run; run it on a throw-away database::
+
+    odoo -d ecis_bench -i ecis_inspection --test-tags /ecis_inspection:ecis_bench --stop-after-init
+
+``ECIS_BENCH_OUTPUT`` writes the report as JSON, ``ECIS_BENCH_BASELINE``
+fails the run when a case regressed against a saved report, and
+``ECIS_BENCH_CLIENTS`` scales the seeded dataset.
+"""
+import io
+import json
+import logging
+import os
+import secrets
+import statistics
+import time
+
+from odoo import fields, sql_db
+from odoo.exceptions import ValidationError
+from odoo.tests import HttpCase, tagged
+
+from odoo.addons.ecis_inspection.controllers import schemas
+from odoo.addons.ecis_inspection.controllers.api import EcisInspectionApiController
+from odoo.addons.ecis_inspection.models.api_key import KEY_MARKER, key_digest
+from odoo.addons.ecis_inspection.models.equipment_timeline import TIMELINE_PAGE_QUERY
+from odoo.addons.ecis_inspection.models.quote_request import EXPANSION_INLINE_LIMIT
+from odoo.addons.ecis_inspection.tools import schema
+
+from .common import SEED_CONTEXT, seed_dataset
+
+_logger = logging.getLogger(__name__)
+
+# Scheduled jobs timed by the suite: (label, model, method). The archive job
+# is left out: it writes cold files that a savepoint rollback cannot undo.
+SCHEDULED_JOBS = [
+    ('sync_tombstone_purge', 'ecis.sync.tombstone', '_cron_purge'),
+    ('retention', 'ecis.retention.policy', '_cron_run'),
+    ('inspector_assignment', 'ecis.inspector', '_cron_assign'),
+    ('checklist_rollup', 'ecis.checklist.rollup', '_cron_refresh'),
+    ('quote_expansion', 'ecis.quote.request', '_cron_expand'),
+]
+
+# A median time or query count growing by more than this ratio is a regression.
+REGRESSION_TOLERANCE = 0.2
+
+# Quote request bodies timed by test_request_validation.
+VALIDATION_SAMPLES = {
+    'valid': {
+        'name': 'Bench Intake', 'email': 'intake@bench.example.com', 'phone': '+213 555 000 000',
+        'company_name': 'Bench Intake Company', 'equipment_type': 'crane', 'equipment_count': '3',
+        'urgency': 'urgent', 'message': 'Please inspect our crane.', 'location': 'Oran',
+    },
+    'invalid_email': {
+        'name': 'Bench Intake', 'email': 'intake-at-bench', 'phone': '+213 555 000 000',
+        'equipment_type': 'crane',
+    },
+}
+
+
+def _legacy_payload(httprequest):
+    """The pre-schema controller parsing (JSON, then form and args, then the raw body again)"""
+    payload = {}
+    json_body = httprequest.get_json(silent=True)
+    if isinstance(json_body, dict):
+        payload.update(json_body)
+    if httprequest.form:
+        payload.update(httprequest.form.to_dict())
+    if httprequest.args:
+        payload.update(httprequest.args.to_dict())
+    if not payload and httprequest.data:
+        try:
+            parsed = json.loads(httprequest.data.decode('utf-8'))
+            if isinstance(parsed, dict):
+                payload.update(parsed)
+        except Exception:
+            pass
+    return payload
+
+
+def compare_results(baseline, current, tolerance=REGRESSION_TOLERANCE):
+    """
+    Compare two reports; return the cases whose median time or query count
+    grew by more than ``tolerance`` (a ratio).
+    """
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in current.get('results', []):
+        before = previous.get(result['name'])
+        if not before or before['status'] != 'ok' or result['status'] != 'ok':
+            continue
+        slower = result['median_ms'] > before['median_ms'] * (1 + tolerance)
+        chattier = result['queries'] > before['queries'] * (1 + tolerance)
+        if slower or chattier:
+            regressions.append({
+                'name': result['name'],
+                'median_ms': (before['median_ms'], result['median_ms']),
+                'queries': (before['queries'], result['queries']),
+            })
+    return regressions
+
+
+@tagged('-standard', 'ecis_bench', 'post_install', '-at_install')
+class TestBenchmarks(HttpCase):
+    """
+    Every case runs in a savepoint that is rolled back, and the seeded
+    dataset and API key go away with the test transaction.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestBenchmarks, cls).setUpClass()
+        cls.dataset = seed_dataset(cls.env, clients=int(os.environ.get('ECIS_BENCH_CLIENTS', 50)))
+        prefix = secrets.token_hex(4)
+        cls.api_token = f'{KEY_MARKER}{prefix}_{secrets.token_urlsafe(32)}'
+        cls.env['ecis.api.key'].create({
+            'name': 'Benchmark',
+            'key_prefix': prefix,
+            'key_digest': key_digest(cls.api_token),
+            'rate_limit': 0,
+        })
+
+    # ========== MEASUREMENT ==========
+
+    def _measure(self, name, func, repeat=5):
+        """
+        Time ``func`` ``repeat`` times in a rolled-back savepoint with a cold
+        cache. Queries are counted on every cursor, so routes called over
+        HTTP are counted too.
+        """
+        cr = self.env.cr
+        durations, queries = [], []
+        status, error = 'ok', None
+        for _i in range(repeat):
+            self.env.invalidate_all()
+            cr.execute('SAVEPOINT ecis_benchmark')
+            count_before = sql_db.sql_counter
+            start = time.perf_counter()
+            try:
+                func()
+                self.env.flush_all()
+            except Exception as exc:
+                status, error = 'error', str(exc)
+            durations.append((time.perf_counter() - start) * 1000.0)
+            queries.append(sql_db.sql_counter - count_before)
+            cr.execute('ROLLBACK TO SAVEPOINT ecis_benchmark')
+            self.env.invalidate_all()
+            if status != 'ok':
+                break
+        result = {
+            'name': name,
+            'status': status,
+            'runs': len(durations),
+            'median_ms': round(statistics.median(durations), 3),
+            'min_ms': round(min(durations), 3),
+            'max_ms': round(max(durations), 3),
+            'queries': max(queries),
+        }
+        if error:
+            result['error'] = error
+        return result
+
+    def _benchmark_cases(self):
+        """Return [(name, callable)] for the hot paths"""
+        controller = EcisInspectionApiController()
+        inspection_env = self.env['ecis.inspection']
+        equipment_env = self.env['ecis.equipment']
+        sample_equipment = equipment_env.search([], limit=1)
+        sample_inspector = inspection_env.search([], limit=1).inspector_id
+
+        def quote_intake():
+            # The public form end to end: validation, duplicate check and
+            # the quote, company, contact, equipment and inspection it creates.
+            response = self.url_open(
+                '/api/quote-request',
+                data=json.dumps(VALIDATION_SAMPLES['valid']),
+                headers={'Content-Type': 'application/json'},
+                timeout=30,
+            )
+            response.raise_for_status()
+
+        def quote_expansion():
+            # One inline expansion: multi-created equipment, inspections and checklists.
+            quote = self.env['ecis.quote.request'].create({
+                'contact_name': 'Bench Fleet',
+                'email': 'fleet@bench.example.com',
+                'phone': '+213 555 000 001',
+                'company_name': 'Bench Fleet Company',
+                'equipment_type': 'forklift',
+                'equipment_count': EXPANSION_INLINE_LIMIT,
+                'source': 'website',
+                'partner_id': self.env['res.partner'].create({'name': 'Bench Fleet Company', 'is_company': True}).id,
+            })
+            quote._expand_equipment()
+
+        def intake_duplicate_check():
+            quote_env = self.env['ecis.quote.request']
+            fingerprint = quote_env._submission_fingerprint({
+                'email': 'Intake@Bench.example.com ',
+                'phone': '+213 (555) 000-000',
+                'company_name': 'Bench Intake Company',
+                'equipment_type': 'crane',
+                'message': 'Please inspect our crane.',
+            })
+            quote_env._intake_check(fingerprint, '192.0.2.10')
+
+        def list_and_serialize():
+            records = inspection_env.search([], limit=80)
+            [controller._serialize_inspection(record) for record in records]
+
+        def detail_with_checklist():
+            records = inspection_env.search([], limit=20)
+            [controller._serialize_inspection(record, include_checklist=True) for record in records]
+
+        def checklist_stats():
+            records = inspection_env.search([], limit=200)
+            records.mapped('checklist_total_count')
+            records.mapped('checklist_fail_count')
+
+        def name_get():
+            equipment_env.search([], limit=500).name_get()
+
+        def name_search():
+            equipment_env.name_search('crane', limit=8)
+
+        def findings_search():
+            inspection_env._search_findings_ranked('wire rope corrosion', limit=50)
+
+        def sync_pull():
+            if sample_inspector:
+                self.env['ecis.sync']._sync_pull(sample_inspector, limit=500)
+
+        def pdf_render():
+            record = inspection_env.search([], limit=1)
+            if record:
+                # Tests render reports as HTML unless told otherwise.
+                self.env['ir.actions.report'].with_context(force_report_rendering=True)._render_qweb_pdf(
+                    'ecis_inspection.action_report_inspection', res_ids=record.ids)
+
+        def tracked_mass_write(context):
+            def run():
+                records = inspection_env.with_context(**context).search([], limit=500)
+                records.write({'state': 'cancelled', 'inspection_type': 'special'})
+                self.env.cr.precommit.run()
+            return run
+
+        def equipment_timeline():
+            # The uncached query behind the timeline API.
+            if sample_equipment:
+                self.env.cr.execute(TIMELINE_PAGE_QUERY, [sample_equipment.id, 50, 0])
+                self.env.cr.fetchall()
+
+        def checklist_failure_rates():
+            self.env['ecis.checklist.rollup']._failure_rates(['template', 'equipment_type'])
+
+        def request_validation():
+            schemas.QUOTE_REQUEST(VALIDATION_SAMPLES['valid'])
+
+        def api_key_verify():
+            self.env['ecis.api.key']._verify(self.api_token)
+
+        def equipment_history():
+            if sample_equipment:
+                sample_equipment.inspection_ids.mapped('checklist_ids.status')
+
+        cases = [
+            ('quote_intake', quote_intake),
+            ('quote_expansion', quote_expansion),
+            ('intake_duplicate_check', intake_duplicate_check),
+            ('request_validation', request_validation),
+            ('api_key_verify', api_key_verify),
+            ('list_serialize', list_and_serialize),
+            ('detail_with_checklist', detail_with_checklist),
+            ('checklist_stats', checklist_stats),
+            ('name_get', name_get),
+            ('name_search', name_search),
+            ('findings_search', findings_search),
+            ('sync_pull', sync_pull),
+            ('equipment_history', equipment_history),
+            ('equipment_timeline', equipment_timeline),
+            ('checklist_failure_rates', checklist_failure_rates),
+            ('pdf_render', pdf_render),
+            ('mass_write_tracked', tracked_mass_write({})),
+            ('mass_write_bulk_tracking', tracked_mass_write({'ecis_bulk_tracking': True})),
+        ]
+        for label, model_name, method in SCHEDULED_JOBS:
+            cases.append((f'cron_{label}', getattr(self.env[model_name], method)))
+        return cases
+
+    # ========== TESTS ==========
+
+    def test_hot_paths(self):
+        """Time every case; fail on errors and on regressions against the baseline"""
+        results = [self._measure(name, func) for name, func in self._benchmark_cases()]
+        plans = self.env['ecis.query.plan']._explain_hot_queries()
+        report = {
+            'generated_at': fields.Datetime.to_string(fields.Datetime.now()),
+            'module_version': self.env['ir.module.module'].search(
+                [('name', '=', 'ecis_inspection')], limit=1).latest_version,
+            'dataset': {
+                model_name: self.env[model_name].with_context(active_test=False).search_count([])
+                for model_name in ('ecis.equipment', 'ecis.inspection',
+                                   'ecis.inspection.checklist', 'ecis.quote.request')
+            },
+            'results': results,
+            'seq_scans': {name: r['seq_scans'] for name, r in plans.items() if r['seq_scans']},
+        }
+        _logger.info("ECIS benchmark report: %s", json.dumps(report, sort_keys=True))
+        output = os.environ.get('ECIS_BENCH_OUTPUT')
+        if output:
+            with open(output, 'w') as handle:
+                json.dump(report, handle, indent=2, sort_keys=True)
+
+        self.assertFalse([r for r in results if r['status'] != 'ok'], "Benchmark cases failed")
+        baseline_path = os.environ.get('ECIS_BENCH_BASELINE')
+        if baseline_path:
+            with open(baseline_path) as handle:
+                baseline = json.load(handle)
+            self.assertFalse(compare_results(baseline, report), "Benchmark regressions")
+
+    def test_bulk_tracking(self):
+        """
+        Write two tracked fields on up to 10000 inspections with and without
+        bulk tracking; log the rows, queries and time each mode costs.
+        """
+        cr = self.env.cr
+        ids = self.env['ecis.inspection'].search([], limit=10000).ids
+        report = {'records': len(ids)}
+        for mode, context in (('tracked', {}), ('bulk', {'ecis_bulk_tracking': True})):
+            self.env.invalidate_all()
+            cr.execute('SAVEPOINT ecis_benchmark')
+            cr.execute("SELECT (SELECT count(*) FROM mail_message), (SELECT count(*) FROM mail_tracking_value)")
+            messages_before, values_before = cr.fetchone()
+            count_before = sql_db.sql_counter
+            start = time.perf_counter()
+            records = self.env['ecis.inspection'].with_context(**context).browse(ids)
+            records.write({'state': 'cancelled', 'inspection_type': 'special'})
+            self.env.flush_all()
+            cr.precommit.run()
+            elapsed = (time.perf_counter() - start) * 1000.0
+            queries = sql_db.sql_counter - count_before
+            cr.execute("SELECT (SELECT count(*) FROM mail_message), (SELECT count(*) FROM mail_tracking_value)")
+            messages_after, values_after = cr.fetchone()
+            cr.execute('ROLLBACK TO SAVEPOINT ecis_benchmark')
+            self.env.invalidate_all()
+            report[mode] = {
+                'ms': round(elapsed, 1),
+                'queries': queries,
+                'mail_message_rows': messages_after - messages_before,
+                'tracking_value_rows': values_after - values_before,
+            }
+        _logger.info("ECIS bulk tracking benchmark: %s", report)
+        self.assertLessEqual(report['bulk']['queries'], report['tracked']['queries'])
+
+    def test_request_validation(self):
+        """
+        Time parsing and validating quote request bodies the pre-schema way
+        (merged payload, required-field check, invalid input caught by the
+        ORM constraints on create) against the compiled schema; log the mean
+        microseconds and queries per request for each sample.
+        """
+        from werkzeug.test import EnvironBuilder
+        from werkzeug.wrappers import Request
+
+        iterations = 2000
+        cr = self.env.cr
+        quote_env = self.env['ecis.quote.request'].with_context(**SEED_CONTEXT)
+        required_fields = ['name', 'email', 'phone', 'equipment_type']
+
+        def legacy(httprequest, create):
+            data = _legacy_payload(httprequest)
+            if [f for f in required_fields if not data.get(f)] or not create:
+                return
+            cr.execute('SAVEPOINT ecis_benchmark')
+            try:
+                quote_env.create({
+                    'contact_name': data.get('name'),
+                    'email': data.get('email'),
+                    'phone': data.get('phone'),
+                    'company_name': data.get('company_name'),
+                    'equipment_type': data.get('equipment_type'),
+                    'equipment_count': int(data.get('equipment_count', 1)),
+                    'urgency': data.get('urgency', 'normal'),
+                    'source': 'website',
+                })
+                self.env.flush_all()
+            except ValidationError:
+                pass
+            finally:
+                cr.execute('ROLLBACK TO SAVEPOINT ecis_benchmark')
+                self.env.invalidate_all()
+
+        def compiled(httprequest, _create):
+            try:
+                schemas.QUOTE_REQUEST(schema.parse_body(httprequest))
+            except schema.SchemaError:
+                pass
+
+        report = {'iterations': iterations}
+        for sample, body in VALIDATION_SAMPLES.items():
+            environ = EnvironBuilder(method='POST', path='/api/quote-request', json=body).get_environ()
+            payload = environ['wsgi.input'].read()
+            report[sample] = {}
+            # Invalid input used to be caught by the ORM constraints, so the
+            # legacy path creates it; the valid sample only times the checks.
+            create = sample != 'valid'
+            for mode, func in (('legacy', legacy), ('schema', compiled)):
+                count_before = sql_db.sql_counter
+                start = time.perf_counter()
+                for _i in range(iterations):
+                    func(Request(dict(environ, **{'wsgi.input': io.BytesIO(payload)})), create)
+                elapsed = time.perf_counter() - start
+                report[sample][mode] = {
+                    'us': round(elapsed / iterations * 1e6, 1),
+                    'queries': round((sql_db.sql_counter - count_before) / iterations, 1),
+                }
+        _logger.info("ECIS request validation benchmark: %s", report)
+        self.assertEqual(report['invalid_email']['schema']['queries'], 0)
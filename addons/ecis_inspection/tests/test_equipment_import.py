@@ -0,0 +1,39 @@
+import base64
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ecis_inspection.models import equipment_import
+
+
+@tagged('post_install', '-at_install')
+class TestEquipmentImportFiles(TransactionCase):
+
+    def _job(self, name, content):
+        return self.env['ecis.equipment.import'].create({
+            'name': name,
+            'file': base64.b64encode(content),
+        })
+
+    def test_corrupt_xlsx(self):
+        """A file that is not a zip is refused with its name, not a traceback"""
+        if equipment_import.openpyxl is None:
+            self.skipTest('openpyxl is not installed')
+        job = self._job('fleet.xlsx', b'PK\x03\x04 this is not a workbook')
+        with self.assertRaises(UserError) as caught:
+            job.action_import()
+        self.assertIn('fleet.xlsx', str(caught.exception))
+
+    def test_unreadable_csv(self):
+        """csv.Error (a field past the csv field limit) is reported as a UserError"""
+        job = self._job('fleet.csv', b'name,serial_number\n"' + b'x' * 200000 + b'",S1\n')
+        with self.assertRaises(UserError) as caught:
+            job.action_import()
+        self.assertIn('fleet.csv', str(caught.exception))
+
+    def test_unreadable_file_fails_the_job(self):
+        """The cron marks the job failed instead of crashing on the file"""
+        job = self._job('fleet.csv', b'name,serial_number\n"' + b'x' * 200000 + b'",S1\n')
+        job._run()
+        self.assertEqual(job.state, 'failed')
+        self.assertIn('fleet.csv', job.failure_message)
@@ -0,0 +1,25 @@
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ecis_inspection.models.query_plan import CHECKED_TABLES, HOT_QUERIES
+
+from .common import seed_dataset
+
+
+@tagged('post_install', '-at_install')
+class TestHotQueryPlans(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestHotQueryPlans, cls).setUpClass()
+        seed_dataset(cls.env, clients=5, equipment_per_client=4, quotes=50, pending_inspections=50)
+        cls.env.flush_all()
+        for table in CHECKED_TABLES:
+            cls.env.cr.execute(f'ANALYZE {table}')
+
+    def test_hot_queries_use_indexes(self):
+        """No hot query falls back to a sequential scan on the checked tables"""
+        report = self.env['ecis.query.plan']._explain_hot_queries()
+        self.assertEqual(set(report), set(HOT_QUERIES))
+        for name, result in report.items():
+            with self.subTest(query=name):
+                self.assertFalse(result['seq_scans'], f"{name} reads {result['seq_scans']} sequentially")
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestQuoteExpansion(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestQuoteExpansion, cls).setUpClass()
+        cls.env['ecis.inspector'].search([]).active = False
+        # Two default-length (2 h) inspections fit on one day.
+        cls.env['ecis.inspector'].create({'user_id': cls.env.user.id, 'daily_capacity': 4.0})
+        cls.env['ir.config_parameter'].sudo().set_param('ecis_inspection.default_inspection_hours', '2')
+        cls.today = fields.Date.context_today(cls.env['ecis.inspector'])
+
+    def test_expansion_beyond_one_day_capacity(self):
+        """The queued expansion plans what does not fit today on later days"""
+        quote = self.env['ecis.quote.request'].create({
+            'contact_name': 'Fleet Contact',
+            'email': 'fleet@example.com',
+            'phone': '+213 555 000 001',
+            'company_name': 'Fleet Company',
+            'equipment_type': 'forklift',
+            'equipment_count': 6,
+            'source': 'website',
+            'partner_id': self.env['res.partner'].create({'name': 'Fleet Company', 'is_company': True}).id,
+        })
+        quote.expansion_pending = True
+        self.assertEqual(self.env['ecis.quote.request']._cron_expand(), 6)
+        self.assertFalse(quote.expansion_pending)
+
+        inspections = self.env['ecis.inspection'].search([('quote_request_id', '=', quote.id)])
+        self.assertEqual(len(inspections), 6)
+        self.assertFalse(any(inspections.mapped('needs_assignment')))
+        self.assertEqual(
+            sorted(set(inspections.mapped('inspection_date'))),
+            [self.today + timedelta(days=offset) for offset in range(3)],
+        )
@@ -0,0 +1,41 @@
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ecis_inspection.controllers import schemas
+from odoo.addons.ecis_inspection.tools import schema
+
+
+@tagged('post_install', '-at_install')
+class TestRequestSchemas(TransactionCase):
+
+    def test_sync_pull_accepts_full_token(self):
+        """A token carrying every stream cursor and the tombstone cursor validates"""
+        cursor = [9007199254740991, 2147483647]
+        state = {stream: cursor for stream in ('inspections', 'checklist', 'equipment', 'templates', 'tombstones')}
+        state['at'] = '2024-01-31 23:59:59'
+        token = self.env['ecis.sync']._encode_token(state)
+        params = schemas.SYNC_PULL({'inspector_id': '7', 'token': token})
+        self.assertEqual(params['token'], token)
+        self.assertEqual(self.env['ecis.sync']._decode_token(params['token']), state)
+
+    def test_batch_limits(self):
+        """Lists and counts larger than one model batch are refused"""
+        cases = (
+            (schemas.TRANSITION, {'action': 'start', 'ids': list(range(1, 202))}, 'ids', 'max_items'),
+            (schemas.SYNC_PUSH, {'inspector_id': 7, 'changes': [{}] * 501}, 'changes', 'max_items'),
+            (schemas.QUOTE_REQUEST, {
+                'name': 'Bulk', 'email': 'bulk@example.com', 'phone': '+1 555 0100',
+                'equipment_type': 'crane', 'equipment_count': 201,
+            }, 'equipment_count', 'maximum'),
+        )
+        for validate, params, field, code in cases:
+            with self.subTest(field=field), self.assertRaises(schema.SchemaError) as caught:
+                validate(params)
+            self.assertEqual([(e['field'], e['code']) for e in caught.exception.errors], [(field, code)])
+        self.assertEqual(len(schemas.TRANSITION({'action': 'start', 'ids': list(range(1, 201))})['ids']), 200)
+
+    def test_integer_rejects_fractions(self):
+        validate = schema.compile_schema({'limit': schema.Integer()})
+        self.assertEqual(validate({'limit': 3.0}), {'limit': 3})
+        with self.assertRaises(schema.SchemaError) as caught:
+            validate({'limit': 3.7})
+        self.assertEqual(caught.exception.errors[0]['code'], 'type')
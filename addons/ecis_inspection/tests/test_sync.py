@@ -0,0 +1,115 @@
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestSyncToken(TransactionCase):
+
+    def test_decode_round_trip(self):
+        sync = self.env['ecis.sync']
+        state = {'inspections': [9007199254740991, 42], 'tombstones': [1234, 0], 'at': '2024-01-31 00:00:00'}
+        self.assertEqual(sync._decode_token(sync._encode_token(state)), state)
+
+    def test_decode_accepts_legacy_token(self):
+        """Tokens from before the transaction cursors still decode; the pull resyncs them"""
+        sync = self.env['ecis.sync']
+        state = {'inspections': ['2024-01-31 23:59:59.999999', 42], 'tombstones': ['2024-01-31 00:00:00', 0]}
+        self.assertEqual(sync._decode_token(sync._encode_token(state)), state)
+        result = sync._sync_pull(self.env.user, sync._encode_token(state))
+        self.assertTrue(result['full_resync'])
+        self.assertIn('at', sync._decode_token(result['token']))
+
+    def test_decode_rejects_malformed_cursors(self):
+        sync = self.env['ecis.sync']
+        for state in (
+            {'inspections': '2024-01-31 00:00:00'},
+            {'inspections': ['2024-01-31 00:00:00']},
+            {'checklist': ['2024-01-31 00:00:00', '42']},
+            {'equipment': ['2024-01-31 00:00:00', True]},
+            {'templates': [42, 42]},
+            {'tombstones': ['yesterday', 0]},
+            {'tombstones': ['2024-01-31 00:00:00', 0, 1]},
+            {'inspections': ['2024-01-31 00:00:00', 42], 'tombstones': [0, 0], 'at': '2024-01-31 00:00:00'},
+            {'inspections': [-1, 42], 'tombstones': [0, 0], 'at': '2024-01-31 00:00:00'},
+            {'inspections': [True, 42], 'tombstones': [0, 0], 'at': '2024-01-31 00:00:00'},
+            {'tombstones': [0, 0], 'at': 'yesterday'},
+            {'inspections': [0, 0], 'at': '2024-01-31 00:00:00'},
+        ):
+            with self.subTest(state=state), self.assertRaises(ValidationError):
+                sync._decode_token(sync._encode_token(state))
+
+
+@tagged('post_install', '-at_install')
+class TestSyncCompany(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestSyncCompany, cls).setUpClass()
+        cls.other_company = cls.env['res.company'].create({'name': 'Other Inspection Company'})
+        client = cls.env['res.partner'].create({'name': 'Sync Client', 'is_company': True})
+        equipment = cls.env['ecis.equipment'].create({
+            'name': 'Sync Crane',
+            'equipment_type': 'crane',
+            'client_id': client.id,
+            'company_id': cls.other_company.id,
+        })
+        cls.inspection = cls.env['ecis.inspection'].create({
+            'equipment_id': equipment.id,
+            'inspector_id': cls.env.user.id,
+            'company_id': cls.other_company.id,
+        })
+
+    def _push(self, company_id):
+        sync = self.env['ecis.sync']
+        stamp = sync._write_stamps(self.inspection)[self.inspection.id]
+        change = {'stream': 'inspections', 'id': self.inspection.id, 'write_date': stamp,
+                  'values': {'inspector_notes': 'Pushed offline'}}
+        return sync._sync_push(self.env.user, [change], company_id=company_id)[0]
+
+    def test_push_outside_key_company(self):
+        """A key bound to another company cannot reach the inspection"""
+        self.assertEqual(self._push(self.env.company.id)['status'], 'not_found')
+        self.assertFalse(self.inspection.inspector_notes)
+
+    def test_push_inside_key_company(self):
+        self.assertEqual(self._push(self.other_company.id)['status'], 'applied')
+        self.assertEqual(self.inspection.inspector_notes, 'Pushed offline')
+
+
+@tagged('post_install', '-at_install')
+class TestSyncCursor(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestSyncCursor, cls).setUpClass()
+        client = cls.env['res.partner'].create({'name': 'Cursor Client', 'is_company': True})
+        equipment = cls.env['ecis.equipment'].create({
+            'name': 'Cursor Crane',
+            'equipment_type': 'crane',
+            'client_id': client.id,
+        })
+        cls.inspection = cls.env['ecis.inspection'].create({
+            'equipment_id': equipment.id,
+            'inspector_id': cls.env.user.id,
+        })
+        cls.env.flush_all()
+
+    def test_rows_are_stamped_with_their_transaction(self):
+        self.env.cr.execute("SELECT sync_txid FROM ecis_inspection WHERE id = %s", [self.inspection.id])
+        stamped = self.env.cr.fetchone()[0]
+        self.env.cr.execute("SELECT txid_current()")
+        self.assertEqual(stamped, self.env.cr.fetchone()[0])
+
+    def test_running_transaction_is_held_back(self):
+        """Rows of a transaction that has not committed yet stay ahead of the cursor"""
+        sync = self.env['ecis.sync']
+        result = sync._sync_pull(self.env.user)
+        self.assertNotIn(self.inspection, result['changes']['inspections'])
+        self.env.cr.execute("SELECT txid_current()")
+        running = self.env.cr.fetchone()[0]
+        state = sync._decode_token(result['token'])
+        for stream in ('inspections', 'checklist', 'equipment', 'templates'):
+            if stream in state:
+                self.assertLess(state[stream][0], running)
+        # The tombstone cursor still covers deletions this transaction makes.
+        self.assertLessEqual(state['tombstones'][0], running)
@@ -0,0 +1,32 @@
+import socket
+from unittest.mock import patch
+
+from urllib3.exceptions import NewConnectionError
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ecis_inspection.models import webhook
+
+
+@tagged('post_install', '-at_install')
+class TestWebhookPinning(TransactionCase):
+
+    def _resolving_to(self, address):
+        answer = [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (address, 443))]
+        return patch.object(webhook.socket, 'getaddrinfo', return_value=answer)
+
+    def test_rebound_host_is_never_dialled(self):
+        """A host that resolves to a private address at connect time is refused"""
+        conn = webhook._PinnedHTTPSConnection('hooks.example.com', 443)
+        with self._resolving_to('10.0.0.5'), patch.object(webhook, 'create_connection') as connect:
+            with self.assertRaises(NewConnectionError):
+                conn._new_conn()
+        connect.assert_not_called()
+
+    def test_connection_dials_the_checked_address(self):
+        conn = webhook._PinnedHTTPSConnection('hooks.example.com', 443)
+        with self._resolving_to('93.184.216.34'), patch.object(webhook, 'create_connection') as connect:
+            conn._new_conn()
+        self.assertEqual(connect.call_args[0][0], ('93.184.216.34', 443))
+        # SNI, the certificate check and the Host header keep the name.
+        self.assertEqual(conn.host, 'hooks.example.com')
@@ -0,0 +1,7 @@
+from . import instrumentation
+from . import metrics
+from . import profiling
+from . import assignment
+from . import replica
+from . import schema
+from . import ratelimit
@@ -0,0 +1,73 @@
+"""
+Greedy capacity-aware placement of inspections on inspectors' days.
+
+The solver is plain Python over pre-aggregated data: the caller loads the
+hours already booked per (inspector, day) in one query, and every task is
+placed in O(inspectors) without touching the database. Tasks are handled
+site by site, largest site first, so that the inspections of one site on
+one day stay with the same inspector whenever capacity allows.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+# One inspection to place. ``site`` groups inspections at the same location.
+Task = namedtuple('Task', 'id day hours equipment_type site')
+
+# One inspector. ``qualifications`` is a set of equipment types, or None for all.
+Inspector = namedtuple('Inspector', 'id capacity qualifications')
+
+
+def assign(tasks, inspectors, booked=None, horizon_days=0, earliest=None):
+    """
+    Place ``tasks`` on inspectors without exceeding their daily capacity.
+
+    :param booked: {(inspector_id, day): hours} already scheduled
+    :param horizon_days: how many days a task may slip past its own day
+    :param earliest: first day a task may be placed on (e.g. today)
+    :return: ({task_id: (inspector_id, day)}, [task ids left unplaced])
+    """
+    load = defaultdict(float, booked or {})
+    qualified = defaultdict(list)
+    generalists = [inspector for inspector in inspectors if inspector.qualifications is None]
+    for inspector in inspectors:
+        for equipment_type in inspector.qualifications or ():
+            qualified[equipment_type].append(inspector)
+
+    # Inspector already visiting a site on a given day.
+    site_day = {}
+    placed, unplaced = {}, []
+
+    sites = defaultdict(list)
+    for task in tasks:
+        sites[(task.day, task.site)].append(task)
+    ordered = sorted(sites.values(), key=lambda group: (group[0].day, -sum(t.hours for t in group)))
+
+    for group in ordered:
+        for task in sorted(group, key=lambda t: -t.hours):
+            candidates = qualified[task.equipment_type] + generalists
+            first_day = max(task.day, earliest) if earliest else task.day
+            for offset in range(horizon_days + 1):
+                day = first_day + timedelta(days=offset)
+                choice = _pick(task, day, candidates, load, site_day.get((task.site, day)))
+                if choice:
+                    load[(choice.id, day)] += task.hours
+                    site_day.setdefault((task.site, day), choice.id)
+                    placed[task.id] = (choice.id, day)
+                    break
+            else:
+                unplaced.append(task.id)
+    return placed, unplaced
+
+
+def _pick(task, day, candidates, load, preferred_id):
+    """The inspector already on site if they have room, else the least loaded one that fits"""
+    best, best_free = None, None
+    for inspector in candidates:
+        free = inspector.capacity - load[(inspector.id, day)]
+        if free < task.hours:
+            continue
+        if inspector.id == preferred_id:
+            return inspector
+        if best is None or free > best_free:
+            best, best_free = inspector, free
+    return best
@@ -0,0 +1,95 @@
+"""
+Per-request SQL and phase timings for the ECIS API.
+
+A timer is bound to the current thread for the duration of a request; when
+no timer is active every helper here is a no-op, so instrumented code pays a
+single thread-local lookup.
+"""
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_local = threading.local()
+
+
+def _sql_counters():
+    # Maintained by odoo.sql_db for every query run in an HTTP worker thread.
+    thread = threading.current_thread()
+    return getattr(thread, 'query_count', 0), getattr(thread, 'query_time', 0.0)
+
+
+class RequestTimer:
+    """Collects phase durations, SQL counts and ORM cache misses"""
+
+    def __init__(self, debug=False):
+        self.debug = debug
+        self.started = time.perf_counter()
+        self.query_count, self.query_time = _sql_counters()
+        self.phases = []
+        self.cache_misses = 0
+
+    @contextmanager
+    def phase(self, name):
+        count, sql_time = _sql_counters()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_count, end_sql_time = _sql_counters()
+            self.phases.append({
+                'name': name,
+                'ms': (time.perf_counter() - start) * 1000.0,
+                'queries': end_count - count,
+                'sql_ms': (end_sql_time - sql_time) * 1000.0,
+            })
+
+    def summary(self):
+        count, sql_time = _sql_counters()
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000.0, 3),
+            'sql_queries': count - self.query_count,
+            'sql_ms': round((sql_time - self.query_time) * 1000.0, 3),
+            'cache_misses': self.cache_misses,
+            'phases': [
+                dict(phase, ms=round(phase['ms'], 3), sql_ms=round(phase['sql_ms'], 3))
+                for phase in self.phases
+            ],
+        }
+
+    def server_timing(self):
+        """Render the Server-Timing header value"""
+        summary = self.summary()
+        entries = [
+            f'total;dur={summary["total_ms"]}',
+            f'sql;dur={summary["sql_ms"]};desc="{summary["sql_queries"]} queries"',
+            f'cache;desc="{summary["cache_misses"]} misses"',
+        ]
+        for index, phase in enumerate(summary['phases']):
+            # Metric names are tokens: no leading underscore, unique per header.
+            name = phase['name'].strip('_').replace('.', '-') or f'phase{index}'
+            entries.append(f'{name};dur={phase["ms"]};desc="{phase["queries"]} queries"')
+        return ', '.join(entries)
+
+
+def start(enabled, debug=False):
+    _local.timer = RequestTimer(debug=debug) if enabled else None
+    return _local.timer
+
+
+def stop():
+    _local.timer = None
+
+
+def current():
+    return getattr(_local, 'timer', None)
+
+
+def phase(name):
+    timer = getattr(_local, 'timer', None)
+    return timer.phase(name) if timer else nullcontext()
+
+
+def count_cache_miss():
+    timer = getattr(_local, 'timer', None)
+    if timer:
+        timer.cache_misses += 1
@@ -0,0 +1,251 @@
+"""
+Prometheus metrics for the ECIS API, aggregated across prefork workers.
+
+Every worker process keeps its counters in memory and periodically dumps
+them to ``<data_dir>/ecis_metrics/<pid>-<start>.json``, ``start`` being the
+process start time so a recycled pid never adopts an old worker's file.
+Workers also dump on exit: graceful stops, request and memory limit
+recycling all leave through ``sys.exit``, which runs the ``atexit`` flush;
+only a killed worker loses up to ``FLUSH_INTERVAL`` of counts. A scrape
+sums every file; files left behind by workers that have exited are folded
+into ``retired.json`` so the directory does not grow with worker recycling.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+
+from odoo.tools import config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Minimum delay between two dumps of a worker's counters.
+FLUSH_INTERVAL = 2.0
+
+METRIC_HELP = {
+    'ecis_api_requests_total': ('counter', 'ECIS API requests by handler, method and status code.'),
+    'ecis_api_request_duration_seconds': ('histogram', 'ECIS API request latency in seconds.'),
+    'ecis_api_request_size_bytes': ('histogram', 'ECIS API request body size in bytes.'),
+    'ecis_api_response_size_bytes': ('histogram', 'ECIS API response body size in bytes.'),
+}
+
+RETIRED_FILE = 'retired.json'
+
+
+def _directory():
+    return os.path.join(config['data_dir'], 'ecis_metrics')
+
+
+def _process_start(pid):
+    """Start time of process ``pid`` in clock ticks since boot, 0 when unknown"""
+    try:
+        with open(f'/proc/{pid}/stat') as handle:
+            stat = handle.read()
+    except OSError:
+        return 0
+    # The command name may contain spaces; starttime is the 20th field after it.
+    return int(stat.rsplit(')', 1)[1].split()[19])
+
+
+def _pid_alive(pid, start=0):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # Another process that got the same pid does not keep the file alive.
+    return not start or _process_start(pid) in (0, start)
+
+
+def _file_worker(filename):
+    """(pid, start) of a worker file name, None for other files"""
+    pid, _sep, start = filename[:-len('.json')].partition('-')
+    if not pid.isdigit() or (start and not start.isdigit()):
+        return None
+    return int(pid), int(start or 0)
+
+
+class MetricsStore:
+    """In-memory counters and histograms of one worker process"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.pid = os.getpid()
+        self.filename = f'{self.pid}-{_process_start(self.pid)}.json'
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+        self.dirty = False
+
+    def _observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        entry = self.histograms.get(key)
+        if entry is None:
+            entry = self.histograms[key] = {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        entry['buckets'][index] += 1
+        entry['sum'] += value
+        entry['count'] += 1
+
+    def observe_request(self, handler, method, status, seconds, request_bytes, response_bytes):
+        labels = (('handler', handler), ('method', method))
+        with self.lock:
+            key = ('ecis_api_requests_total', labels + (('status', str(status)),))
+            self.counters[key] = self.counters.get(key, 0) + 1
+            self._observe('ecis_api_request_duration_seconds', labels, seconds, LATENCY_BUCKETS)
+            self._observe('ecis_api_request_size_bytes', labels, request_bytes, SIZE_BUCKETS)
+            self._observe('ecis_api_response_size_bytes', labels, response_bytes, SIZE_BUCKETS)
+            self.dirty = True
+        if time.monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), dict(entry, buckets=list(entry['buckets']))]
+                               for (name, labels), entry in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        # A forked child inherits the parent's store and exit handler.
+        if not (self.dirty or force) or self.pid != os.getpid():
+            return
+        self.last_flush = time.monotonic()
+        self.dirty = False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, self.filename)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as handle:
+                json.dump(self.snapshot(), handle)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Metrics must never break a request.
+            self.dirty = True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return this process's store (a fresh one after a fork)"""
+    global _store
+    if _store is None or _store.pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store.pid != os.getpid():
+                _store = MetricsStore(_directory())
+                atexit.register(_store.flush)
+    return _store
+
+
+def _merge(total, data):
+    for name, labels, value in data.get('counters', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for name, labels, entry in data.get('histograms', []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = total['histograms'].get(key)
+        if current is None:
+            total['histograms'][key] = {'buckets': list(entry['buckets']), 'sum': entry['sum'], 'count': entry['count']}
+        else:
+            current['buckets'] = [a + b for a, b in zip(current['buckets'], entry['buckets'])]
+            current['sum'] += entry['sum']
+            current['count'] += entry['count']
+
+
+def _dump(total):
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in total['counters'].items()],
+        'histograms': [[name, list(labels), entry] for (name, labels), entry in total['histograms'].items()],
+    }
+
+
+def collect():
+    """Sum the counters of every worker, folding dead workers into the retired file"""
+    get_store().flush(force=True)
+    directory = _directory()
+    total = {'counters': {}, 'histograms': {}}
+    if not os.path.isdir(directory):
+        return total
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            retired = {'counters': {}, 'histograms': {}}
+            retired_path = os.path.join(directory, RETIRED_FILE)
+            dead = []
+            for filename in os.listdir(directory):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    with open(path) as handle:
+                        data = json.load(handle)
+                except (OSError, ValueError):
+                    continue
+                _merge(total, data)
+                worker = _file_worker(filename)
+                if filename == RETIRED_FILE:
+                    _merge(retired, data)
+                elif worker and not _pid_alive(*worker):
+                    _merge(retired, data)
+                    dead.append(path)
+            if dead:
+                tmp_path = f'{retired_path}.tmp'
+                with open(tmp_path, 'w') as handle:
+                    json.dump(_dump(retired), handle)
+                os.replace(tmp_path, retired_path)
+                for path in dead:
+                    os.unlink(path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return total
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def render(total, gauges=()):
+    """Render aggregated metrics and (name, help, value) gauges in Prometheus text format"""
+    lines = []
+    by_name = {}
+    for (name, labels), value in total['counters'].items():
+        by_name.setdefault(name, []).append(('counter', labels, value))
+    for (name, labels), entry in total['histograms'].items():
+        by_name.setdefault(name, []).append(('histogram', labels, entry))
+
+    for name in sorted(by_name):
+        kind, help_text = METRIC_HELP.get(name, (by_name[name][0][0], name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for _kind, labels, value in sorted(by_name[name], key=lambda item: item[1]):
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            bounds = LATENCY_BUCKETS if name.endswith('_seconds') else SIZE_BUCKETS
+            cumulative = 0
+            for bound, count in zip(list(bounds) + ['+Inf'], value['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {value["sum"]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+
+    for name, help_text, value in gauges:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,115 @@
+"""
+On-demand sampling profiles for API routes, model methods and cron runs.
+
+A profile runs Odoo's sampling profiler (stack samples plus the SQL log)
+around a single call and stores the result on an ``ecis.profile`` record:
+a collapsed-stack file that flamegraph.pl and speedscope read directly,
+and the SQL log as JSON. Profiles never nest; the outermost one wins.
+"""
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools.profiler import Profiler
+
+_logger = logging.getLogger(__name__)
+_local = threading.local()
+
+
+def _frame_label(frame):
+    filename, _lineno, name = frame[0], frame[1], frame[2]
+    return f'{name} ({os.path.basename(filename)})'.replace(';', ':')
+
+
+def collapse_stacks(entries):
+    """Fold sampled stacks into 'outer;...;inner count' lines"""
+    counts = {}
+    for entry in entries:
+        stack = entry.get('stack') or []
+        if not stack:
+            continue
+        key = ';'.join(_frame_label(frame) for frame in stack)
+        counts[key] = counts.get(key, 0) + 1
+    return '\n'.join(f'{stack} {count}' for stack, count in sorted(counts.items())) + '\n'
+
+
+def sql_log(entries):
+    return [{
+        'query': entry.get('full_query') or entry.get('query'),
+        'start': entry.get('start'),
+        'time_ms': round((entry.get('time') or 0.0) * 1000.0, 3),
+    } for entry in entries]
+
+
+def sample_rate(env):
+    value = env['ir.config_parameter'].sudo().get_param('ecis_inspection.profile_sample_rate')
+    try:
+        return float(value or 0.0)
+    except ValueError:
+        return 0.0
+
+
+def should_sample(env):
+    rate = sample_rate(env)
+    return rate > 0 and random.random() < rate
+
+
+def is_active():
+    return getattr(_local, 'active', False)
+
+
+def _save(registry, target, trigger, profiler, duration):
+    collectors = {collector.name: collector.entries for collector in profiler.collectors}
+    traces = collectors.get('traces_async', [])
+    queries = sql_log(collectors.get('sql', []))
+    try:
+        # Separate cursor: the profile must survive a rollback of the request.
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['ecis.profile']._create_from_samples(
+                target, trigger, duration,
+                collapse_stacks(traces), queries, len(traces),
+            )
+    except Exception:
+        _logger.exception("Could not store ECIS profile for %s", target)
+
+
+@contextmanager
+def profile(env, target, trigger):
+    """Profile the enclosed block and store it on an ecis.profile record"""
+    if is_active():
+        yield
+        return
+    _local.active = True
+    profiler = Profiler(collectors=['sql', 'traces_async'], db=None, description=target)
+    started = time.perf_counter()
+    try:
+        with profiler:
+            yield
+    finally:
+        _local.active = False
+        _save(env.registry, target, trigger, profiler, time.perf_counter() - started)
+
+
+def profiled(target):
+    """Profile a model method when the context asks for it or the sample hits"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if is_active():
+                return method(self, *args, **kwargs)
+            if self.env.context.get('ecis_profile'):
+                trigger = 'context'
+            elif should_sample(self.env):
+                trigger = 'sample'
+            else:
+                return method(self, *args, **kwargs)
+            with profile(self.env, target, trigger):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,31 @@
+"""
+In-process request counters for the per-key API rate limits.
+
+Each worker counts the requests of a key over fixed windows of
+``WINDOW`` seconds, so the check never touches the database. With N
+workers a key can make up to N times its limit per window overall.
+"""
+import threading
+import time
+
+WINDOW = 60.0
+
+_lock = threading.Lock()
+_windows = {}   # key -> [window start, requests counted]
+
+
+def hit(key, limit, window=WINDOW):
+    """
+    Count one request of ``key`` against ``limit`` per ``window``; return
+    (allowed, seconds until the window resets). Refused requests are not
+    counted.
+    """
+    now = time.monotonic()
+    with _lock:
+        state = _windows.get(key)
+        if state is None or now - state[0] >= window:
+            state = _windows[key] = [now, 0]
+        if state[1] >= limit:
+            return False, int(state[0] + window - now) + 1
+        state[1] += 1
+        return True, 0
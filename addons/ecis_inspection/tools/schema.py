@@ -0,0 +1,308 @@
+"""
+Declarative request schemas for the ECIS API.
+
+A schema maps parameter names to field specs. It is compiled once, at
+import time, into a validator that coerces a parsed request and returns
+the clean values, or raises SchemaError listing every problem found::
+
+    QUOTE = compile_schema({
+        'email': Email(required=True),
+        'equipment_count': Integer(default=1, minimum=1),
+    })
+    data = QUOTE(parse_body(request.httprequest))
+
+Unknown parameters are dropped, empty strings count as missing and no
+validator touches the database, so bad input is rejected before any query.
+"""
+import json
+import re
+from datetime import date
+
+# Same rules as the ecis.quote.request constraints.
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+PHONE_MIN_DIGITS = 8
+PHONE_SEPARATORS = re.compile(r'[\s\-\(\)]')
+
+# Bodies with these content types are read as form fields, anything else as JSON.
+FORM_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class SchemaError(ValueError):
+    """Raised with ``errors``, a list of {'field', 'code', 'message'} dicts"""
+
+    def __init__(self, errors):
+        super(SchemaError, self).__init__(
+            '; '.join('%s: %s' % (error['field'] or 'body', error['message']) for error in errors))
+        self.errors = errors
+
+
+class Invalid(Exception):
+    """Raised by a field's coercer for a value it cannot accept"""
+
+    def __init__(self, code, message):
+        super(Invalid, self).__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _body_error(code, message):
+    return SchemaError([{'field': None, 'code': code, 'message': message}])
+
+
+# ========== FIELDS ==========
+
+class Field:
+    """
+    Base field spec. ``default`` (a value or a callable) is used when the
+    parameter is missing and not ``required``; without one the key is left
+    out of the result.
+    """
+
+    def __init__(self, required=False, default=None):
+        self.required = required
+        self.default = default
+
+    def coercer(self):
+        """Return a function mapping a raw value to its clean value or raising Invalid"""
+        raise NotImplementedError
+
+
+class String(Field):
+    def __init__(self, max_length=None, pattern=None, message='has an invalid format', strip=True, **kwargs):
+        super(String, self).__init__(**kwargs)
+        self.max_length = max_length
+        self.pattern = pattern
+        self.message = message
+        self.strip = strip
+
+    def coercer(self):
+        max_length, strip, message = self.max_length, self.strip, self.message
+        match = re.compile(self.pattern).match if self.pattern else None
+
+        def coerce(value):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            elif not isinstance(value, str):
+                raise Invalid('type', 'must be a string')
+            if strip:
+                value = value.strip()
+            if max_length and len(value) > max_length:
+                raise Invalid('max_length', 'must be at most %d characters' % max_length)
+            if match and not match(value):
+                raise Invalid('format', message)
+            return value
+        return coerce
+
+
+class Email(String):
+    def __init__(self, max_length=254, **kwargs):
+        super(Email, self).__init__(
+            max_length=max_length, pattern=EMAIL_PATTERN, message='is not a valid email address', **kwargs)
+
+
+class Phone(String):
+    def __init__(self, max_length=32, min_digits=PHONE_MIN_DIGITS, **kwargs):
+        super(Phone, self).__init__(max_length=max_length, **kwargs)
+        self.min_digits = min_digits
+
+    def coercer(self):
+        base, min_digits = super(Phone, self).coercer(), self.min_digits
+
+        def coerce(value):
+            value = base(value)
+            if len(PHONE_SEPARATORS.sub('', value)) < min_digits:
+                raise Invalid('format', 'seems too short')
+            return value
+        return coerce
+
+
+class Integer(Field):
+    """Integer, from a JSON number or a decimal string; ``clamp`` pulls out-of-range values into range"""
+
+    def __init__(self, minimum=None, maximum=None, clamp=False, **kwargs):
+        super(Integer, self).__init__(**kwargs)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.clamp = clamp
+
+    def coercer(self):
+        minimum, maximum, clamp = self.minimum, self.maximum, self.clamp
+
+        def coerce(value):
+            if isinstance(value, bool):
+                raise Invalid('type', 'must be an integer')
+            if isinstance(value, float):
+                if not value.is_integer():
+                    raise Invalid('type', 'must be an integer')
+                value = int(value)
+            elif not isinstance(value, int):
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    raise Invalid('type', 'must be an integer')
+            if minimum is not None and value < minimum:
+                if not clamp:
+                    raise Invalid('minimum', 'must be at least %d' % minimum)
+                value = minimum
+            if maximum is not None and value > maximum:
+                if not clamp:
+                    raise Invalid('maximum', 'must be at most %d' % maximum)
+                value = maximum
+            return value
+        return coerce
+
+
+class Boolean(Field):
+    def coercer(self):
+        def coerce(value):
+            if isinstance(value, bool):
+                return value
+            text = str(value).strip().lower()
+            if text in TRUE_VALUES:
+                return True
+            if text in FALSE_VALUES:
+                return False
+            raise Invalid('type', 'must be a boolean')
+        return coerce
+
+
+class Date(Field):
+    """ISO 8601 date (YYYY-MM-DD)"""
+
+    def coercer(self):
+        def coerce(value):
+            try:
+                return date.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise Invalid('format', 'must be a date (YYYY-MM-DD)')
+        return coerce
+
+
+class Choice(Field):
+    """One of ``values``: codes, a selection list of (code, label) pairs or a dict"""
+
+    def __init__(self, values, **kwargs):
+        super(Choice, self).__init__(**kwargs)
+        self.values = tuple(
+            value[0] if isinstance(value, (tuple, list)) else value
+            for value in values
+        )
+
+    def coercer(self):
+        allowed = frozenset(self.values)
+        message = 'must be one of: %s' % ', '.join(sorted(self.values))
+
+        def coerce(value):
+            if not isinstance(value, str) or value not in allowed:
+                raise Invalid('choice', message)
+            return value
+        return coerce
+
+
+class Object(Field):
+    """JSON object, passed through unchanged"""
+
+    def coercer(self):
+        def coerce(value):
+            if not isinstance(value, dict):
+                raise Invalid('type', 'must be an object')
+            return value
+        return coerce
+
+
+class List(Field):
+    """
+    List of ``item`` values. Form fields may send it comma-separated;
+    ``unique`` drops repeated values, keeping the first occurrence.
+    """
+
+    def __init__(self, item, min_items=None, max_items=None, unique=False, **kwargs):
+        super(List, self).__init__(**kwargs)
+        self.item = item
+        self.min_items = min_items
+        self.max_items = max_items
+        self.unique = unique
+
+    def coercer(self):
+        item, min_items, max_items, unique = self.item.coercer(), self.min_items, self.max_items, self.unique
+
+        def coerce(value):
+            if isinstance(value, str):
+                value = [part for part in value.split(',') if part.strip()]
+            elif not isinstance(value, list):
+                raise Invalid('type', 'must be a list')
+            if min_items and len(value) < min_items:
+                raise Invalid('min_items', 'must contain at least %d item(s)' % min_items)
+            if max_items and len(value) > max_items:
+                raise Invalid('max_items', 'must contain at most %d items' % max_items)
+            clean = []
+            for index, element in enumerate(value):
+                try:
+                    clean.append(item(element))
+                except Invalid as exc:
+                    raise Invalid(exc.code, 'item %d %s' % (index, exc.message))
+            return list(dict.fromkeys(clean)) if unique else clean
+        return coerce
+
+
+# ========== COMPILATION ==========
+
+def compile_schema(spec):
+    """
+    Compile ``spec`` ({name: Field}) into ``validate(payload) -> dict``,
+    which raises SchemaError with one entry per invalid parameter
+    """
+    plan = tuple(
+        (name, field.required, field.default, field.coercer())
+        for name, field in spec.items()
+    )
+
+    def validate(payload):
+        if not isinstance(payload, dict):
+            raise _body_error('type', 'must be a JSON object')
+        clean, errors = {}, []
+        for name, required, default, coerce in plan:
+            value = payload.get(name)
+            if value is None or value == '':
+                if required:
+                    errors.append({'field': name, 'code': 'required', 'message': 'is required'})
+                elif default is not None:
+                    clean[name] = default() if callable(default) else default
+                continue
+            try:
+                clean[name] = coerce(value)
+            except Invalid as exc:
+                errors.append({'field': name, 'code': exc.code, 'message': exc.message})
+        if errors:
+            raise SchemaError(errors)
+        return clean
+
+    validate.fields = tuple(spec)
+    return validate
+
+
+def parse_body(httprequest):
+    """
+    Return the query string parameters overlaid with the body, parsed once
+    according to its Content-Type: form fields for form and multipart
+    bodies, JSON for anything else. Raises SchemaError for malformed JSON
+    or a JSON body that is not an object.
+    """
+    payload = httprequest.args.to_dict() if httprequest.args else {}
+    if httprequest.mimetype in FORM_TYPES:
+        payload.update(httprequest.form.to_dict())
+        return payload
+    raw = httprequest.get_data(cache=True)
+    if not raw or raw.isspace():
+        return payload
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise _body_error('json', 'is not valid JSON')
+    if not isinstance(body, dict):
+        raise _body_error('type', 'must be a JSON object')
+    payload.update(body)
+    return payload
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from . import branding
+from . import controllers
+from . import models
+
+_logger = logging.getLogger(__name__)
+
+
+def build_branding_assets():
+    """Build the hashed branding variants; keep serving the source images when that fails"""
+    from . import build_assets
+    if build_assets.Image is None:
+        _logger.warning("Pillow is not installed, the branding assets were not built")
+        return
+    try:
+        count, total = build_assets.build()
+    except OSError:
+        _logger.warning("Could not write the branding assets to %s", build_assets.DIST, exc_info=True)
+        return
+    branding._load_manifest.cache_clear()
+    _logger.info("Built %d branding assets (%.1f KB)", count, total / 1024)
+
+
+def post_init_hook(env):
+    build_branding_assets()
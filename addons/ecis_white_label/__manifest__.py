@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'ECIS White Label',
-    'version': '1.0.1',
+    'version': '1.0.2',
     'category': 'Tools',
     'summary': 'Simple ECIS branding for web UI',
     'description': """
@@ -20,6 +20,7 @@ Small UI branding tweaks for the web client.
             'ecis_white_label/static/src/css/ecis_branding.css',
         ],
     },
+    'post_init_hook': 'post_init_hook',
     'installable': True,
     'application': True,
     'auto_install': False,
@@ -0,0 +1,96 @@
+"""
+Lookups into the manifest written by build_assets.py.
+
+Templates reach these through the ``ecis_branding`` QWeb value. The build
+runs when the addon is installed or upgraded; if it could not (no Pillow,
+read-only addons path) every helper falls back to the original source
+images and no critical CSS, so the pages still render.
+"""
+import functools
+import json
+import os
+
+from markupsafe import Markup
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MANIFEST = os.path.join(ROOT, 'static', 'dist', 'manifest.json')
+
+# Hashed files are served from here with immutable cache headers.
+ASSET_ROUTE = '/ecis_white_label/assets'
+
+SOURCES = {
+    'icon': '/ecis_white_label/static/src/img/icon.png',
+    'logo': '/ecis_white_label/static/src/img/logo.jpeg',
+}
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'png': 'image/png', 'jpeg': 'image/jpeg'}
+
+
+@functools.lru_cache(maxsize=1)
+def _load_manifest():
+    with open(MANIFEST, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def manifest():
+    # A missing manifest is not cached, so workers pick up a later build.
+    try:
+        return _load_manifest()
+    except (OSError, ValueError):
+        return {}
+
+
+def filenames():
+    """Every hashed file listed in the manifest"""
+    return {
+        filename
+        for image in manifest().get('images', {}).values()
+        for entries in image['variants'].values()
+        for _width, filename in entries
+    }
+
+
+def url(name, width=None):
+    """URL of the smallest fallback-format variant at least ``width`` pixels wide"""
+    image = manifest().get('images', {}).get(name)
+    if not image:
+        return SOURCES[name]
+    entries = image['variants'][image['fallback']]
+    for entry_width, filename in entries:
+        if width is None or entry_width >= width:
+            return f'{ASSET_ROUTE}/{filename}'
+    return f'{ASSET_ROUTE}/{entries[-1][1]}'
+
+
+def _srcset(entries):
+    return ', '.join(f'{ASSET_ROUTE}/{filename} {width}w' for width, filename in entries)
+
+
+def picture(name, sizes, alt='', display_width=None):
+    """<picture> with one <source> per modern format and a responsive fallback <img>"""
+    image = manifest().get('images', {}).get(name)
+    if not image:
+        return Markup('<img src="%s" alt="%s"/>') % (SOURCES[name], alt)
+    sources = Markup('').join(
+        Markup('<source type="%s" srcset="%s" sizes="%s"/>') % (MIME_TYPES[fmt], _srcset(entries), sizes)
+        for fmt, entries in image['variants'].items()
+        if fmt != image['fallback']
+    )
+    # Intrinsic dimensions let the browser reserve the space before loading.
+    return Markup(
+        '<picture>%s<img src="%s" srcset="%s" sizes="%s" width="%s" height="%s" alt="%s" decoding="async"/></picture>'
+    ) % (
+        sources,
+        url(name, display_width),
+        _srcset(image['variants'][image['fallback']]),
+        sizes,
+        image['width'],
+        image['height'],
+        alt,
+    )
+
+
+def critical_css():
+    css = manifest().get('critical_css')
+    # Only the tag-closing sequence is unsafe inside <style>.
+    return Markup('<style id="ecis_critical_css">%s</style>') % Markup(css.replace('</', '<\\/')) if css else ''
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Build the optimised ECIS branding assets.
+
+Writes resized AVIF (when Pillow supports it), WebP and PNG/JPEG variants of
+the brand images and the minified critical CSS to ``static/dist`` under
+content-hashed names, plus ``manifest.json`` describing them. The addon
+serves these names with immutable cache headers. The addon runs the build
+when it is installed or upgraded; run it by hand after changing a source
+file on a running server:
+
+    python3 addons/ecis_white_label/build_assets.py
+
+Inside the Odoo container, where Pillow is installed:
+
+    docker compose run --rm web python3 /mnt/extra-addons/ecis_white_label/build_assets.py
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = features = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DIST = os.path.join(ROOT, 'static', 'dist')
+
+# name -> (source, widths). Widths cover 1x/2x of the displayed sizes and are
+# capped at the source width.
+IMAGES = {
+    'icon': ('static/src/img/icon.png', (32, 64, 150)),
+    'logo': ('static/src/img/logo.jpeg', (240, 480, 960, 1128)),
+}
+
+CRITICAL_CSS = 'static/src/css/ecis_critical.css'
+
+QUALITY = {'avif': 55, 'webp': 80, 'jpeg': 82}
+
+
+def _avif_supported():
+    # Native since Pillow 11.3, otherwise through pillow-avif-plugin.
+    Image.init()
+    if 'AVIF' not in Image.SAVE:
+        return False
+    return 'avif' not in features.modules or features.check_module('avif')
+
+
+def _formats(fallback):
+    """Formats to encode, most compact first (the order of the <source> elements)"""
+    formats = ['webp', fallback]
+    if _avif_supported():
+        formats.insert(0, 'avif')
+    return formats
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    elif fmt == 'jpeg':
+        image.convert('RGB').save(buffer, 'JPEG', quality=QUALITY['jpeg'], optimize=True, progressive=True)
+    elif fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=QUALITY['webp'], method=6)
+    else:
+        image.save(buffer, 'AVIF', quality=QUALITY['avif'])
+    return buffer.getvalue()
+
+
+def _write(name, suffix, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    filename = f'{name}.{digest}.{suffix}'
+    with open(os.path.join(DIST, filename), 'wb') as handle:
+        handle.write(content)
+    return filename
+
+
+def build_image(name, source, widths):
+    image = Image.open(os.path.join(ROOT, source))
+    image.load()
+    fallback = 'png' if image.format == 'PNG' else 'jpeg'
+    variants = {}
+    for fmt in _formats(fallback):
+        entries = []
+        for width in sorted({min(w, image.width) for w in widths}):
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            entries.append([width, _write(f'{name}-{width}', fmt, _encode(resized, fmt))])
+        variants[fmt] = entries
+    return {
+        'width': image.width,
+        'height': image.height,
+        'fallback': fallback,
+        'variants': variants,
+    }
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};:,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def build():
+    """Rebuild ``static/dist``; return the number of files and bytes written"""
+    os.makedirs(DIST, exist_ok=True)
+    for filename in os.listdir(DIST):
+        os.remove(os.path.join(DIST, filename))
+
+    manifest = {'images': {}}
+    for name, (source, widths) in IMAGES.items():
+        manifest['images'][name] = build_image(name, source, widths)
+    with open(os.path.join(ROOT, CRITICAL_CSS), encoding='utf-8') as handle:
+        manifest['critical_css'] = minify_css(handle.read())
+
+    with open(os.path.join(DIST, 'manifest.json'), 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+
+    total = sum(os.path.getsize(os.path.join(DIST, f)) for f in os.listdir(DIST))
+    return len(os.listdir(DIST)), total
+
+
+def main():
+    if Image is None:
+        sys.exit("Pillow is required: pip install Pillow")
+    count, total = build()
+    print(f"Wrote {count} files ({total / 1024:.1f} KB) to {DIST}")
+
+
+if __name__ == '__main__':
+    main()
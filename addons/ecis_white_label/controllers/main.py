@@ -0,0 +1,15 @@
+from odoo import http
+from odoo.http import request
+
+from .. import branding
+
+
+class EcisBrandingAssets(http.Controller):
+
+    @http.route(f'{branding.ASSET_ROUTE}/<string:filename>', type='http', auth='none', methods=['GET'])
+    def branding_asset(self, filename):
+        """Serve a content-hashed branding file; its URL changes with its content"""
+        if filename not in branding.filenames():
+            raise request.not_found()
+        stream = http.Stream.from_path(f'ecis_white_label/static/dist/{filename}')
+        return stream.get_response(max_age=http.STATIC_CACHE_LONG, immutable=True)
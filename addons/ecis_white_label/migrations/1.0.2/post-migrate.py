@@ -0,0 +1,6 @@
+from odoo.addons.ecis_white_label import build_branding_assets
+
+
+def migrate(cr, version):
+    # Installs from before the post_init_hook never built static/dist.
+    build_branding_assets()
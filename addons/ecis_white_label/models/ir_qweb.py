@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+
+from odoo import models
+
+from .. import branding
+
+# Exposed to every QWeb template as ``ecis_branding``.
+BRANDING_HELPERS = SimpleNamespace(
+    url=branding.url,
+    picture=branding.picture,
+    critical_css=branding.critical_css,
+)
+
+
+class IrQWeb(models.AbstractModel):
+    _inherit = 'ir.qweb'
+
+    def _prepare_environment(self, values):
+        values.setdefault('ecis_branding', BRANDING_HELPERS)
+        return super(IrQWeb, self)._prepare_environment(values)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Load generator for the ECIS HTTP API.
+
+Replays a recorded trace or a synthetic request mix against a running Odoo
+and reports throughput, latency percentiles and error rates per request
+kind, optionally diffed against a saved baseline.
+
+Trace files are JSON lines, one request per line::
+
+    {"name": "intake", "method": "POST", "path": "/api/quote-request",
+     "body": {...}, "headers": {...}, "at": 0.25}
+
+``at`` (seconds from the start of the trace) is optional; when present the
+original pacing is kept, scaled by ``--speed``. Without it the requests are
+sent as fast as ``--concurrency`` allows, or at ``--rate`` per second.
+
+Examples::
+
+    # 4 workers, synthetic mix, 2000 requests
+    python3 scripts/ecis_loadgen.py --api-key KEY --requests 2000 --concurrency 4
+
+    # open model: Poisson arrivals at 30 req/s for 5 minutes
+    python3 scripts/ecis_loadgen.py --api-key KEY --rate 30 --duration 300 \\
+        --mix intake=6,list=3,search=1
+
+    # replay a recorded trace twice as fast and compare with last week
+    python3 scripts/ecis_loadgen.py --api-key KEY --trace monday.jsonl --speed 2 \\
+        --baseline baseline.json
+
+Only the standard library is used so the script runs on any machine with
+Python 3.8+.
+"""
+import argparse
+import itertools
+import json
+import math
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+EQUIPMENT_TYPES = ['crane', 'elevator', 'pressure_vessel', 'forklift', 'overhead_crane', 'lifting_platform']
+SEARCH_TERMS = ['corrosion', 'wire rope', 'hydraulic leak', 'brake wear', '"safety valve" -elevator', 'fissure']
+
+DEFAULT_MIX = 'intake=5,list=3,search=2,report=0,checklist=0'
+
+# Relative increase over the baseline reported as a regression.
+DEFAULT_TOLERANCE = 0.10
+
+
+# ========== REQUEST FACTORIES ==========
+
+def _intake(args, rng, seq):
+    return {
+        'method': 'POST',
+        'path': '/api/quote-request',
+        'body': {
+            'name': f'Load Test {seq}',
+            'email': f'loadtest+{seq}@example.com',
+            'phone': f'+213 555 {seq % 1000000:06d}',
+            'company_name': f'Load Test Client {seq % 500}',
+            'equipment_type': rng.choice(EQUIPMENT_TYPES),
+            'equipment_count': rng.randint(1, 5),
+            'urgency': rng.choice(['normal', 'normal', 'normal', 'urgent']),
+            'location': 'Alger',
+            'message': 'Generated by ecis_loadgen',
+        },
+    }
+
+
+def _list(args, rng, seq):
+    return {
+        'method': 'GET',
+        'path': f'/api/sync/pull?inspector_id={args.inspector_id}&limit=200',
+    }
+
+
+def _search(args, rng, seq):
+    term = urllib.request.quote(rng.choice(SEARCH_TERMS))
+    return {'method': 'GET', 'path': f'/api/inspections/search?q={term}&limit=50'}
+
+
+def _report(args, rng, seq):
+    return {'method': 'GET', 'path': f'/api/inspections/{rng.choice(args.inspection_ids)}/report'}
+
+
+def _checklist(args, rng, seq):
+    return {'method': 'GET', 'path': f'/api/inspections/{rng.choice(args.inspection_ids)}/checklist'}
+
+
+FACTORIES = {
+    'intake': _intake,
+    'list': _list,
+    'search': _search,
+    'report': _report,
+    'checklist': _checklist,
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _sep, weight = item.partition('=')
+        if name not in FACTORIES:
+            raise argparse.ArgumentTypeError(f'unknown request kind {name!r} (expected one of {", ".join(FACTORIES)})')
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('the mix needs at least one positive weight')
+    return mix
+
+
+def synthetic_requests(args):
+    """Yield (offset, request) pairs drawn from the weighted mix"""
+    rng = random.Random(args.seed)
+    kinds = [kind for kind, weight in args.mix.items() if weight > 0]
+    weights = [args.mix[kind] for kind in kinds]
+    if any(kind in ('report', 'checklist') for kind in kinds) and not args.inspection_ids:
+        sys.exit('report and checklist requests need --inspection-ids')
+    offset = 0.0
+    for seq in itertools.count(1):
+        if args.requests and seq > args.requests:
+            return
+        kind = rng.choices(kinds, weights)[0]
+        request = FACTORIES[kind](args, rng, seq)
+        request['name'] = kind
+        if args.rate:
+            offset += rng.expovariate(args.rate)
+            yield offset, request
+        else:
+            yield None, request
+
+
+def trace_requests(args):
+    """Yield (offset, request) pairs from a JSONL trace, scaled by --speed"""
+    with open(args.trace) as handle:
+        count = 0
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            request = json.loads(line)
+            request.setdefault('method', 'GET')
+            request.setdefault('name', request['path'].split('?')[0])
+            at = request.get('at')
+            yield (at / args.speed if at is not None else None), request
+            count += 1
+            if args.requests and count >= args.requests:
+                return
+
+
+# ========== EXECUTION ==========
+
+def send(args, request):
+    """Send one request; return (status, seconds, response bytes)"""
+    url = args.url.rstrip('/') + request['path']
+    headers = {'Accept': 'application/json', 'User-Agent': 'ecis-loadgen'}
+    if args.api_key:
+        headers['X-API-Key'] = args.api_key
+    headers.update(request.get('headers') or {})
+    data = None
+    if request.get('body') is not None:
+        data = json.dumps(request['body']).encode('utf-8')
+        headers.setdefault('Content-Type', 'application/json')
+    http_request = urllib.request.Request(url, data=data, headers=headers, method=request['method'])
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(http_request, timeout=args.timeout) as response:
+            size = len(response.read())
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        size = len(exc.read() or b'')
+        status = exc.code
+    except (urllib.error.URLError, OSError):
+        size, status = 0, 0
+    return status, time.perf_counter() - started, size
+
+
+def run(args, source):
+    """
+    Drive ``source`` with ``--concurrency`` workers and return the samples.
+
+    Paced requests (trace offsets or ``--rate``) are measured from their
+    scheduled start, so a saturated server shows up as latency instead of
+    silently lowering the offered load.
+    """
+    jobs = queue.Queue(maxsize=args.concurrency * 4)
+    samples = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            scheduled, request = job
+            status, seconds, size = send(args, request)
+            if scheduled is not None:
+                seconds = max(seconds, time.perf_counter() - scheduled)
+            with lock:
+                samples.append((request['name'], status, seconds, size))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    for offset, request in source:
+        if args.duration and time.perf_counter() - started >= args.duration:
+            break
+        scheduled = None
+        if offset is not None:
+            scheduled = started + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        jobs.put((scheduled, request))
+    for _thread in threads:
+        jobs.put(None)
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+# ========== REPORTING ==========
+
+def percentile(values, pct):
+    """Nearest-rank percentile of sorted ``values``"""
+    if not values:
+        return 0.0
+    rank = max(int(math.ceil(pct / 100.0 * len(values))), 1)
+    return values[rank - 1]
+
+
+def summarize(samples, elapsed):
+    groups = {'all': samples}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+    summary = {}
+    for name, items in groups.items():
+        latencies = sorted(item[2] for item in items)
+        errors = sum(1 for item in items if not 200 <= item[1] < 400)
+        summary[name] = {
+            'requests': len(items),
+            'throughput': round(len(items) / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(errors / len(items), 4) if items else 0.0,
+            'p50_ms': round(percentile(latencies, 50) * 1000.0, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000.0, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000.0, 1),
+            'max_ms': round(latencies[-1] * 1000.0, 1) if latencies else 0.0,
+            'bytes_avg': round(sum(item[3] for item in items) / len(items)) if items else 0,
+            'statuses': {
+                str(status): sum(1 for item in items if item[1] == status)
+                for status in sorted({item[1] for item in items})
+            },
+        }
+    return summary
+
+
+def print_summary(summary, elapsed):
+    print(f'elapsed {elapsed:.1f}s')
+    print(f'{"kind":<14}{"reqs":>8}{"req/s":>9}{"err%":>7}{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}')
+    for name in sorted(summary, key=lambda n: (n != 'all', n)):
+        row = summary[name]
+        print(f'{name:<14}{row["requests"]:>8}{row["throughput"]:>9.1f}{row["error_rate"] * 100:>6.1f}%'
+              f'{row["p50_ms"]:>9.1f}{row["p95_ms"]:>9.1f}{row["p99_ms"]:>9.1f}{row["max_ms"]:>9.1f}')
+
+
+def compare(summary, baseline, tolerance):
+    """Print the diff against ``baseline`` and return the regressions"""
+    regressions = []
+    print(f'\n{"kind":<14}{"metric":<12}{"baseline":>10}{"current":>10}{"change":>9}')
+    for name, row in sorted(summary.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput', 'error_rate'):
+            old, new = previous.get(metric, 0.0), row[metric]
+            change = (new - old) / old if old else 0.0
+            # Throughput regresses when it drops; everything else when it grows.
+            worse = -change if metric == 'throughput' else change
+            if metric == 'error_rate':
+                worse = new - old
+            flag = ''
+            if worse > tolerance:
+                flag = '  REGRESSION'
+                regressions.append((name, metric, old, new))
+            print(f'{name:<14}{metric:<12}{old:>10}{new:>10}{change * 100:>8.1f}%{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://localhost:8069', help='Odoo base URL')
+    parser.add_argument('--api-key', help='value sent as X-API-Key')
+    parser.add_argument('--trace', help='JSONL trace to replay instead of the synthetic mix')
+    parser.add_argument('--speed', type=float, default=1.0, help='trace replay speed factor')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'synthetic request weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--requests', type=int, default=0, help='stop after this many requests')
+    parser.add_argument('--duration', type=float, default=0, help='stop after this many seconds')
+    parser.add_argument('--concurrency', type=int, default=4, help='parallel connections')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='synthetic arrival rate in requests/s (Poisson); 0 sends back to back')
+    parser.add_argument('--inspector-id', type=int, default=2, help='inspector used by list requests')
+    parser.add_argument('--inspection-ids', type=lambda v: [int(i) for i in v.split(',') if i],
+                        default=[], help='comma-separated ids used by report and checklist requests')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the synthetic mix')
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-request timeout in seconds')
+    parser.add_argument('--output', help='write the summary as JSON to this file')
+    parser.add_argument('--save-baseline', help='write the summary as the new baseline to this file')
+    parser.add_argument('--baseline', help='compare against this baseline and exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='relative change reported as a regression (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    if not (args.requests or args.duration or args.trace):
+        args.requests = 1000
+    source = trace_requests(args) if args.trace else synthetic_requests(args)
+    samples, elapsed = run(args, source)
+    if not samples:
+        sys.exit('no request was sent')
+
+    summary = summarize(samples, elapsed)
+    print_summary(summary, elapsed)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as handle:
+            json.dump(summary, handle, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if compare(summary, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+#!/bin/bash
+# Runs once, when the primary's data directory is first initialised:
+# let the streaming replica connect for replication.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
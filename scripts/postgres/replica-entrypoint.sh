@@ -0,0 +1,13 @@
+#!/bin/bash
+# Streaming hot-standby stand-in for local testing of ecis_replica_uri.
+# Clones the primary on first start, then follows it read-only.
+set -e
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_basebackup -h "$PRIMARY_HOST" -U "$PRIMARY_USER" -D "$PGDATA" -R -X stream; do
+        echo "Waiting for the primary at $PRIMARY_HOST..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chmod 700 "$PGDATA"
+fi
+exec postgres -c hot_standby=on